@@ -15,4 +15,5 @@ if not _ASTROPY_SETUP_:
     from .redshift import redshift
     from .accumulate import accumulate
     from .resample import resample
+    from .rebin import rebin
     from .downsample import downsample
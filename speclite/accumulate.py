@@ -6,9 +6,11 @@ from __future__ import print_function, division
 import numpy as np
 import numpy.ma as ma
 
+from .utils import validate_mask
+
 
 def accumulate(data1_in, data2_in, data_out=None,
-               join=None, add=None, weight=None):
+               join=None, add=None, weight=None, mask1=None, mask2=None):
     """Combine the data from two spectra.
 
     Values x1 and x2 with corresponding weights w1 and w2 are combined as::
@@ -66,6 +68,12 @@ def accumulate(data1_in, data2_in, data_out=None,
     With this pattern, the result array is allocated on the first iteration
     and then re-used for all subsequent iterations.
 
+    Instead of using masked arrays, invalid input values can also be
+    specified with separate boolean masks ``mask1`` and ``mask2``, which
+    avoids any masked array operations. Invalid values are given zero weight
+    in the same way as masked values, and the output weight identifies
+    output values with no valid inputs.
+
     Parameters
     ----------
     data1_in : numpy.ndarray or numpy.ma.MaskedArray or None
@@ -91,6 +99,14 @@ def accumulate(data1_in, data2_in, data_out=None,
         is not present in either input a weight value of one will be used.
         The output array will contain a field with this name, if it is not
         None, containing values for w12.
+    mask1 : numpy.ndarray or string or None
+        Boolean array with the same shape as ``data1_in`` that is True for
+        invalid values, or the name of a field in ``data1_in`` whose zero
+        values identify invalid values. Cannot be used with a masked
+        ``data1_in``.
+    mask2 : numpy.ndarray or string or None
+        Boolean array or field name identifying invalid values in
+        ``data2_in``, with the same conventions as ``mask1``.
 
     Returns
     -------
@@ -209,6 +225,24 @@ def accumulate(data1_in, data2_in, data_out=None,
         if np.any(mask) and weight is None:
             raise ValueError('Output weight required for masked input data.')
 
+    # Set weights to zero for any invalid elements identified by a separate
+    # mask, without modifying the input weights.
+    for label, mask, data_in in (
+            ('mask1', mask1, data1_in), ('mask2', mask2, data2_in)):
+        if mask is None:
+            continue
+        if data_in is None:
+            raise ValueError('Cannot specify {0} without input.'.format(label))
+        mask = validate_mask(mask, data_in)
+        if np.any(mask):
+            if weight is None:
+                raise ValueError(
+                    'Output weight required for masked input data.')
+            if label == 'mask1':
+                weight1 = np.where(mask, 0, weight1)
+            else:
+                weight2 = np.where(mask, 0, weight2)
+
     if len(dtype_out) == 0:
         raise ValueError('No result fields specified.')
 
@@ -230,22 +264,26 @@ def accumulate(data1_in, data2_in, data_out=None,
         for name in join_names:
             data_out[name][:] = data2_in[name]
 
-    mask2 = weight2 != 0
+    valid2 = weight2 != 0
     if data1_in is None:
         for name in add_names:
-            data_out[name][mask2] = data2_in[name][mask2]
+            data_out[name][valid2] = data2_in[name][valid2]
         if weight is not None:
             data_out[weight][:] = weight2
     else:
-        # Accumulate add fields.
-        mask1 = weight1 != 0
+        # Accumulate add fields.  Values with zero weight are never used, so
+        # invalid values in either input do not affect the result.
+        valid1 = weight1 != 0
+        only2 = valid2 & ~valid1
+        both = valid1 & valid2
         weight_sum = weight1 + weight2
         for name in add_names:
             if data_out is not data1_in:
-                data_out[name][mask1] = data1_in[name][mask1]
-            data_out[name][mask2] += (
-                weight2[mask2] / weight_sum[mask2] *
-                (data2_in[name][mask2] - data1_in[name][mask2]))
+                data_out[name][valid1] = data1_in[name][valid1]
+            data_out[name][both] += (
+                weight2[both] / weight_sum[both] *
+                (data2_in[name][both] - data1_in[name][both]))
+            data_out[name][only2] = data2_in[name][only2]
 
         if weight is not None:
             data_out[weight][:] = weight_sum
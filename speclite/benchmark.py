@@ -74,6 +74,14 @@ def magnitude_calculation(results, num_repeats):
     timing = 1e6 * (time.time() - start) / num_repeats
     results.add_row(('filters', 'FilterConvolution __call__', timing))
 
+    plan = speclite.filters.PhotometryPlan(
+        speclite.filters.load_filters('sdss2010-r', 'sdss2010-i'), wlen)
+    start = time.time()
+    for i in xrange(num_repeats):
+        m = plan.get_ab_maggies(flux)
+    timing = 1e6 * (time.time() - start) / num_repeats
+    results.add_row(('filters', 'PhotometryPlan (2 bands)', timing))
+
     spectra = np.ones((num_repeats, len(wlen))) * flux_unit
     start = time.time()
     m = rband.get_ab_maggies(spectra, wlen)
@@ -6,9 +6,11 @@ from __future__ import print_function, division
 import numpy as np
 import numpy.ma as ma
 
+from .utils import validate_mask
+
 
 def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
-               auto_trim=True, data_out=None):
+               auto_trim=True, data_out=None, mask=None):
     """Downsample spectral data by a constant factor.
 
     Downsampling consists of dividing the input data into fixed-size groups of
@@ -59,6 +61,18 @@ def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
     own output weight field.  As a consequence, masking a single input field
     is equivalent to masking all input fields.
 
+    Invalid input values can also be specified with a separate boolean
+    ``mask``, or with the name of a field (e.g., an inverse variance) whose
+    zero values identify invalid inputs. In this case, all calculations use
+    plain numpy arrays and a plain boolean mask of output values with no
+    valid inputs is returned with the result:
+
+    >>> data = np.ones((6,), dtype=[('flux', float), ('ivar', float)])
+    >>> data['ivar'][:2] = 0
+    >>> out, mask = downsample(data, 2, weight='ivar', mask='ivar')
+    >>> np.array_equal(mask, [True, False, False])
+    True
+
     Parameters
     ----------
     data_in : numpy.ndarray or numpy.ma.MaskedArray
@@ -89,16 +103,25 @@ def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
         and returned. Use this method to take control of the memory allocation
         and, for example, re-use the same output array for a sequence of
         downsampling operations.
+    mask : numpy.ndarray or string or None
+        Boolean array with the same shape as ``data_in`` that is True for
+        invalid input values, or the name of a field in ``data_in`` whose zero
+        values identify invalid input values. Invalid values are given zero
+        weight. Cannot be used with a masked ``data_in``.
 
     Returns
     -------
-    numpy.ndarray or numpy.ma.MaskedArray
+    numpy.ndarray or numpy.ma.MaskedArray or tuple
         Structured numpy array of downsampled result, containing the same
         fields as the input data and the same shape except along the specified
         downsampling axis. If the input data is masked, the output data will
         also be masked, with each output field's mask determined by the
         combination of the optional weight field mask and the corresponding
-        input field mask.
+        input field mask.  When ``mask`` is specified, a tuple
+        ``(data_out, mask_out)`` is returned instead, where ``data_out`` is
+        never masked and ``mask_out`` is a boolean array with the same shape
+        that is True for output values with no valid inputs. These output
+        values are set to zero.
     """
     if not isinstance(data_in, np.ndarray):
         raise ValueError('Invalid data_in type: {0}.'.format(type(data_in)))
@@ -128,6 +151,9 @@ def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
             'Input data does not evenly divide with downsampling = {0}.'
             .format(downsampling))
 
+    mask = validate_mask(mask, data_in)
+    return_mask = mask is not None
+
     if weight is not None:
         if not isinstance(weight, basestring):
             raise ValueError('Invalid weight type: {0}.'.format(type(weight)))
@@ -143,6 +169,11 @@ def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
             weights_in = ma.ones(shape_in)
         else:
             weights_in = np.ones(shape_in)
+    if mask is not None and np.any(mask):
+        # Give invalid values zero weight without modifying the input.
+        weights_in = np.where(mask, 0, weights_in)
+    else:
+        mask = None
 
     shape_out = list(shape_in)
     shape_out[axis] = num_downsampled
@@ -182,17 +213,27 @@ def downsample(data_in, downsampling, weight=None, axis=-1, start_index=0,
     weights_out = np.sum(
         weights_in[start_index:stop_index].reshape(expanded_shape),
         axis=sum_axis)
+    if return_mask:
+        # Avoid dividing by zero for output values with no valid inputs.
+        mask_out = weights_out == 0
+        divisor = np.where(mask_out, 1, weights_out)
+    else:
+        divisor = weights_out
     for field in data_in.dtype.fields:
         if field == weight:
             continue
-        weighted = (
-            weights_in[start_index:stop_index] *
-            data_in[field][start_index:stop_index])
+        values = data_in[field][start_index:stop_index]
+        if mask is not None:
+            # Replace invalid values so they cannot introduce NaNs.
+            values = np.where(mask[start_index:stop_index], 0, values)
+        weighted = weights_in[start_index:stop_index] * values
         if ma.isMA(data_in):
             weighted.mask = or_mask
         data_out[field] = np.sum(
-            weighted.reshape(expanded_shape), axis=sum_axis) / weights_out
+            weighted.reshape(expanded_shape), axis=sum_axis) / divisor
     if weight is not None:
         data_out[weight] = weights_out
 
+    if return_mask:
+        return data_out, mask_out
     return data_out
@@ -75,6 +75,12 @@ in http://arxiv.org/abs/astro-ph/0205243.  This is supported with the
 Note that a shifted filter has a different wavelength coverage, so
 may require :ref:`padding of your input spectra <wavelength-padding>`.
 
+To calculate AB maggies for many different shifts of the same filter, for
+example to tabulate k-corrections, use a :class:`BandShiftPlan` instead of
+creating each shifted filter separately.
+Use a :class:`RedshiftPlan` to calculate the observed-frame AB maggies of
+templates over a grid of redshifts, for example for photometric redshifts.
+
 .. _convolution-operator:
 
 Convolutions
@@ -212,9 +218,24 @@ array of 5000 spectra is about 10x faster than calling it 5000 times with the
 individual spectra.  However, in order to take advantage of this speedup,
 your spectra need to all use the same wavelength grid.
 
-Note that the eliminating flux units (which are always optional) from your
-input spectra will only result in about a 10% speedup, so units are generally
-recommended.
+When you need photometry in several bands for many batches of spectra on the
+same wavelength grid, create a :class:`PhotometryPlan` once and re-use it.
+A plan calculates the AB maggies in all of its bands with a single matrix
+product, so avoids any per-band or per-spectrum overhead.  For batches that
+are too large to fit in memory, use :meth:`PhotometryPlan.stream_ab_maggies`
+to process a memory-mapped array of spectra in chunks of bounded size.
+Large batches can also be split between several processes with the
+``n_workers`` option of the photometry methods.
+
+The convenience methods that accept tabulated spectra cache the
+:class:`FilterConvolution` objects they create, so repeated calls with the
+same wavelength grid do not repeat the setup work. Use
+:func:`convolution_cache_info` to check how effective this cache is.
+
+Flux and wavelength units (which are always optional) have almost no
+performance impact, since the scale factor between each pair of units is only
+calculated once and, for fluxes, is applied to the results rather than the
+input spectra, so units are generally recommended.
 
 Attributes
 ----------
@@ -233,6 +254,11 @@ import os.path
 import glob
 import re
 import collections
+import copy
+import json
+import threading
+import weakref
+import zlib
 
 import numpy as np
 
@@ -242,6 +268,7 @@ import scipy.integrate
 import astropy.table
 import astropy.units
 import astropy.utils.data
+from astropy import log
 
 
 filter_group_names = [
@@ -282,8 +309,249 @@ _group_wildcard = re.compile('^([a-zA-Z_][a-zA-Z0-9_]*)-\*\Z')
 _full_name_pattern = re.compile(
     '^([a-zA-Z_][a-zA-Z0-9_]*)-([a-zA-Z_][a-zA-Z0-9_]*)\Z')
 
-# Dictionary of cached FilterResponse objects.
-_filter_cache = {}
+# Calling conventions supported by tabulate_function_of_wavelength, in the
+# order they are tried.
+_function_conventions = (
+    'broadcast_units', 'broadcast', 'iterate_units', 'iterate')
+
+# Remember the calling convention that worked for each function, without
+# keeping the functions alive.  Each key is a function or the instance of a
+# bound method, and maps to a dictionary of conventions keyed by the
+# underlying function of each method, or None.
+_function_convention_memo = weakref.WeakKeyDictionary()
+
+# Remember the scale factor between each pair of (from, to) units.
+_unit_scale_memo = {}
+
+# Name of the binary bundle of standard filter responses in data/filters/.
+_filter_bundle_name = 'filters.npz'
+
+# Contents of the standard filter bundle, which are read on first use.
+_filter_bundle = None
+
+# Index of the filter groups that can be loaded with a "<group_name>-*"
+# wildcard, which is built on first use.  Each group name maps to a list of
+# (effective_wavelength, name, file_name) tuples sorted by effective
+# wavelength, with effective wavelengths in default_wavelength_unit.
+_filter_group_index = None
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'nbytes'])
+
+# Default maxsize for clearing a cache without changing its limit, since None
+# means no limit.
+_keep_maxsize = object()
+
+
+class _LRUCache(object):
+    """A thread-safe cache that discards its least recently used entries.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        Maximum number of entries to keep, or None for no limit.
+    sizeof : callable
+        Function that returns the approximate number of bytes of memory
+        used by a cached value.  This is evaluated by :meth:`info`, so
+        reflects any memory that a value uses after it was cached.
+    """
+    def __init__(self, maxsize=None, sizeof=lambda value: 0):
+        self.maxsize = maxsize
+        self._sizeof = sizeof
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key):
+        """Return the value cached for key, or None."""
+        with self._lock:
+            try:
+                # Re-insert the entry to mark it as most recently used.
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+
+    def put(self, key, value):
+        """Cache a value, discarding old entries if necessary."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+
+    def clear(self, maxsize=_keep_maxsize):
+        """Remove all entries, reset statistics and optionally resize."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if maxsize is not _keep_maxsize:
+                self.maxsize = maxsize
+
+
+    def info(self):
+        """Return a :class:`CacheInfo` summary of this cache."""
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries),
+                sum(self._sizeof(value) for value in self._entries.values()))
+
+
+# Registry of FilterResponse objects that load_filter can return without
+# reading them again, keyed by their canonical name.
+_filter_cache = _LRUCache(
+    maxsize=None,
+    sizeof=lambda response: (
+        response.wavelength.nbytes + response.response.nbytes))
+
+
+def filter_cache_info():
+    """Return statistics for the registry of filter responses.
+
+    Every :class:`FilterResponse` without a wavelength shift is registered
+    under its canonical name when it is created (unless its ``register``
+    parameter is False), and :func:`load_filter` returns a registered
+    filter without loading it again.  The registry is safe to use from
+    multiple threads and can be bounded with :func:`clear_filter_cache`,
+    in which case the least recently used filters are discarded first.
+
+    Returns
+    -------
+    CacheInfo
+        Named tuple of (hits, misses, maxsize, currsize, nbytes), where
+        nbytes is the approximate memory used by the registered response
+        curves.
+    """
+    return _filter_cache.info()
+
+
+def clear_filter_cache(maxsize=_keep_maxsize):
+    """Clear the registry of filter responses and reset its statistics.
+
+    Filters that are cleared from the registry will be loaded again the next
+    time they are requested with :func:`load_filter`.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        New maximum number of filter responses to register, or None for no
+        limit.  The current limit is kept when this is not specified.
+    """
+    _filter_cache.clear(maxsize)
+
+
+# Cache of FilterConvolution objects used by the convenience methods below.
+# Each value is a (wavelength, convolution) tuple.
+_convolution_cache = _LRUCache(
+    maxsize=128,
+    sizeof=lambda value: value[0].nbytes + sum(
+        weights.nbytes for weights in value[1].integral_weights.values()))
+
+
+def convolution_cache_info():
+    """Return statistics for the cache of filter convolutions.
+
+    The convenience methods :meth:`FilterResponse.convolve_with_array`,
+    :meth:`FilterResponse.get_ab_maggies` and
+    :meth:`FilterSequence.get_ab_maggies` re-use :class:`FilterConvolution`
+    objects created for the same filter and wavelength grid:
+
+    >>> clear_convolution_cache()
+    >>> rband = load_filter('sdss2010-r')
+    >>> wlen = np.arange(5000., 7500., 2.)
+    >>> flux = np.ones_like(wlen)
+    >>> maggies = rband.get_ab_maggies(flux, wlen)
+    >>> maggies = rband.get_ab_maggies(2 * flux, wlen)
+    >>> info = convolution_cache_info()
+    >>> print(info.hits, info.misses, info.currsize)
+    1 1 1
+
+    Returns
+    -------
+    CacheInfo
+        Named tuple of (hits, misses, maxsize, currsize, nbytes), where
+        nbytes is the approximate memory used by the cached convolutions.
+    """
+    return _convolution_cache.info()
+
+
+def clear_convolution_cache(maxsize=_keep_maxsize):
+    """Clear the cache of filter convolutions and reset its statistics.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        New maximum number of convolutions to cache, or None for no limit.
+        The current limit is kept when this is not specified.
+    """
+    _convolution_cache.clear(maxsize)
+
+
+def _get_unit_scale(unit, target_unit):
+    """Return the scale factor that converts values in unit to target_unit.
+
+    Factors are calculated once for each pair of units, so that callers
+    can convert small results instead of large input arrays.
+
+    Raises
+    ------
+    astropy.units.UnitConversionError
+        The units are not convertible.
+    """
+    key = (unit, target_unit)
+    try:
+        return _unit_scale_memo[key]
+    except KeyError:
+        scale = unit.to(target_unit)
+        _unit_scale_memo[key] = scale
+        return scale
+
+
+def _split_units(values):
+    """Split values into an array without units and its units.
+
+    The returned array is a view of any input Quantity, so this never copies
+    or rescales the input values. The returned units are None for an input
+    without units.
+    """
+    try:
+        return values.value, values.unit
+    except AttributeError:
+        return np.asarray(values), None
+
+
+def _strip_units(values, target_unit, description):
+    """Split values into an array without units and a scale factor.
+
+    Values with units are not rescaled here, so the caller must multiply any
+    linear result by the returned scale to convert it to target_unit.  Values
+    without units are assumed to be in target_unit and have a scale of one.
+
+    Raises
+    ------
+    ValueError
+        The values have units that are not convertible to target_unit.  The
+        description is used to identify the values in the error message.
+    """
+    values_no_units, unit = _split_units(values)
+    if unit is None:
+        return values_no_units, 1.
+    try:
+        return values_no_units, _get_unit_scale(unit, target_unit)
+    except astropy.units.UnitConversionError:
+        raise ValueError(
+            '{0} units {1} not convertible to {2}.'
+            .format(description, unit, target_unit))
 
 
 def ab_reference_flux(wavelength, magnitude=0.):
@@ -337,9 +605,11 @@ def validate_wavelength_array(wavelength, min_length=0):
     This function will not perform any copying or allocation if the input
     is already a numpy array or astropy Quantity.
 
+    A :class:`WavelengthGrid` is accepted without repeating its validation.
+
     Parameters
     ----------
-    wavelength : array
+    wavelength : array or :class:`WavelengthGrid`
         A 1D array of strictly increasing wavelength values with optional
         units.  If units are included, they must be convertible to
         :attr:`default_wavelength_unit`.  Otherwise, the
@@ -362,12 +632,16 @@ def validate_wavelength_array(wavelength, min_length=0):
         The wavelength array has units that are not convertible to
         :attr:`default_wavelength_unit`
     """
-    try:
-        # This multiplies by a scalar conversion factor, not a unit.
-        wavelength_no_units = wavelength.to(default_wavelength_unit).value
-    except AttributeError:
-        # No units present, so assume default units.
-        wavelength_no_units = np.asarray(wavelength)
+    if isinstance(wavelength, WavelengthGrid):
+        if len(wavelength) < min_length:
+            raise ValueError('Minimum length is {0}.'.format(min_length))
+        return wavelength.wavelength
+    wavelength_no_units, unit = _split_units(wavelength)
+    if unit is not None:
+        # Only rescale (and copy) the input if its units require it.
+        scale = _get_unit_scale(unit, default_wavelength_unit)
+        if scale != 1:
+            wavelength_no_units = wavelength_no_units * scale
     if np.isscalar(wavelength_no_units) or len(wavelength_no_units.shape) != 1:
         raise ValueError('Wavelength array must be 1D.')
     if len(wavelength_no_units) < min_length:
@@ -377,9 +651,281 @@ def validate_wavelength_array(wavelength, min_length=0):
     return wavelength_no_units
 
 
-def tabulate_function_of_wavelength(function, wavelength, verbose=False):
+class WavelengthGrid(object):
+    """A validated wavelength grid with cached derived quantities.
+
+    A grid is validated once when it is created, and then accepted by
+    :func:`validate_wavelength_array` (and so by any method with a wavelength
+    parameter) without checking it again:
+
+    >>> grid = WavelengthGrid(np.linspace(3500, 10500, 7001))
+    >>> grid.spacing
+    'linear'
+    >>> rband = load_filter('sdss2010-r')
+    >>> flux = np.ones((10, len(grid)))
+    >>> maggies = rband.get_ab_maggies(flux, grid)
+
+    Grids whose wavelengths are uniformly spaced in wavelength or in its
+    logarithm are detected, and use O(1) arithmetic instead of a binary
+    search to locate wavelengths with :meth:`searchsorted`.  Use a grid to
+    avoid repeatedly scanning large wavelength arrays when the same grid is
+    used for many calls.
+
+    Parameters
+    ----------
+    wavelength : array
+        A :func:`valid array <validate_wavelength_array>` of wavelengths,
+        which is copied.
+    min_length : int
+        The minimum required length of the wavelength array.
+
+    Attributes
+    ----------
+    wavelength : numpy.ndarray
+        Read-only array of wavelengths without units, but with values given
+        in :attr:`default_wavelength_unit`.
+    spacing : str or None
+        Either 'linear' or 'log' for a grid that is uniformly spaced in
+        wavelength or log(wavelength), respectively, or else None.
+    """
+    def __init__(self, wavelength, min_length=0):
+        self.wavelength = np.array(
+            validate_wavelength_array(wavelength, min_length), dtype=float)
+        self.wavelength.setflags(write=False)
+        self._fingerprint = None
+        self._edges = None
+
+        # Detect a uniform spacing in wavelength or log(wavelength).
+        self.spacing, self._origin, self._step = None, None, None
+        num_wavelength = len(self.wavelength)
+        if num_wavelength >= 2:
+            candidates = [('linear', self.wavelength)]
+            if self.wavelength[0] > 0:
+                candidates.append(('log', np.log(self.wavelength)))
+            index = np.arange(num_wavelength)
+            for spacing, x in candidates:
+                step = (x[-1] - x[0]) / (num_wavelength - 1)
+                if np.allclose(x, x[0] + step * index, rtol=0,
+                               atol=1e-6 * step):
+                    self.spacing, self._origin, self._step = (
+                        spacing, x[0], step)
+                    break
+
+
+    def __len__(self):
+        return len(self.wavelength)
+
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.wavelength, dtype=dtype)
+
+
+    @property
+    def fingerprint(self):
+        """Hashable fingerprint of this grid's wavelengths.
+
+        The fingerprint is not guaranteed to be unique, so should only be used
+        to find candidate grids that are then compared.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = _get_grid_fingerprint(self.wavelength)
+        return self._fingerprint
+
+
+    @property
+    def edges(self):
+        """Array of the edges of bins centered on each wavelength.
+
+        Internal edges are halfway between consecutive wavelengths (in log
+        wavelength for a log-spaced grid) and the outer edges are half a bin
+        beyond the first and last wavelengths.
+        """
+        if self._edges is None:
+            x = self.wavelength
+            if self.spacing == 'log':
+                x = np.log(x)
+            if len(x) < 2:
+                raise ValueError('Cannot calculate edges with < 2 wavelengths.')
+            edges = np.empty(len(x) + 1)
+            edges[1:-1] = 0.5 * (x[1:] + x[:-1])
+            edges[0] = x[0] - 0.5 * (x[1] - x[0])
+            edges[-1] = x[-1] + 0.5 * (x[-1] - x[-2])
+            if self.spacing == 'log':
+                edges = np.exp(edges)
+            edges.setflags(write=False)
+            self._edges = edges
+        return self._edges
+
+
+    def searchsorted(self, values, side='left'):
+        """Find the indices where values would be inserted to maintain order.
+
+        Equivalent to :func:`numpy.searchsorted` on our wavelengths, but uses
+        O(1) arithmetic for each value instead of a binary search when this
+        grid is uniformly spaced.
+
+        Parameters
+        ----------
+        values : float or array
+            Wavelength value(s) without units, in
+            :attr:`default_wavelength_unit`.
+        side : str
+            Either 'left' or 'right'.  See :func:`numpy.searchsorted`.
+
+        Returns
+        -------
+        int or numpy.ndarray
+            Insertion indices with the same shape as values.
+        """
+        if self.spacing is None:
+            return np.searchsorted(self.wavelength, values, side)
+        if side not in ('left', 'right'):
+            raise ValueError('Invalid side "{0}".'.format(side))
+
+        wavelength = self.wavelength
+        num_wavelength = len(wavelength)
+        values = np.asarray(values, dtype=float)
+        if self.spacing == 'log':
+            # Any value below the first wavelength has index 0.
+            x = np.log(np.maximum(values, 0.5 * wavelength[0]))
+        else:
+            x = values
+        # Estimate the index, which can only be off by one due to rounding.
+        position = (x - self._origin) / self._step
+        if side == 'left':
+            index = np.ceil(position)
+        else:
+            index = np.floor(position) + 1
+        index = np.where(np.isnan(index), num_wavelength,
+                         np.clip(index, 0, num_wavelength)).astype(int)
+        # Correct the estimate using the actual wavelengths.
+        below = wavelength[np.maximum(index - 1, 0)]
+        above = wavelength[np.minimum(index, num_wavelength - 1)]
+        if side == 'left':
+            index -= (index > 0) & (below >= values)
+            index += (index < num_wavelength) & (above < values)
+        else:
+            index -= (index > 0) & (below > values)
+            index += (index < num_wavelength) & (above <= values)
+        return index[()]
+
+
+def _get_convention_memo_keys(function):
+    """Return the keys used to remember the calling convention of a function.
+
+    Bound methods are created on each attribute access, so are identified by
+    their instance and underlying function rather than by themselves.
+
+    Returns
+    -------
+    tuple
+        Tuple (owner, method) where owner is a weak key for
+        ``_function_convention_memo`` and method is the underlying function
+        of a bound method, or else None.
+    """
+    try:
+        return function.__self__, function.__func__
+    except AttributeError:
+        return function, None
+
+
+def _call_with_convention(function, wavelength, convention):
+    """Evaluate a function of wavelength using one calling convention.
+
+    Parameters
+    ----------
+    function : callable
+        See :func:`tabulate_function_of_wavelength` for details.
+    wavelength : astropy.units.Quantity
+        Array of wavelengths in :attr:`default_wavelength_unit`.
+    convention : str
+        One of the names in ``_function_conventions``.
+
+    Returns
+    -------
+    tuple
+        Tuple (values, units) of function values at each input wavelength.
+
+    Raises
+    ------
+    RuntimeError
+        Function returns inconsistent units when iterating.
+    """
+    function_units = None
+    if convention == 'broadcast_units' or convention == 'broadcast':
+        if convention == 'broadcast_units':
+            function_values = function(wavelength)
+        else:
+            function_values = function(wavelength.value)
+        try:
+            function_units = function_values.unit
+            function_values = function_values.value
+        except AttributeError:
+            # Ok if the function does not return any units.
+            pass
+        return function_values, function_units
+
+    function_values = []
+    for i, w in enumerate(wavelength.value):
+        if convention == 'iterate_units':
+            value = function(w * default_wavelength_unit)
+        else:
+            value = function(w)
+        # Check that the function is consistent in the units it returns.
+        if i == 0:
+            # Remember the units of the first function value.
+            try:
+                function_units = value.unit
+                value = value.value
+            except AttributeError:
+                # Ok if the function does not return any units.
+                pass
+        elif function_units == None:
+            try:
+                new_units = value.unit
+                # Function has units now but did not earlier.
+                raise RuntimeError(
+                    'Inconsistent function units: none, {0}.'
+                    .format(new_units))
+            except AttributeError:
+                # Still no units, as expected.
+                pass
+        else:
+            try:
+                if function_units != value.unit:
+                    # Function units have changed.
+                    raise RuntimeError(
+                        'Inconsistent function units: {0}, {1}.'
+                        .format(function_units, value.unit))
+            except AttributeError:
+                # Function had units before but does not now.
+                raise RuntimeError(
+                    'Inconsistent function units: {0}, none.'
+                    .format(function_units))
+            value = value.value
+
+        function_values.append(value)
+    function_values = np.asarray(function_values)
+    return function_values, function_units
+
+
+def tabulate_function_of_wavelength(function, wavelength, verbose=False,
+                                    convention=None):
     """Evaluate a function of wavelength.
 
+    Functions can be called using any of the following conventions:
+
+    - broadcast_units: called once with an array of wavelengths with units.
+    - broadcast: called once with an array of wavelengths without units.
+    - iterate_units: called for each wavelength with units.
+    - iterate: called for each wavelength without units.
+
+    When no convention is specified, they are tried in this order until one
+    succeeds, and the convention that worked is remembered for the next
+    call with the same function.  The iterate conventions are much slower
+    since they call the function once per wavelength, so an informational
+    message is logged when a function falls back to them.
+
     Parameters
     ----------
     function : callable
@@ -394,149 +940,156 @@ def tabulate_function_of_wavelength(function, wavelength, verbose=False):
         evaluated.  Wavelengths must have valid units.
     verbose : bool
         Print details of the sequence of attempts used to call the function.
+    convention : str or None
+        Name of the calling convention to use, from the list above, or None
+        to find one that works.
 
     Returns
     -------
     tuple
         Tuple (values, units) of function values at each input wavelength.
+
+    Raises
+    ------
+    ValueError
+        Invalid wavelength or convention, or the function cannot be called
+        with any (or the specified) convention.
+    RuntimeError
+        Function returns inconsistent units.
     """
     try:
         wavelength = wavelength.to(default_wavelength_unit)
     except (AttributeError, astropy.units.UnitConversionError):
         raise ValueError('Cannot evaluate function for invalid wavelength.')
 
-    function_units = None
-    # Try broadcasting our wavelength array with its units.
-    if verbose:
-        print('Trying to broadcast with units.')
-    try:
-        function_values = function(wavelength)
+    if convention is not None:
+        if convention not in _function_conventions:
+            raise ValueError(
+                'Invalid convention "{0}". Pick one of {1}.'
+                .format(convention, _function_conventions))
+        conventions = [convention]
+        remembered = None
+    else:
+        owner, method = _get_convention_memo_keys(function)
         try:
-            function_units = function_values.unit
-            function_values = function_values.value
-        except AttributeError:
-            # Ok if the function does not return any units.
-            pass
-        return function_values, function_units
-    except Exception as e:
-        # Keep trying.
+            remembered = _function_convention_memo.get(owner, {}).get(method)
+        except TypeError:
+            # Some callables do not support weak references.
+            remembered = None
+        conventions = list(_function_conventions)
+        if remembered is not None:
+            # Try the convention that worked last time first.
+            conventions.remove(remembered)
+            conventions.insert(0, remembered)
+
+    logged = False
+    for attempt in conventions:
         if verbose:
-            print('Failed: {0}'.format(e))
-    # Try broadcasting our wavelength array without its units.
-    if verbose:
-        print('Trying to broadcast without units.')
-    try:
-        function_values = function(wavelength.value)
+            print('Trying to {0} {1} units.'.format(
+                attempt.split('_')[0],
+                'with' if attempt.endswith('_units') else 'without'))
+        if convention is None and remembered is None and not logged and \
+                attempt.startswith('iterate'):
+            log.info(
+                'Function {0} does not broadcast and will be evaluated one '
+                'wavelength at a time.'.format(function))
+            logged = True
         try:
-            function_units = function_values.unit
-            function_values = function_values.value
-        except AttributeError:
-            # Ok if the function does not return any units.
-            pass
-        return function_values, function_units
-    except Exception as e:
-        # Keep trying.
-        if verbose:
-            print('Failed: {0}'.format(e))
-    # Try looping over wavelengths and including units.
-    if verbose:
-        print('Trying to iterate with units.')
-    try:
-        function_values = []
-        for i, w in enumerate(wavelength.value):
-            value = function(w * default_wavelength_unit)
-            # Check that the function is consistent in the units it returns.
-            if i == 0:
-                # Remember the units of the first function value.
-                try:
-                    function_units = value.unit
-                    value = value.value
-                except AttributeError:
-                    # Ok if the function does not return any units.
-                    pass
-            elif function_units == None:
-                try:
-                    new_units = value.unit
-                    # Function has units now but did not earlier.
-                    raise RuntimeError(
-                        'Inconsistent function units: none, {0}.'
-                        .format(new_units))
-                except AttributeError:
-                    # Still no units, as expected.
-                    pass
-            else:
-                try:
-                    if function_units != value.unit:
-                        # Function units have changed.
-                        raise RuntimeError(
-                            'Inconsistent function units: {0}, {1}.'
-                            .format(function_units, value.unit))
-                except AttributeError:
-                    # Function had units before but does not now.
-                    raise RuntimeError(
-                        'Inconsistent function units: {0}, none.'
-                        .format(function_units))
-                value = value.value
+            result = _call_with_convention(function, wavelength, attempt)
+        except RuntimeError as e:
+            if attempt.startswith('iterate'):
+                raise e
+            if verbose:
+                print('Failed: {0}'.format(e))
+            continue
+        except Exception as e:
+            # Keep trying.
+            if verbose:
+                print('Failed: {0}'.format(e))
+            continue
+        if convention is None and attempt != remembered:
+            try:
+                _function_convention_memo.setdefault(owner, {})[method] = (
+                    attempt)
+            except TypeError:
+                pass
+        return result
+    # If we get here, none of the above strategies worked.
+    raise ValueError('Invalid function.')
 
-            function_values.append(value)
-        function_values = np.asarray(function_values)
-        return function_values, function_units
-    except RuntimeError as e:
-        raise e
-    except Exception as e:
-        # Keep trying.
-        if verbose:
-            print('Failed: {0}'.format(e))
-    # Try looping over wavelengths and not including units.
-    if verbose:
-        print('Trying to iterate without units.')
-    try:
-        function_values = []
-        for i, w in enumerate(wavelength.value):
-            value = function(w)
-            # Check that the function is consistent in the units it returns.
-            if i == 0:
-                # Remember the units of the first function value.
-                try:
-                    function_units = value.unit
-                    value = value.value
-                except AttributeError:
-                    # Ok if the function does not return any units.
-                    pass
-            elif function_units == None:
-                try:
-                    new_units = value.unit
-                    # Function has units now but did not earlier.
-                    raise RuntimeError(
-                        'Inconsistent function units: none, {0}.'
-                        .format(new_units))
-                except AttributeError:
-                    # Still no units, as expected.
-                    pass
-            else:
-                try:
-                    if function_units != value.unit:
-                        # Function units have changed.
-                        raise RuntimeError(
-                            'Inconsistent function units: {0}, {1}.'
-                            .format(function_units, value.unit))
-                except AttributeError:
-                    # Function had units before but does not now.
-                    raise RuntimeError(
-                        'Inconsistent function units: {0}, none.'
-                        .format(function_units))
-                value = value.value
 
-            function_values.append(value)
-        function_values = np.asarray(function_values)
-        return function_values, function_units
-    except RuntimeError as e:
-        raise e
-    except Exception as e:
-        if verbose:
-            print('Failed: {0}'.format(e))
-        # If we get here, none of the above strategies worked.
-        raise ValueError('Invalid function.')
+# Powers of wavelength for the moments calculated by _get_response_moments.
+_moment_powers = np.arange(-1, 4)
+
+# Nodes and weights of 3-point Gauss-Legendre quadrature on [0, 1], which is
+# exact for polynomials up to degree 5.
+_gauss_legendre_nodes = 0.5 + np.array([-0.5, 0., 0.5]) * np.sqrt(0.6)
+_gauss_legendre_weights = np.array([5., 8., 5.]) / 18.
+
+
+def _get_response_moments(wavelength, response, offsets=None):
+    """Calculate exact moments of piecewise linear response functions.
+
+    The moment of order :math:`k` is the integral of
+    :math:`R(\lambda) \lambda^k` where :math:`R(\lambda)` linearly
+    interpolates the tabulated response and is zero outside the tabulated
+    range.  The moments are calculated exactly (up to rounding errors) for
+    :math:`k = -1, 0, 1, 2, 3`, using Gauss-Legendre quadrature for the
+    polynomial moments and a closed form for :math:`k = -1`.
+
+    Several response functions can be processed in one pass by concatenating
+    their arrays and specifying the offset where each one starts.
+
+    Parameters
+    ----------
+    wavelength : numpy.ndarray
+        Array of wavelengths without units.
+    response : numpy.ndarray
+        Array of response values, with the same length as wavelength.
+    offsets : array or None
+        Array of indices into wavelength where each response function starts,
+        followed by the total length.  When None, the arrays contain a single
+        response function.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (num_responses, 5) whose columns are the moments of
+        order -1, 0, 1, 2, 3 for each response function.
+    """
+    if offsets is None:
+        offsets = [0, len(wavelength)]
+    offsets = np.asarray(offsets)
+    lo, hi = wavelength[:-1], wavelength[1:]
+    r_lo, r_hi = response[:-1], response[1:]
+    width = hi - lo
+
+    contributions = np.empty((len(lo), len(_moment_powers)))
+    # Integrate the polynomial moments at the nodes of each segment.
+    t = _gauss_legendre_nodes[:, np.newaxis]
+    nodes = lo + t * width
+    weighted = (r_lo + t * (r_hi - r_lo)) * width * (
+        _gauss_legendre_weights[:, np.newaxis])
+    for i, power in enumerate(_moment_powers[1:]):
+        contributions[:, i + 1] = np.sum(weighted * nodes ** power, axis=0)
+
+    # The order -1 moment of each segment is r_lo * w_lo + r_hi * w_hi with
+    # w_hi = 1 - log(1 + x) / x and w_lo = log(1 + x) - w_hi, where
+    # x = width / lo.  Use a series expansion of w_hi when x is small to
+    # avoid cancellation.
+    x = width / lo
+    log1px = np.log1p(x)
+    small = np.abs(x) < 1e-2
+    w_hi = np.empty_like(x)
+    w_hi[~small] = 1 - log1px[~small] / x[~small]
+    xs = x[small]
+    w_hi[small] = xs * (1 / 2. - xs * (1 / 3. - xs * (1 / 4. - xs * (
+        1 / 5. - xs * (1 / 6. - xs * (1 / 7. - xs / 8.))))))
+    contributions[:, 0] = r_lo * (log1px - w_hi) + r_hi * w_hi
+
+    # Drop the segments that join consecutive response functions.
+    contributions[offsets[1:-1] - 1] = 0.
+    return np.add.reduceat(contributions, offsets[:-1], axis=0)
 
 
 class FilterResponse(object):
@@ -611,6 +1164,11 @@ class FilterResponse(object):
     filters can be created from non-shifted filters using
     :meth:`create_shifted`.
 
+    The :attr:`interpolator`, :attr:`effective_wavelength` and
+    :attr:`ab_zeropoint` properties are only calculated when they are first
+    used, so creating many filter objects (for example, with
+    :meth:`create_shifted`) is cheap.
+
     Parameters
     ----------
     wavelength : array
@@ -632,24 +1190,19 @@ class FilterResponse(object):
         A shift to apply to filter wavelengths (but not response values).
         A shifted filter cannot be saved or further shifted, but can
         otherwise be used like any other filter.
+    register : bool
+        Register a filter without any band shift under its canonical name, so
+        that :func:`load_filter` can return it.  Any filter already registered
+        with the same name is replaced.  See :func:`filter_cache_info` for
+        details.
 
     Attributes
     ----------
     name : str
         Canonical name of this filter response in the format
         "<group_name>-<band_name>".
-    effective_wavelength : :class:`astropy.units.Quantity`
-        Mean :ref:`photon-weighted <weights>` wavelength of this response
-        function, as defined above.
-    ab_zeropoint : :class:`astropy.units.Quantity`
-        Zeropoint for this filter response in the AB system, as defined
-        :ref:`above <magnitude>`, and including units.
     meta : dict
         Dictionary of metadata associated with this filter.
-    interpolator : :class:`scipy.interpolate.interp1d`
-        Linear interpolator of our response function that returns zero for
-        all values outside our wavelength range.  Should normally be evaluated
-        through our :meth:`__call__` convenience method.
 
 
 
@@ -659,7 +1212,8 @@ class FilterResponse(object):
         Invalid wavelength or response input arrays, or missing required keys
         in the input metadata.
     """
-    def __init__(self, wavelength, response, meta, band_shift=None):
+    def __init__(self, wavelength, response, meta, band_shift=None,
+                 register=True):
 
         self._wavelength = validate_wavelength_array(wavelength, min_length=3)
 
@@ -707,27 +1261,19 @@ class FilterResponse(object):
             except TypeError:
                 raise ValueError('Invalid value type for {0}.'.format(required))
 
-        # Create a linear interpolator of our response function that returns
-        # zero outside of our wavelength range.
-        self.interpolator = scipy.interpolate.interp1d(
-            self._wavelength, self._response, kind='linear',
-            copy=False, bounds_error=False, fill_value=0.)
-
-        # Calculate this filter's effective wavelength.
-        one = astropy.units.Quantity(1.)
-        numer = self.convolve_with_function(lambda wlen: wlen)
-        denom = self.convolve_with_function(lambda wlen: one)
-        self.effective_wavelength = numer / denom
-
-        # Calculate this filter's zeropoint in the AB system.
-        self.ab_zeropoint = self.convolve_with_function(
-            ab_reference_flux, units=default_flux_unit)
+        # Derived quantities are calculated on demand by our properties.
+        self._interpolator = None
+        self._moments = None
+        self._effective_wavelength = None
+        self._ab_zeropoint = None
 
         self.name = '{0}-{1}'.format(meta['group_name'], meta['band_name'])
         if self.band_shift is None:
-            # Remember this object in our cache so that load_filter can find it.
-            # In case this object is already in our cache, overwrite it now.
-            _filter_cache[self.name] = self
+            if register:
+                # Remember this object in our cache so that load_filter can
+                # find it. In case this object is already in our cache,
+                # overwrite it now.
+                _filter_cache.put(self.name, self)
         else:
             # Add the band_shift to the name.
             self.name += '-shift({0})'.format(self.band_shift)
@@ -760,35 +1306,150 @@ class FilterResponse(object):
         return self._response
 
 
-    def create_shifted(self, band_shift):
-        """Create a copy of this filter response with shifted wavelengths.
-
-        A filter response :math:`R(\lambda)` is transformed to blue-shifted
-        response :math:`R((1+z)\lambda)` by shifting the wavelengths where its
-        response values are tabulated from :math:`\lambda_i` to
-        :math:`\lambda_i/(1+z)`.  Note that only
-        the tabulated wavelengths are transformed and not the response values.
-        See http://arxiv.org/abs/astro-ph/0205243 for applications.
-        A shifted filter cannot be saved or further shifted, but can
-        otherwise be used like any other filter.
+    @property
+    def interpolator(self):
+        """Linear interpolator of this filter's response function.
 
-        Parameters
-        ----------
-        band_shift : float or None
-            Shift to apply to filter wavelengths (but not response values).
+        The interpolator returns zero for all values outside our wavelength
+        range, and should normally be evaluated through our :meth:`__call__`
+        convenience method.  It is created the first time it is used.
 
         Returns
         -------
-        FilterResponse
-            A new filter object that is a copy of this filter but with the
-            specified wavelength shift applied.
-
-        Raises
-        ------
-        RuntimeError
-            Cannot apply a second wavelength shift to a filter response.
+        :class:`scipy.interpolate.interp1d`
         """
-        if self.band_shift is not None:
+        if self._interpolator is None:
+            self._interpolator = scipy.interpolate.interp1d(
+                self._wavelength, self._response, kind='linear',
+                copy=False, bounds_error=False, fill_value=0.)
+        return self._interpolator
+
+
+    def _get_moments(self):
+        """Return the exact moments of our response function.
+
+        The moments are calculated by :func:`_get_response_moments` the first
+        time they are needed.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of the moments of order -1, 0, 1, 2, 3.
+        """
+        if self._moments is None:
+            self._moments = _get_response_moments(
+                self._wavelength, self._response)[0]
+        return self._moments
+
+
+    @property
+    def effective_wavelength(self):
+        """Mean :ref:`photon-weighted <weights>` wavelength of this response.
+
+        The value is calculated as defined above the first time it is used,
+        by integrating the linear interpolation of our response exactly.
+
+        Returns
+        -------
+        :class:`astropy.units.Quantity`
+        """
+        if self._effective_wavelength is None:
+            moments = self._get_moments()
+            self._effective_wavelength = (
+                moments[3] / moments[2] * default_wavelength_unit)
+        return self._effective_wavelength
+
+
+    @property
+    def pivot_wavelength(self):
+        """Pivot wavelength of this response.
+
+        The pivot wavelength :math:`\lambda_p` of a :ref:`photon-weighted
+        <weights>` response is defined by
+
+        .. math::
+
+            \lambda_p^2 \equiv F[R, 1] / F[R, \lambda^{-2}]
+
+        and converts between the mean flux densities per unit frequency and
+        per unit wavelength in this band.
+
+        Returns
+        -------
+        :class:`astropy.units.Quantity`
+        """
+        moments = self._get_moments()
+        return np.sqrt(moments[2] / moments[0]) * default_wavelength_unit
+
+
+    @property
+    def bandwidth(self):
+        """RMS width of this response about its effective wavelength.
+
+        The bandwidth is the :ref:`photon-weighted <weights>` standard
+        deviation of wavelength, :math:`(F[R, \lambda^2] / F[R, 1] -
+        \lambda_{eff}^2)^{1/2}`.
+
+        Returns
+        -------
+        :class:`astropy.units.Quantity`
+        """
+        moments = self._get_moments()
+        mean = moments[3] / moments[2]
+        return np.sqrt(moments[4] / moments[2] - mean ** 2) * (
+            default_wavelength_unit)
+
+
+    @property
+    def ab_zeropoint(self):
+        """Zeropoint for this filter response in the AB system.
+
+        The zeropoint is defined :ref:`above <magnitude>` and calculated the
+        first time it is used, by integrating the linear interpolation of our
+        response exactly.
+
+        Returns
+        -------
+        :class:`astropy.units.Quantity`
+        """
+        if self._ab_zeropoint is None:
+            # The photon-weighted AB reference flux is proportional to
+            # 1 / wavelength.
+            self._ab_zeropoint = (
+                self._get_moments()[0] * _ab_constant / _hc_constant)
+        return self._ab_zeropoint
+
+
+    def create_shifted(self, band_shift):
+        """Create a copy of this filter response with shifted wavelengths.
+
+        A filter response :math:`R(\lambda)` is transformed to blue-shifted
+        response :math:`R((1+z)\lambda)` by shifting the wavelengths where its
+        response values are tabulated from :math:`\lambda_i` to
+        :math:`\lambda_i/(1+z)`.  Note that only
+        the tabulated wavelengths are transformed and not the response values.
+        See http://arxiv.org/abs/astro-ph/0205243 for applications.
+        A shifted filter cannot be saved or further shifted, but can
+        otherwise be used like any other filter.  Use :class:`BandShiftPlan`
+        to efficiently calculate AB maggies for many different shifts.
+
+        Parameters
+        ----------
+        band_shift : float or None
+            Shift to apply to filter wavelengths (but not response values).
+
+        Returns
+        -------
+        FilterResponse
+            A new filter object that is a copy of this filter but with the
+            specified wavelength shift applied.
+
+        Raises
+        ------
+        RuntimeError
+            Cannot apply a second wavelength shift to a filter response.
+        """
+        if self.band_shift is not None:
             raise RuntimeError(
                 'Cannot apply a second wavelength shift to a filter response.')
         return FilterResponse(
@@ -817,13 +1478,12 @@ class FilterResponse(object):
             Input wavelength(s) have unit that is not convertible to
             :attr:`default_wavelength_unit`.
         """
-        # Use asanyarray() so that a Quantity with units is not copied here.
-        wavelength = np.asanyarray(wavelength)
-        try:
-            wavelength = wavelength.to(default_wavelength_unit).value
-        except AttributeError:
-            # No units present, so assume the default units.
-            pass
+        # No units present, so assume the default units.
+        wavelength, unit = _split_units(wavelength)
+        if unit is not None:
+            scale = _get_unit_scale(unit, default_wavelength_unit)
+            if scale != 1:
+                wavelength = wavelength * scale
         response = self.interpolator(wavelength)
         # If the input was scalar, return a scalar.
         if response.shape == ():
@@ -884,7 +1544,7 @@ class FilterResponse(object):
 
 
     def convolve_with_function(self, function, photon_weighted=True,
-                               units=None, method='trapz'):
+                               units=None, method='trapz', convention=None):
         """Convolve this response with a function of wavelength.
 
         Returns a numerical estimate of the convolution integral :math:`F[R,f]`
@@ -905,8 +1565,8 @@ class FilterResponse(object):
         >>> print(zpt.round(1))
         551725.0 1 / (cm2 s)
 
-        Note that both of these values are pre-calculated in the constructor and
-        are available from the :attr:`effective_wavelength` and
+        Note that both of these values are calculated exactly (rather than
+        numerically, as here) by the :attr:`effective_wavelength` and
         :attr:`ab_zeropoint` attributes.
 
         Parameters
@@ -933,6 +1593,11 @@ class FilterResponse(object):
             accurate than the default 'trapz' method, but should be used with
             care since it is also less robust and more sensitive to the
             wavelength grid.
+        convention : str or None
+            Calling convention to use for the function.  See
+            :func:`tabulate_function_of_wavelength` for details.  Declaring
+            the convention of a function avoids the overhead of finding one
+            that works.
 
         Returns
         -------
@@ -957,7 +1622,8 @@ class FilterResponse(object):
         # Try to tabulate the function to integrate on our wavelength grid.
         integrand, func_units = \
             tabulate_function_of_wavelength(
-                function, self._wavelength * default_wavelength_unit)
+                function, self._wavelength * default_wavelength_unit,
+                convention=convention)
         if units is not None:
             if func_units is not None:
                 try:
@@ -989,11 +1655,13 @@ class FilterResponse(object):
                             method='trapz'):
         """Convolve this response with a tabulated function of wavelength.
 
-        This is a convenience method that creates a temporary
-        :class:`FilterConvolution` object to perform the convolution. See
-        that class' documentation for details on this method's parameters
-        and usage. See also the notes :ref:`above <sampling>` about how the
-        convolution integrand is sampled.
+        This is a convenience method that creates a
+        :class:`FilterConvolution` object to perform the convolution, or
+        re-uses a cached object created for the same wavelength grid (see
+        :func:`convolution_cache_info`). See that class' documentation for
+        details on this method's parameters and usage. See also the notes
+        :ref:`above <sampling>` about how the convolution integrand is
+        sampled.
 
         Parameters
         ----------
@@ -1031,7 +1699,7 @@ class FilterResponse(object):
             multidimensional, then so is the result but with the specified
             axis integrated out.
         """
-        convolution = FilterConvolution(
+        convolution = _get_convolution(
             self, wavelength, photon_weighted, interpolate, units)
         return convolution(values, axis, method)
 
@@ -1086,6 +1754,31 @@ class FilterResponse(object):
             return convolution / self.ab_zeropoint.value
 
 
+    def get_ab_maggies_ivar(self, spectrum, ivar, wavelength, axis=-1):
+        """Calculate a tabulated spectrum's AB maggies and inverse variance.
+
+        Parameters
+        ----------
+        spectrum : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        ivar : array or :class:`astropy.units.Quantity`
+            Inverse variances of the spectrum. See
+            :meth:`PhotometryPlan.get_ab_maggies_ivar` for details.
+        wavelength : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        axis : int
+            See :meth:`get_ab_maggies` for details.
+
+        Returns
+        -------
+        tuple
+            Tuple (maggies, maggies_ivar) of floats or arrays.
+        """
+        plan = PhotometryPlan([self], wavelength)
+        maggies, maggies_ivar = plan.get_ab_maggies_ivar(spectrum, ivar, axis)
+        return maggies[..., 0][()], maggies_ivar[..., 0][()]
+
+
     def get_ab_magnitude(self, spectrum, wavelength=None, axis=-1):
         """Calculate a spectrum's AB magnitude.
 
@@ -1116,7 +1809,8 @@ class FilterResponse(object):
     _pad_methods = ('median', 'zero', 'edge')
 
 
-    def pad_spectrum(self, spectrum, wavelength, axis=-1, method='median'):
+    def pad_spectrum(self, spectrum, wavelength, axis=-1, method='median',
+                     out=None):
         """Pad a tabulated spectrum to cover this filter's response.
 
         This is a convenience method that pads an input spectrum (or spectra) so
@@ -1161,12 +1855,18 @@ class FilterResponse(object):
             See :meth:`get_ab_maggies` for details.
         method : str
             Must be one of 'median', 'zero', or 'edge'.
+        out : numpy.ndarray or None
+            Optional array with the shape of the padded spectrum where the
+            result should be written, for example to re-use the same buffer
+            for many calls.  The spectrum is always copied into this array,
+            even when no padding is required.
 
         Returns
         -------
         tuple
             A tuple (padded_spectrum, padded_wavelength) that replaces the
-            inputs with padded equivalents.
+            inputs with padded equivalents. The padded spectrum is the out
+            array, if one is provided, with any input flux units attached.
         """
         if method not in self._pad_methods:
             raise ValueError(
@@ -1175,53 +1875,184 @@ class FilterResponse(object):
 
         wavelength_value = validate_wavelength_array(wavelength)
 
-        num_pad_before, num_pad_after = 0, 0
-        if self._wavelength[0] < wavelength_value[0]:
-            num_pad_before = len(
-                np.where(self._wavelength < wavelength_value[0])[0])
-        if self._wavelength[-1] > wavelength_value[-1]:
-            num_pad_after = len(
-                np.where(self._wavelength > wavelength_value[-1])[0])
-        if num_pad_before == 0 and num_pad_after == 0:
-            # Return the inputs.
-            return spectrum, wavelength
-
-        padded_wavelength = np.hstack((
-                self._wavelength[:num_pad_before],
-                wavelength_value,
-                self._wavelength[len(self._wavelength) - num_pad_after:]))
-        try:
-            # Restore the input wavelength units, if any.
-            wavelength_unit = wavelength.unit
-            padded_wavelength = (
-                padded_wavelength * default_wavelength_unit).to(wavelength_unit)
-        except AttributeError:
-            pass
+        pad_before = self._wavelength[self._wavelength < wavelength_value[0]]
+        pad_after = self._wavelength[self._wavelength > wavelength_value[-1]]
+        return _pad_spectrum(spectrum, wavelength, wavelength_value,
+                             pad_before, pad_after, axis, method, out)
+
+
+def _pad_spectrum(spectrum, wavelength, wavelength_value, pad_before,
+                  pad_after, axis, method, out):
+    """Pad a spectrum with a single allocation.
+
+    Used by :meth:`FilterResponse.pad_spectrum` and
+    :meth:`FilterSequence.pad_spectrum`, whose parameters are the same except
+    for the validated wavelength_value without units, and the arrays
+    pad_before and pad_after of wavelengths to insert before and after it.
+    """
+    if len(pad_before) == 0 and len(pad_after) == 0 and out is None:
+        # Return the inputs.
+        return spectrum, wavelength
+
+    padded_wavelength = np.hstack((pad_before, wavelength_value, pad_after))
+    try:
+        # Restore the input wavelength units, if any.
+        wavelength_unit = wavelength.unit
+        padded_wavelength = (
+            padded_wavelength * default_wavelength_unit).to(wavelength_unit)
+    except AttributeError:
+        pass
+
+    try:
+        # Remove and remember the input flux units, if any.
+        spectrum_unit = spectrum.unit
+        spectrum_value = spectrum.value
+    except AttributeError:
+        spectrum_unit = None
+        spectrum_value = np.asarray(spectrum)
+
+    axis = axis % len(spectrum_value.shape)
+    shape = list(spectrum_value.shape)
+    shape[axis] += len(pad_before) + len(pad_after)
+    if out is None:
+        padded_spectrum = np.empty(shape, spectrum_value.dtype)
+    elif out.shape != tuple(shape):
+        raise ValueError(
+            'Expected out array with shape {0}.'.format(tuple(shape)))
+    else:
+        padded_spectrum = out
+
+    def select(start, stop):
+        index = [slice(None)] * len(shape)
+        index[axis] = slice(start, stop)
+        return tuple(index)
+
+    # Copy the input spectrum into the middle of the output and fill the
+    # padding before and after it.
+    num_before, num_after = len(pad_before), len(pad_after)
+    middle = select(num_before, shape[axis] - num_after)
+    before = select(0, num_before)
+    after = select(shape[axis] - num_after, None)
+    padded_spectrum[middle] = spectrum_value
+    if method == 'median':
+        # Calculate the median of each spectrum once.
+        fill = np.median(spectrum_value, axis=axis, keepdims=True)
+        padded_spectrum[before] = fill
+        padded_spectrum[after] = fill
+    elif method == 'zero':
+        padded_spectrum[before] = 0.
+        padded_spectrum[after] = 0.
+    elif method == 'edge':
+        padded_spectrum[before] = spectrum_value[select(0, 1)]
+        padded_spectrum[after] = spectrum_value[select(-1, None)]
+
+    if spectrum_unit is not None:
+        # Restore the input flux units, if any, without copying.
+        padded_spectrum = astropy.units.Quantity(
+            padded_spectrum, spectrum_unit, copy=False)
+
+    return padded_spectrum, padded_wavelength
+
+
+def _trapz_weights(x):
+    """Calculate trapezoidal rule weights for samples at x.
+
+    The dot product of the returned weights with function values tabulated
+    at x is equivalent to :func:`scipy.integrate.trapz`.
+    """
+    h = np.diff(x)
+    weights = np.zeros_like(x, dtype=float)
+    weights[:-1] += 0.5 * h
+    weights[1:] += 0.5 * h
+    return weights
+
+
+def _basic_simps_weights(x, start, stop, weights, scale=1.):
+    """Accumulate Simpson's rule weights for one set of interval pairs.
+
+    Uses the same non-uniform generalization of Simpson's rule as the
+    private ``_basic_simps`` helper used by :func:`scipy.integrate.simps`.
+    """
+    h = np.diff(x)
+    h0 = h[start:stop:2]
+    h1 = h[start + 1:stop + 1:2]
+    hsum = h0 + h1
+    hprod = h0 * h1
+    h0divh1 = h0 / h1
+    first = np.arange(start, start + 2 * len(h0), 2)
+    # The index arrays below never contain duplicates so fancy-indexed
+    # in-place addition is safe.
+    weights[first] += scale * hsum / 6. * (2 - 1. / h0divh1)
+    weights[first + 1] += scale * hsum / 6. * hsum * hsum / hprod
+    weights[first + 2] += scale * hsum / 6. * (2 - h0divh1)
+
+
+def _simps_weights(x):
+    """Calculate Simpson's rule weights for samples at x.
+
+    The dot product of the returned weights with function values tabulated
+    at x is equivalent to :func:`scipy.integrate.simps` with its default
+    ``even='avg'`` treatment of an even number of samples.
+    """
+    num_samples = len(x)
+    weights = np.zeros_like(x, dtype=float)
+    if num_samples % 2 == 0:
+        # Average Simpson's rule on the first intervals plus a trapezoid
+        # for the last interval, and vice versa.
+        last_dx = x[-1] - x[-2]
+        weights[-2:] += 0.25 * last_dx
+        _basic_simps_weights(x, 0, num_samples - 3, weights, scale=0.5)
+        first_dx = x[1] - x[0]
+        weights[:2] += 0.25 * first_dx
+        _basic_simps_weights(x, 1, num_samples - 2, weights, scale=0.5)
+    else:
+        _basic_simps_weights(x, 0, num_samples - 2, weights)
+    return weights
 
-        try:
-            # Remove and remember the input flux units, if any.
-            spectrum_unit = spectrum.unit
-            spectrum_value = spectrum.value
-        except AttributeError:
-            spectrum_unit = None
-            spectrum_value = spectrum
 
-        padding = [(0, 0)] * len(spectrum_value.shape)
-        padding[axis] = (num_pad_before, num_pad_after)
+# Map names to functions that calculate the weights for each integration
+# method in _filter_integration_methods.
+_filter_quadrature_weights = dict(
+    trapz=_trapz_weights,
+    simps=_simps_weights)
 
-        if method == 'median':
-            pad_mode='median'
-        elif method == 'zero':
-            pad_mode='constant' # use default constant_values = 0.
-        elif method == 'edge':
-            pad_mode='edge'
-        padded_spectrum = np.pad(spectrum_value, padding, mode=pad_mode)
 
-        if spectrum_unit is not None:
-            # Restore the input flux units, if any.
-            padded_spectrum = padded_spectrum * spectrum_unit
+def _exact_weights(x, response_wavelength, response, photon_weighted=True):
+    """Calculate exact convolution weights for samples at x.
 
-        return padded_spectrum, padded_wavelength
+    The dot product of the returned weights with function values tabulated
+    at x is the exact integral of the product of the linearly interpolated
+    function, the linearly interpolated filter response and the (linear)
+    photon weights, when these are selected.  The product is a cubic
+    polynomial between each consecutive pair of the merged x and response
+    wavelengths, so is integrated exactly by Simpson's rule on each interval.
+    The wavelengths x must cover the response wavelengths.
+    """
+    inside = (x >= response_wavelength[0]) & (x <= response_wavelength[-1])
+    knots = np.union1d(x[inside], response_wavelength)
+    lo_knot, hi_knot = knots[:-1], knots[1:]
+    # Use the interval midpoint to find the pair of samples in x that are
+    # used to interpolate the function over each interval.
+    mid_knot = 0.5 * (lo_knot + hi_knot)
+    hi = np.clip(np.searchsorted(x, mid_knot), 1, len(x) - 1)
+    lo = hi - 1
+    # Tabulate Simpson's rule nodes and coefficients for each interval.
+    nodes = np.vstack((lo_knot, mid_knot, hi_knot))
+    coefs = (np.array([[1.], [4.], [1.]]) / 6.) * (hi_knot - lo_knot)
+    coefs = coefs * np.interp(nodes, response_wavelength, response)
+    if photon_weighted:
+        coefs *= nodes / _hc_constant.value
+    frac = (nodes - x[lo]) / (x[hi] - x[lo])
+    weights = np.bincount(
+        np.tile(lo, 3), ((1 - frac) * coefs).ravel(), minlength=len(x))
+    weights += np.bincount(
+        np.tile(hi, 3), (frac * coefs).ravel(), minlength=len(x))
+    return weights
+
+
+# Names of the integration methods supported by FilterConvolution, which
+# include the exact integration of the linearly interpolated integrand.
+_filter_convolution_methods = sorted(_filter_quadrature_weights) + ['exact']
 
 
 class FilterConvolution(object):
@@ -1248,9 +2079,10 @@ class FilterConvolution(object):
         A FilterResponse object or else a fully qualified name of the form
         "<group_name>-<band_name>", which will be loaded using
         :func:`load_filter`.
-    wavelength : array
+    wavelength : array or :class:`WavelengthGrid`
         A :func:`valid array <validate_wavelength_array>` of wavelengths
-        that must cover the full range of the filter response.
+        that must cover the full range of the filter response.  A
+        :class:`WavelengthGrid` avoids scanning the full array.
     photon_weighted : bool
         Use :ref:`weights <weights>` appropriate for a photon-counting detector
         such as a CCD when this parameter is True.  Otherwise, use unit weights.
@@ -1262,7 +2094,9 @@ class FilterConvolution(object):
         the input function at the undersampled filter response wavelengths.
         Interpolation has a performance impact when :meth:`evaluating
         <__call__>` a convolution, so is not enabled by default and can usually
-        be avoided with finer sampling of the input function.
+        be avoided with finer sampling of the input function. The ``exact``
+        method never needs interpolation, so an undersampled grid only raises
+        a ValueError when another method is first used.
     units : astropy.units.Quantity or None
         When this parameter is not None, then any explicit units attached to
         the values passed to a :meth:`convolution <__call__>` must be
@@ -1296,6 +2130,12 @@ class FilterConvolution(object):
     quad_weight : :class:`astropy.units.Quantity` or None
         Array of weights corresponding to each ``quad_wavelength``.  Will be
         None if the parameter ``photon_weighted = False``.
+    integral_weights : dict
+        Dictionary of weight arrays, keyed by integration method, that is
+        filled when each method is first used.  The convolution integral is
+        the dot product of these weights with the input function values in
+        ``response_slice``, so that :meth:`__call__` does not need to perform
+        any interpolation or sorting.
     """
     def __init__(self, response, wavelength,
                  photon_weighted=True, interpolate=False, units=None):
@@ -1306,6 +2146,11 @@ class FilterConvolution(object):
             self._response = response
         self._wavelength = validate_wavelength_array(wavelength, min_length=2)
         self.num_wavelength = len(self._wavelength)
+        if isinstance(wavelength, WavelengthGrid):
+            searchsorted = wavelength.searchsorted
+        else:
+            searchsorted = lambda values, side='left': np.searchsorted(
+                self._wavelength, values, side)
 
         # Check if extrapolation would be required.
         under = (self._wavelength[0] > self._response._wavelength[0])
@@ -1320,11 +2165,10 @@ class FilterConvolution(object):
         # integrand.
         start, stop = 0, len(self._wavelength)
         if self._wavelength[0] < self._response._wavelength[0]:
-            start = np.where(
-                self._wavelength <= self._response._wavelength[0])[0][-1]
+            start = searchsorted(
+                self._response._wavelength[0], side='right') - 1
         if self._wavelength[-1] > self._response._wavelength[-1]:
-            stop = 1 + np.where(
-                self._wavelength >= self._response._wavelength[-1])[0][0]
+            stop = 1 + searchsorted(self._response._wavelength[-1])
 
         # Trim the wavelength grid if possible.
         self._response_slice = slice(start, stop)
@@ -1338,30 +2182,30 @@ class FilterConvolution(object):
         # criterion is that at most one internal response wavelength (i.e.,
         # excluding the endpoints which we treat separately) falls between each
         # consecutive pair of our wavelength grid points.
-        insert_index = np.searchsorted(
-            self._wavelength, self._response._wavelength[1:])
+        # The 'exact' method integrates the response analytically so it
+        # never needs interpolation, and any error is deferred until a
+        # quadrature method is first used.
+        insert_index = searchsorted(self._response._wavelength[1:]) - start
         undersampled = np.diff(insert_index) == 0
-        if np.any(undersampled):
+        self._undersampled = np.any(undersampled) and not interpolate
+        if np.any(undersampled) and interpolate:
             undersampled = 1 + np.where(undersampled)[0]
-            if interpolate:
-                # Interpolate at each undersampled wavelength.
-                self.interpolate_wavelength = (
-                    self._response._wavelength[undersampled])
-                self.interpolate_response = self._response.response[undersampled]
-                self.quad_wavelength = np.hstack(
-                    [self._wavelength, self.interpolate_wavelength])
-                self.interpolate_sort_order = np.argsort(self.quad_wavelength)
-                self.quad_wavelength = self.quad_wavelength[
-                    self.interpolate_sort_order]
-            else:
-                raise ValueError(
-                    'Wavelengths undersample the response ' +
-                    'and interpolate is False.')
+            # Interpolate at each undersampled wavelength.
+            self.interpolate_wavelength = (
+                self._response._wavelength[undersampled])
+            self.interpolate_response = self._response.response[undersampled]
+            self.quad_wavelength = np.hstack(
+                [self._wavelength, self.interpolate_wavelength])
+            self.interpolate_sort_order = np.argsort(self.quad_wavelength)
+            self.quad_wavelength = self.quad_wavelength[
+                self.interpolate_sort_order]
         else:
             self.interpolate_wavelength = None
             self.interpolate_response = None
             self.interpolate_sort_order = None
-            self.quad_wavelength = self._wavelength
+            # Copy so that the endpoint replacement below does not modify
+            # our wavelength grid (or the caller's array).
+            self.quad_wavelength = self._wavelength.copy()
 
         # Replace the quadrature endpoints with the actual filter endpoints
         # to eliminate any overrun.
@@ -1376,6 +2220,11 @@ class FilterConvolution(object):
         else:
             self.quad_weight = None
 
+        # Weights for each integration method are calculated when the method
+        # is first used.
+        self._photon_weighted = photon_weighted
+        self.integral_weights = {}
+
         # Save the expected input value units.
         self.input_units = units
         if self.input_units is not None:
@@ -1402,12 +2251,15 @@ class FilterConvolution(object):
             In case of multidimensional function values, this specifies the
             index of the axis corresponding to the wavelength dimension.
         method : str
-            Specifies the numerical integration scheme to use and must be either
-            'trapz' or 'simps', to select the corresponding
-            ``scipy.integration`` function. The 'simps' method may be more
-            accurate than the default 'trapz' method, but should be used with
-            care since it is also less robust and more sensitive to the
-            wavelength grids.
+            Specifies the numerical integration scheme to use and must be one
+            of 'trapz' or 'simps', to select the equivalent of the
+            corresponding ``scipy.integration`` function, or 'exact'. The
+            'simps' method may be more accurate than the default 'trapz'
+            method, but should be used with care since it is also less robust
+            and more sensitive to the wavelength grids.  The 'exact' method
+            integrates the product of the linearly interpolated function and
+            filter response exactly over the merged wavelengths of both, so
+            does not depend on how densely the response is sampled.
         plot : bool
             Displays a plot illustrating how the convolution integrand is
             constructed. Requires that the matplotlib package is installed
@@ -1425,30 +2277,25 @@ class FilterConvolution(object):
             If the input is multidimensional, then so is the result but
             with the specified axis integrated out.
         """
-        if method not in _filter_integration_methods.keys():
-            raise ValueError(
-                'Invalid method "{0}", pick one of {1}.'
-                .format(method, _filter_integration_methods.keys()))
+        weights = self._get_integral_weights(method)
 
         # Check that input units are compatible with expected units
-        # and initialize array of values without units.
-        try:
-            values_no_units = values.to(self.input_units).value
-            input_has_units = True
-        except AttributeError:
-            # Input values have no units, so we assume that they are in
-            # self.input_units if these are defined, or else that the caller
-            # knows what they are doing.
-            values_no_units = np.asarray(values)
-            input_has_units = False
-        except TypeError:
-            # The input values have units but self.input_units is None.
-            raise ValueError(
-                'Must specify expected units for values with units.')
-        except astropy.units.UnitConversionError:
-            raise ValueError(
-                'Values units {0} not convertible to {1}.'
-                .format(values.unit, self.input_units))
+        # and initialize array of values without units.  If the input values
+        # have no units, we assume that they are in self.input_units if these
+        # are defined, or else that the caller knows what they are doing.
+        values_no_units, values_unit = _split_units(values)
+        input_has_units = values_unit is not None
+        if input_has_units:
+            if self.input_units is None:
+                raise ValueError(
+                    'Must specify expected units for values with units.')
+            try:
+                # The scale is applied to the result, not the input values.
+                scale = _get_unit_scale(values_unit, self.input_units)
+            except astropy.units.UnitConversionError:
+                raise ValueError(
+                    'Values units {0} not convertible to {1}.'
+                    .format(values_unit, self.input_units))
 
         # Check values shape and slice out the subarray that overlaps
         # the filter we are convolving with.
@@ -1458,217 +2305,1277 @@ class FilterConvolution(object):
                 .format(len(self._wavelength), axis))
         values_slice = [slice(None)] * len(values_no_units.shape)
         values_slice[axis] = self._response_slice
-        values_no_units = values_no_units[values_slice]
+        values_no_units = values_no_units[tuple(values_slice)]
 
         if plot:
             if len(values_no_units.shape) != 1:
                 raise ValueError(
                     'Cannot plot convolution of multidimensional values.')
-            import matplotlib.pyplot as plt
-            ##fig, left_axis = plt.subplots()
-            # Plot the filter response using the left-hand axis.
-            plt.plot(self._response._wavelength,
-                     self._response.response, 'rx-')
-            plt.ylim(0., 1.1 * np.max(self._response.response))
-            plt.xlabel('Wavelength (A)')
-            plt.ylabel(
-                '{0}-{1} Filter Response'.format(
-                    self._response.meta['group_name'],
-                    self._response.meta['band_name']))
-            # Use the right-hand axis for the data being filtered.
-            right_axis = plt.twinx()
-            # A kludge to include the left-hand axis label in our legend.
-            right_axis.plot([], [], 'r.-', label='filter')
-            # Plot the input values using the right-hand axis.
-            right_axis.set_ylabel('Integrand $dg/d\lambda \cdot R$')
-            right_axis.plot(
-                self._wavelength, values_no_units, 'bs-', label='input')
-            right_axis.set_ylim(0., 1.1 * np.max(values_no_units))
-
-        # Multiply values by the response.
-        response_shape = np.ones_like(values_no_units.shape, dtype=int)
-        response_shape[axis] = len(self._response_grid)
-        integrand = values_no_units * self._response_grid.reshape(response_shape)
-
-        if self.interpolate_wavelength is not None:
-            # Interpolate the input values.
-            interpolator = scipy.interpolate.interp1d(
-                self._wavelength, values_no_units, axis=axis, kind='linear',
-                copy=False, bounds_error=True)
-            interpolated_values = interpolator(self.interpolate_wavelength)
-            if plot:
-                # Show the interpolation locations.
-                plt.scatter(
-                    self.interpolate_wavelength, interpolated_values,
-                    s=30, marker='o', edgecolor='b', facecolor='none',
-                    label='interpolated')
-            # Multiply interpolated values by the response.
-            response_shape[axis] = len(self.interpolate_wavelength)
-            interpolated_integrand = (
-                interpolated_values *
-                self.interpolate_response.reshape(response_shape))
-            # Update the integrand with the interpolated values.
-            integrand = np.concatenate(
-                (integrand, interpolated_integrand), axis=axis)
-            # Resort by wavelength.
-            values_slice[axis] = self.interpolate_sort_order
-            integrand = integrand[values_slice]
-
-        if plot:
-            # Plot integrand before applying weights, so we can re-use
-            # the right-hand axis scale.
-            plt.fill_between(
-                self.quad_wavelength, integrand,
-                color='g', lw=0, alpha=0.25)
-            plt.plot(
-                self.quad_wavelength, integrand,
-                'g-', alpha=0.5, label='filtered')
-            right_axis.legend(loc='center right')
-            xpad = 0.05 * (
-                self.quad_wavelength[-1] - self.quad_wavelength[0])
-            plt.xlim(self._wavelength[0] - xpad,
-                     self._wavelength[-1] + xpad)
-
-        if self.quad_weight is not None:
-            # Apply weights.
-            response_shape[axis] = len(self.quad_weight)
-            integrand *= self.quad_weight.reshape(response_shape)
+            if input_has_units and scale != 1:
+                values_no_units = values_no_units * scale
+                scale = 1
+            self._plot_integrand(values_no_units)
 
-        integrator = _filter_integration_methods[method]
-        integral = integrator(
-            y=integrand, x=self.quad_wavelength, axis=axis)
+        # Indexing with an empty tuple converts a 0-d result to a scalar.
+        integral = np.tensordot(
+            values_no_units, weights,
+            axes=(axis, 0))[()]
 
         if input_has_units:
-            # Apply the output units.
+            # Apply the unit conversion and the output units.
+            if scale != 1:
+                integral = integral * scale
             integral = integral * self.output_units
         return integral
 
 
-class FilterSequence(collections.Sequence):
-    """Immutable sequence of filter responses.
+    def _get_integral_weights(self, method):
+        """Return the weights for one integration method.
 
-    Sequences should normally be created by calling :func:`load_filters`.
-    Objects implement the `immutable sequence
-    <https://docs.python.org/2/library/collections.html
-    #collections-abstract-base-classes>`__ API, in addition to the methods
-    listed here.
+        Every step of the convolution is linear in the input values, so the
+        response, interpolation, photon weights and quadrature rule are folded
+        into a single weight per input wavelength.  The weights are calculated
+        the first time each method is used and saved in
+        ``integral_weights``.
 
-    A filter sequence's :meth:`get_ab_maggies` and :meth:`get_ab_magnitudes`
-    methods return their results in a :class:`Table <astropy.table.Table>` and
-    are convenient for calculating convolutions in several bands for
-    multiple spectra.  For example, given the following 4 (identical) spectra
-    covering the SDSS filters:
+        Parameters
+        ----------
+        method : str
+            One of the integration methods supported by :meth:`__call__`.
 
-    >>> num_spectra, num_pixels = 4, 500
-    >>> wlen = np.linspace(2000, 12000, num_pixels) * default_wavelength_unit
-    >>> flux = np.ones((num_spectra, num_pixels)) * 1e-17 * default_flux_unit
+        Returns
+        -------
+        numpy.ndarray
+            Array of weights for the input values in ``response_slice``.
+        """
+        weights = self.integral_weights.get(method)
+        if weights is not None:
+            return weights
+        if method not in _filter_convolution_methods:
+            raise ValueError(
+                'Invalid method "{0}", pick one of {1}.'
+                .format(method, _filter_convolution_methods))
 
-    We can now calculate their magnitudes in all bands with one function:
+        if method != 'exact' and self._undersampled:
+            raise ValueError(
+                'Wavelengths undersample the response ' +
+                'and interpolate is False.')
 
-    >>> sdss = load_filters('sdss2010-*')
-    >>> mags = sdss.get_ab_magnitudes(flux, wlen)
+        if method == 'exact':
+            weights = _exact_weights(
+                self._wavelength, self._response._wavelength,
+                self._response.response, self._photon_weighted)
+        else:
+            quad_weights = _filter_quadrature_weights[method](
+                self.quad_wavelength)
+            if self.quad_weight is not None:
+                quad_weights *= self.quad_weight
+            if self.interpolate_wavelength is not None:
+                # Find the linear interpolation coefficients used for each
+                # undersampled response wavelength, using the same bracketing
+                # convention as scipy.interpolate.interp1d.
+                hi = np.clip(
+                    np.searchsorted(
+                        self._wavelength, self.interpolate_wavelength),
+                    1, len(self._wavelength) - 1)
+                lo = hi - 1
+                frac = ((self.interpolate_wavelength - self._wavelength[lo]) /
+                        (self._wavelength[hi] - self._wavelength[lo]))
+                # Undo the sort by wavelength.
+                unsorted = np.empty_like(quad_weights)
+                unsorted[self.interpolate_sort_order] = quad_weights
+                weights = (unsorted[:len(self._wavelength)] *
+                           self._response_grid)
+                interpolated = (unsorted[len(self._wavelength):] *
+                                self.interpolate_response)
+                np.add.at(weights, lo, (1 - frac) * interpolated)
+                np.add.at(weights, hi, frac * interpolated)
+            else:
+                weights = quad_weights * self._response_grid
+        self.integral_weights[method] = weights
+        return weights
 
-    Refer to the :mod:`astropy docs <astropy.table>` for details on working
-    with Tables.  For example, to pretty-print the magnitudes with a
-    precision of 0.001:
 
-    >>> formats = dict((n, '%.3f') for n in sdss.names)
-    >>> mags.write(None, format='ascii.fixed_width', formats=formats)
-    | sdss2010-u | sdss2010-g | sdss2010-r | sdss2010-i | sdss2010-z |
-    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
-    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
-    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
-    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
+    def _plot_integrand(self, values_no_units):
+        """Plot how the convolution integrand is constructed.
 
-    Parameters
-    ----------
-    responses : iterable
-        Response objects to include in this sequence. Objects are copied to
-        an internal list.
+        Used by :meth:`__call__` when its ``plot`` option is set.
 
-    Attributes
-    ----------
-    names : list of str
-        List of the filter response names in this sequence, with the format
-        "<group_name>-<band_name>".
-    effective_wavelengths : astropy.units.Quantity
-        List of the effective wavelengths for the filter responses in this
-        sequence, with the default wavelength units.
+        Parameters
+        ----------
+        values_no_units : numpy.ndarray
+            One-dimensional array of function values without units, already
+            restricted to our ``response_slice``.
+        """
+        import matplotlib.pyplot as plt
+        # Plot the filter response using the left-hand axis.
+        plt.plot(self._response._wavelength,
+                 self._response.response, 'rx-')
+        plt.ylim(0., 1.1 * np.max(self._response.response))
+        plt.xlabel('Wavelength (A)')
+        plt.ylabel(
+            '{0}-{1} Filter Response'.format(
+                self._response.meta['group_name'],
+                self._response.meta['band_name']))
+        # Use the right-hand axis for the data being filtered.
+        right_axis = plt.twinx()
+        # A kludge to include the left-hand axis label in our legend.
+        right_axis.plot([], [], 'r.-', label='filter')
+        # Plot the input values using the right-hand axis.
+        right_axis.set_ylabel('Integrand $dg/d\\lambda \\cdot R$')
+        right_axis.plot(
+            self._wavelength, values_no_units, 'bs-', label='input')
+        right_axis.set_ylim(0., 1.1 * np.max(values_no_units))
+
+        # Multiply values by the response.
+        integrand = values_no_units * self._response_grid
+
+        if self.interpolate_wavelength is not None:
+            # Interpolate the input values.
+            interpolated_values = np.interp(
+                self.interpolate_wavelength, self._wavelength, values_no_units)
+            # Show the interpolation locations.
+            plt.scatter(
+                self.interpolate_wavelength, interpolated_values,
+                s=30, marker='o', edgecolor='b', facecolor='none',
+                label='interpolated')
+            # Update the integrand with the interpolated values and resort
+            # by wavelength.
+            integrand = np.hstack(
+                (integrand, interpolated_values * self.interpolate_response))
+            integrand = integrand[self.interpolate_sort_order]
+
+        # Plot integrand before applying weights, so we can re-use
+        # the right-hand axis scale.
+        plt.fill_between(
+            self.quad_wavelength, integrand,
+            color='g', lw=0, alpha=0.25)
+        plt.plot(
+            self.quad_wavelength, integrand,
+            'g-', alpha=0.5, label='filtered')
+        right_axis.legend(loc='center right')
+        xpad = 0.05 * (
+            self.quad_wavelength[-1] - self.quad_wavelength[0])
+        plt.xlim(self._wavelength[0] - xpad,
+                 self._wavelength[-1] + xpad)
+
+
+def _get_grid_fingerprint(wavelength):
+    """Calculate a hashable fingerprint of a validated wavelength array.
+
+    The fingerprint uses a fast 32-bit checksum so is not guaranteed to be
+    unique, and callers should confirm any match by comparing the arrays.
     """
-    def __init__(self, responses):
-        self._responses = list(responses)
+    wavelength = np.ascontiguousarray(wavelength)
+    return (len(wavelength), wavelength.dtype.str, wavelength[0],
+            wavelength[-1], zlib.crc32(wavelength) & 0xffffffff)
 
 
-    def __contains__(self, item):
-        return item in self._responses
+def _get_convolution(response, wavelength, photon_weighted=True,
+                     interpolate=False, units=None):
+    """Create a FilterConvolution or re-use a cached one.
+
+    Parameters are the same as for the :class:`FilterConvolution` constructor,
+    except that response must be a :class:`FilterResponse` object.
+    """
+    wavelength_value = validate_wavelength_array(wavelength, min_length=2)
+    if isinstance(wavelength, WavelengthGrid):
+        # A grid caches its fingerprint, and its wavelengths are read-only so
+        # do not need to be copied.
+        fingerprint = wavelength.fingerprint
+        saved = wavelength_value
+    else:
+        fingerprint = _get_grid_fingerprint(wavelength_value)
+        saved = None
+    # The response id distinguishes between different objects with the same
+    # name, and cannot be recycled while a cached convolution refers to it.
+    key = (response.name, response.band_shift, id(response),
+           fingerprint, photon_weighted, interpolate, units)
+    cached = _convolution_cache.get(key)
+    if cached is not None:
+        grid, convolution = cached
+        if grid is wavelength_value or np.array_equal(grid, wavelength_value):
+            return convolution
+    convolution = FilterConvolution(
+        response, wavelength, photon_weighted, interpolate, units)
+    if saved is None:
+        saved = wavelength_value.copy()
+    _convolution_cache.put(key, (saved, convolution))
+    return convolution
+
+
+# State of a photometry worker process, set by _init_photometry_worker.
+_photometry_worker = {}
+
+
+def _init_photometry_worker(matrix, chunk_rows, input_buffer, output_buffer):
+    """Initialize a worker process used by PhotometryPlan.
+
+    The plan matrix is passed once when the process starts, and the input
+    and output arrays are views of memory shared with the parent process,
+    with room for chunk_rows spectra.
+    """
+    num_bands, num_wavelength = matrix.shape
+    _photometry_worker['matrix'] = matrix
+    _photometry_worker['input'] = np.frombuffer(input_buffer).reshape(
+        chunk_rows, num_wavelength)
+    _photometry_worker['output'] = np.frombuffer(output_buffer).reshape(
+        chunk_rows, num_bands)
 
 
-    def __len__(self):
-        return len(self._responses)
+def _run_photometry_worker(task):
+    """Calculate AB maggies for a range of rows in a worker process."""
+    lo, hi = task
+    _photometry_worker['output'][lo:hi] = np.dot(
+        _photometry_worker['input'][lo:hi], _photometry_worker['matrix'].T)
 
 
-    def __iter__(self):
-        return iter(self._responses)
+class PhotometryPlan(object):
+    """Calculate AB maggies in several bands with a single matrix product.
 
+    A photometry plan combines the precomputed :class:`FilterConvolution`
+    weights of each filter response with its :attr:`AB zeropoint
+    <FilterResponse.ab_zeropoint>` into a matrix with one row per band and one
+    column per input wavelength.  The AB maggies of any number of spectra
+    tabulated on the same wavelength grid are then obtained with a single
+    matrix product:
 
-    def __getitem__(self, key):
-        return self._responses[key]
+    >>> sdss = load_filters('sdss2010-*')
+    >>> wlen = np.linspace(2000, 12000, 500) * default_wavelength_unit
+    >>> plan = PhotometryPlan(sdss, wlen)
+    >>> flux = np.ones((4, 500)) * 1e-17 * default_flux_unit
+    >>> maggies = plan.get_ab_maggies(flux)
+    >>> maggies.shape
+    (4, 5)
+
+    Use this class to efficiently calculate photometry for many batches of
+    spectra on the same wavelength grid. The
+    :meth:`FilterSequence.get_ab_maggies` and
+    :meth:`FilterSequence.get_ab_magnitudes` methods use a temporary plan
+    internally when called with tabulated spectra.
 
+    Parameters
+    ----------
+    responses : :class:`FilterSequence` or iterable
+        The filter responses to use, either as :class:`FilterResponse` objects
+        or as names that will be loaded using :func:`load_filter`.
+    wavelength : array
+        A :func:`valid array <validate_wavelength_array>` of wavelengths
+        that must cover the full range of each filter response.
+    interpolate : bool
+        Allow interpolation of the tabulated function if necessary. See
+        :class:`FilterConvolution` for details.
+    method : str
+        Specifies the numerical integration scheme to use. See
+        :class:`FilterConvolution` for details.
+    mask_invalid : bool
+        When True, any band whose convolution cannot be set up (usually
+        because of insufficient wavelength coverage) is flagged as invalid
+        and its results are NaN.  Otherwise, any error raises an exception.
 
-    @property
-    def names(self):
-        return [r.name for r in self]
+    Attributes
+    ----------
+    names : list of str
+        List of the filter response names corresponding to each band.
+    num_wavelength : int
+        The number of wavelengths used to tabulate input spectra.
+    matrix : numpy.ndarray
+        Array of shape (num_bands, num_wavelength) whose product with a
+        spectrum tabulated in :attr:`default_flux_unit` gives its AB maggies.
+    valid : numpy.ndarray
+        Boolean array of length num_bands indicating which bands are valid.
+    """
+    # Approximate size in bytes of the shared memory used to send spectra to
+    # worker processes.
+    _parallel_chunk_nbytes = 1 << 26
 
+    def __init__(self, responses, wavelength, interpolate=True,
+                 method='trapz', mask_invalid=False):
 
-    @property
-    def effective_wavelengths(self):
-        return [
-            r.effective_wavelength.value for r in self
-            ] * default_wavelength_unit
+        if method not in _filter_convolution_methods:
+            raise ValueError(
+                'Invalid method "{0}", pick one of {1}.'
+                .format(method, _filter_convolution_methods))
 
+        wavelength_value = validate_wavelength_array(wavelength, min_length=2)
+        self.num_wavelength = len(wavelength_value)
+        if not isinstance(wavelength, WavelengthGrid):
+            # Keep any grid so that convolutions can use its cached data.
+            wavelength = wavelength_value
 
-    def _get_table(self, spectrum, wavelength=None, axis=-1, mask_invalid=False,
-                   method=None):
-        """Helper method to avoid duplicating code.
+        responses = [
+            load_filter(r) if isinstance(r, basestring) else r
+            for r in responses]
+        self._initialize(
+            responses, [r.ab_zeropoint.value for r in responses], wavelength,
+            interpolate, method, mask_invalid, _get_convolution)
 
-        Used by :meth:`get_ab_magnitudes` and :meth:`get_ab_maggies`.
-        Parameters are identical to those methods except for an additional
-        ``method`` parameter that specifies what method of
-        :class:`FilterReponse` to call to calculate table entries.
+
+    def _initialize(self, responses, zeropoints, wavelength, interpolate,
+                    method, mask_invalid, get_convolution):
+        """Fill our matrix with one row per filter response.
+
+        Parameters
+        ----------
+        responses : list
+            List of :class:`FilterResponse` objects.
+        zeropoints : array
+            AB zeropoint values for each response in 1 / (cm2 s).
+        wavelength : numpy.ndarray or :class:`WavelengthGrid`
+            Validated wavelength array without units, or a grid.
+        get_convolution : callable
+            Function called with a response, wavelength, photon_weighted and
+            interpolate to create each :class:`FilterConvolution`.
+
+        Other parameters are the same as for our constructor.
         """
-        missing_column = None
-        t = astropy.table.Table(meta=dict(
-            description='Created by speclite <speclite.readthedocs.io>'),
-            masked=mask_invalid)
-        for r in self:
+        self.names = [r.name for r in responses]
+        # Pool of worker processes and shared arrays created by _get_pool.
+        self._pool = None
+        self._pool_workers = None
+
+        self.matrix = np.zeros((len(responses), self.num_wavelength))
+        self.valid = np.ones(len(responses), dtype=bool)
+        # Slice of the wavelength grid covered by each band.
+        self._response_slices = [slice(0, 0)] * len(responses)
+        for i, response in enumerate(responses):
             try:
-                data = method(r, spectrum, wavelength, axis)
-                if data.shape == ():
-                    data = [data]
-                column = astropy.table.Column(name=r.name, data=data)
+                convolution = get_convolution(
+                    response, wavelength, photon_weighted=True,
+                    interpolate=interpolate)
+                weights = convolution._get_integral_weights(method)
             except ValueError as e:
                 if not mask_invalid:
                     raise e
-                # Create a missing column the first time we need it.
-                if missing_column is None:
-                    column_shape = np.sum(spectrum, axis=axis).shape
-                    missing_data = np.zeros(column_shape, dtype=float)
-                    if missing_data.shape == ():
-                        missing_data = [missing_data]
-                    missing_column = astropy.table.MaskedColumn(
-                        data=missing_data, mask=True, fill_value=np.nan)
-                column = missing_column
-                column.name = r.name
+                self.valid[i] = False
+                continue
+            self._response_slices[i] = convolution._response_slice
+            self.matrix[i, convolution._response_slice] = (
+                weights / zeropoints[i])
+
+
+    def get_ab_maggies(self, spectrum, axis=-1, out=None, n_workers=None):
+        """Calculate the AB maggies of tabulated spectra in each band.
+
+        Parameters
+        ----------
+        spectrum : array or :class:`astropy.units.Quantity`
+            Array of spectral flux densities tabulated on our wavelength grid.
+            Fluxes must either have explicit units that are convertible to
+            :attr:`default_flux_unit`, or else they will be implicitly
+            interpreted as having these default units.  A multidimensional
+            array can be used to calculate maggies for many spectra at once.
+        axis : int
+            The axis along which wavelength increases in the spectrum array.
+        out : numpy.ndarray or None
+            Optional array with the shape of the result where the results
+            should be stored, for example to re-use the same output buffer
+            for many calls.  A C-contiguous float64 array avoids any
+            temporary copy of the results when axis is the last axis.
+        n_workers : int or None
+            Number of worker processes to use.  When this is greater than one,
+            the spectra are copied into shared memory one chunk at a time and
+            split between a pool of processes that each receive our matrix
+            when they start.  The pool is kept for later calls with the same
+            number of workers until :meth:`close` is called, or the plan is
+            garbage collected. This is only worthwhile for large batches of
+            spectra.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB maggies with the wavelength axis of the input removed
+            and a new last axis of length num_bands added.  Results for any
+            invalid bands are NaN.  This is the out array, if one is provided.
+        """
+        spectrum_no_units, scale = _strip_units(
+            spectrum, default_flux_unit, 'Spectrum')
+
+        if spectrum_no_units.shape[axis] != self.num_wavelength:
+            raise ValueError(
+                'Expected {0} values along axis {1}.'
+                .format(self.num_wavelength, axis))
+
+        if n_workers is not None and n_workers > 1:
+            maggies = self._get_maggies_parallel(
+                spectrum_no_units, axis, n_workers)
+            if out is not None:
+                if out.shape != maggies.shape:
+                    raise ValueError(
+                        'Expected out array with shape {0}.'
+                        .format(maggies.shape))
+                out[...] = maggies
+                maggies = out
+        elif out is None:
+            maggies = np.tensordot(
+                spectrum_no_units, self.matrix, axes=(axis, 1))
+        else:
+            shape = list(spectrum_no_units.shape)
+            del shape[axis]
+            shape = tuple(shape) + (len(self.names),)
+            if out.shape != shape:
+                raise ValueError(
+                    'Expected out array with shape {0}.'.format(shape))
+            if (out.dtype == np.float64 and out.flags.c_contiguous and
+                axis in (-1, spectrum_no_units.ndim - 1)):
+                # Write the matrix product directly into the output buffer,
+                # using 2D arrays to match the arithmetic of tensordot.
+                np.dot(spectrum_no_units.reshape(-1, self.num_wavelength),
+                       self.matrix.T, out=out.reshape(-1, len(self.names)))
+            else:
+                out[...] = np.tensordot(
+                    spectrum_no_units, self.matrix, axes=(axis, 1))
+            maggies = out
+        # A non-finite flux outside of a band gives a NaN result for that
+        # band, since its zero weight times NaN is NaN, so recalculate any
+        # non-finite results using only the wavelengths covered by each band.
+        non_finite = ~np.isfinite(maggies)
+        if np.any(non_finite):
+            self._update_non_finite(spectrum_no_units, axis, maggies,
+                                    non_finite)
+        if scale != 1:
+            # Convert the results instead of the input spectrum.
+            maggies *= scale
+        if not np.all(self.valid):
+            maggies[..., ~self.valid] = np.nan
+        return maggies
+
+
+    def _update_non_finite(self, spectrum_no_units, axis, maggies,
+                           non_finite):
+        """Recalculate non-finite AB maggies using each band's wavelengths.
+
+        Used by :meth:`get_ab_maggies` to give the same results as
+        :class:`FilterConvolution` for spectra with non-finite values outside
+        of some bands.
+
+        Parameters
+        ----------
+        spectrum_no_units : numpy.ndarray
+            Array of spectra without units, with a valid shape.
+        axis : int
+            The axis along which wavelength increases in the spectrum array.
+        maggies : numpy.ndarray
+            Array of AB maggies to update in place.
+        non_finite : numpy.ndarray
+            Boolean array with the shape of maggies that selects the results
+            to recalculate.
+        """
+        spectrum_no_units = np.moveaxis(spectrum_no_units, axis, -1)
+        for i, response_slice in enumerate(self._response_slices):
+            rows = non_finite[..., i]
+            if np.any(rows):
+                maggies[..., i][rows] = np.dot(
+                    spectrum_no_units[rows][:, response_slice],
+                    self.matrix[i, response_slice])
+
+
+    def _get_pool(self, n_workers):
+        """Return our pool of worker processes, creating it if necessary.
+
+        Parameters
+        ----------
+        n_workers : int
+            Number of worker processes to use.
+
+        Returns
+        -------
+        tuple
+            Tuple (pool, shared_input, shared_output) where the arrays are
+            views of the memory shared with the worker processes, with one
+            spectrum per row.
+        """
+        if self._pool is not None and self._pool_workers == n_workers:
+            return self._pool
+
+        import multiprocessing
+        import multiprocessing.sharedctypes
+
+        self.close()
+        num_bands = len(self.names)
+        chunk_rows = max(
+            4 * n_workers,
+            self._parallel_chunk_nbytes // (8 * self.num_wavelength))
+        input_buffer = multiprocessing.sharedctypes.RawArray(
+            'd', chunk_rows * self.num_wavelength)
+        output_buffer = multiprocessing.sharedctypes.RawArray(
+            'd', chunk_rows * num_bands)
+        pool = multiprocessing.Pool(
+            n_workers, initializer=_init_photometry_worker,
+            initargs=(self.matrix, chunk_rows, input_buffer, output_buffer))
+        self._pool_workers = n_workers
+        self._pool = (
+            pool,
+            np.frombuffer(input_buffer).reshape(
+                chunk_rows, self.num_wavelength),
+            np.frombuffer(output_buffer).reshape(chunk_rows, num_bands))
+        return self._pool
+
+
+    def close(self):
+        """Stop any worker processes used by :meth:`get_ab_maggies`.
+
+        A plan can also be used as a context manager that calls this method
+        on exit.  The plan remains usable and will start new worker processes
+        if they are needed again.
+        """
+        if self._pool is not None:
+            pool = self._pool[0]
+            self._pool = None
+            pool.close()
+            pool.join()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __del__(self):
+        # Stop the workers of a plan that was never closed.  The pool is
+        # terminated rather than joined since this can run during garbage
+        # collection or interpreter shutdown.
+        pool = getattr(self, '_pool', None)
+        if pool is not None:
+            self._pool = None
+            pool[0].terminate()
+
+
+    def _get_maggies_parallel(self, spectrum_no_units, axis, n_workers):
+        """Calculate AB maggies using a pool of worker processes.
+
+        Used by :meth:`get_ab_maggies` when its ``n_workers`` option is set.
+        Spectra are copied into shared memory one chunk at a time, so the
+        additional memory used is bounded by ``_parallel_chunk_nbytes``.
+
+        Parameters
+        ----------
+        spectrum_no_units : numpy.ndarray
+            Array of spectra without units, with a valid shape.
+        axis : int
+            The axis along which wavelength increases in the spectrum array.
+        n_workers : int
+            Number of worker processes to use.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB maggies with the wavelength axis of the input removed
+            and a new last axis of length num_bands added.
+        """
+        pool, shared_input, shared_output = self._get_pool(n_workers)
+        chunk_rows = len(shared_input)
+
+        spectrum_no_units = np.moveaxis(spectrum_no_units, axis, -1)
+        shape = spectrum_no_units.shape[:-1]
+        num_spectra = int(np.prod(shape))
+        maggies = np.empty((num_spectra, len(self.names)))
+        for lo in range(0, num_spectra, chunk_rows):
+            hi = min(lo + chunk_rows, num_spectra)
+            # Gather the spectra for this chunk without copying the others.
+            rows = np.unravel_index(np.arange(lo, hi), shape) if shape else ()
+            shared_input[:hi - lo] = spectrum_no_units[rows]
+            # Split the rows into a few tasks per worker to balance the load.
+            bounds = np.linspace(0, hi - lo, 4 * n_workers + 1).astype(int)
+            tasks = [(first, last) for first, last in
+                     zip(bounds[:-1], bounds[1:]) if last > first]
+            pool.map(_run_photometry_worker, tasks)
+            maggies[lo:hi] = shared_output[:hi - lo]
+        return maggies.reshape(shape + (len(self.names),))
+
+
+    def get_ab_magnitudes(self, spectrum, axis=-1, out=None, n_workers=None):
+        """Calculate the AB magnitudes of tabulated spectra in each band.
+
+        Parameters
+        ----------
+        spectrum : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        axis : int
+            See :meth:`get_ab_maggies` for details.
+        out : numpy.ndarray or None
+            See :meth:`get_ab_maggies` for details.
+        n_workers : int or None
+            See :meth:`get_ab_maggies` for details.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB magnitudes with the same shape as the result of
+            :meth:`get_ab_maggies`.
+        """
+        if out is None:
+            return -2.5 * np.log10(
+                self.get_ab_maggies(spectrum, axis, n_workers=n_workers))
+        self.get_ab_maggies(spectrum, axis, out, n_workers)
+        np.log10(out, out=out)
+        out *= -2.5
+        return out
+
+
+    def get_ab_maggies_ivar(self, spectrum, ivar, axis=-1, covariance=False):
+        """Calculate AB maggies and their inverse variances in each band.
+
+        Since maggies are linear in the spectral flux densities, the variance
+        of each band is obtained from the same matrix used to calculate the
+        maggies, applied to the per-pixel variances of the spectra, with one
+        matrix product for all spectra.  Pixels are assumed to be
+        uncorrelated.
+
+        Parameters
+        ----------
+        spectrum : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        ivar : array or :class:`astropy.units.Quantity`
+            Array of inverse variances of the spectral flux densities with
+            the same shape as spectrum.  Values must either have explicit
+            units that are convertible to the inverse square of
+            :attr:`default_flux_unit`, or else they will be implicitly
+            interpreted as having these default units.  Pixels with zero
+            inverse variance are treated as missing, and give zero inverse
+            variance in any band where they have a non-zero weight.
+        axis : int
+            See :meth:`get_ab_maggies` for details.
+        covariance : bool
+            Also calculate the covariance of the maggies in each pair of
+            bands when this parameter is True.
+
+        Returns
+        -------
+        tuple
+            Tuple (maggies, maggies_ivar) of arrays, with the shape of the
+            result of :meth:`get_ab_maggies`, or (maggies, maggies_ivar,
+            maggies_covariance) when covariance is True, where the last
+            array has an additional last axis of length num_bands.  Results
+            for any invalid bands are NaN.  Covariances involving a band with
+            zero inverse variance are infinite.
+        """
+        maggies = self.get_ab_maggies(spectrum, axis)
+
+        ivar_no_units, ivar_scale = _strip_units(
+            ivar, default_flux_unit ** -2, 'Inverse variance')
+        if ivar_no_units.shape != np.shape(spectrum):
+            raise ValueError('Inverse variance and spectrum shapes differ.')
+
+        ivar_no_units = np.moveaxis(ivar_no_units, axis, -1)
+        missing = ivar_no_units <= 0
+        variance = np.zeros(ivar_no_units.shape)
+        np.divide(1., ivar_no_units, out=variance, where=~missing)
+        # A band is missing if any missing pixel has a non-zero weight.
+        band_missing = np.dot(missing, (self.matrix != 0).T)
+        band_variance = np.dot(variance, (self.matrix ** 2).T)
+
+        maggies_ivar = np.zeros(band_variance.shape)
+        use = ~band_missing & (band_variance > 0)
+        maggies_ivar[use] = ivar_scale / band_variance[use]
+        maggies_ivar[..., ~self.valid] = np.nan
+        if not covariance:
+            return maggies, maggies_ivar
+
+        maggies_covariance = np.einsum(
+            '...j,bj,cj->...bc', variance, self.matrix, self.matrix)
+        if ivar_scale != 1:
+            maggies_covariance /= ivar_scale
+        maggies_covariance[
+            band_missing[..., :, np.newaxis] |
+            band_missing[..., np.newaxis, :]] = np.inf
+        maggies_covariance[..., ~self.valid, :] = np.nan
+        maggies_covariance[..., :, ~self.valid] = np.nan
+        return maggies, maggies_ivar, maggies_covariance
+
+
+    def stream_ab_maggies(self, spectra, out, chunk_size=4096, start=0,
+                          callback=None):
+        """Calculate the AB maggies of a large batch of spectra in chunks.
+
+        Spectra are processed in chunks of at most ``chunk_size`` rows, and
+        the results for each chunk are written to ``out`` before the next
+        chunk is read, so that the peak memory usage is set by the chunk size
+        rather than the number of spectra.  This is intended for inputs that
+        do not fit in memory, for example a memory-mapped array returned by
+        ``np.load(file_name, mmap_mode='r')``.
+
+        An interrupted run can be resumed by passing the last row count
+        reported to ``callback`` as the ``start`` parameter.
+
+        Parameters
+        ----------
+        spectra : numpy.ndarray or iterable
+            Either a 2D array of shape (num_spectra, num_wavelength) or an
+            iterable of such 2D blocks, with any number of rows in each block,
+            whose rows are spectral flux densities tabulated on our wavelength
+            grid.  See :meth:`get_ab_maggies` for details on flux units.
+        out : numpy.ndarray or str
+            Array of shape (num_spectra, num_bands) where the results should
+            be written, or else the name of a ``.npy`` file to write. An
+            existing file is updated in place, for example to resume a
+            previous run.  Otherwise, a new file is created, which requires
+            that spectra is an array.
+        chunk_size : int
+            Maximum number of spectra to process at once.
+        start : int
+            Index of the first spectrum to process.  Results for any earlier
+            spectra in ``out`` are not modified.
+        callback : callable or None
+            Function called with the number of spectra completed after the
+            results for each chunk have been written (and flushed to disk
+            when ``out`` is memory mapped).
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB maggies with shape (num_spectra, num_bands), which is
+            the out array or a memory map of the out file.
+        """
+        if chunk_size < 1:
+            raise ValueError('Invalid chunk_size {0}.'.format(chunk_size))
+        num_spectra = None
+        if isinstance(spectra, np.ndarray):
+            num_spectra = len(spectra)
+            spectra = [spectra]
+        if isinstance(out, basestring):
+            if os.path.exists(out):
+                out = np.lib.format.open_memmap(out, mode='r+')
+            elif num_spectra is not None:
+                out = np.lib.format.open_memmap(
+                    out, mode='w+', dtype=np.float64,
+                    shape=(num_spectra, len(self.names)))
+            else:
+                raise ValueError(
+                    'Cannot create output file for iterable spectra.')
+
+        row = 0
+        for block in spectra:
+            num_rows = len(block)
+            # Skip any rows in this block that were already completed.
+            first = min(max(start - row, 0), num_rows)
+            for lo in range(first, num_rows, chunk_size):
+                hi = min(lo + chunk_size, num_rows)
+                self.get_ab_maggies(
+                    block[lo:hi], axis=-1, out=out[row + lo:row + hi])
+                if hasattr(out, 'flush'):
+                    out.flush()
+                if callback is not None:
+                    callback(row + hi)
+            row += num_rows
+        return out
+
+
+class BandShiftPlan(PhotometryPlan):
+    """Calculate AB maggies in one filter for many band shifts at once.
+
+    A band shift plan is a :class:`PhotometryPlan` whose bands are copies of a
+    single filter response with different :ref:`wavelength shifts
+    <shifted-filters>` applied, as needed to tabulate k-corrections.  The AB
+    maggies for every band shift are obtained with a single matrix product:
+
+    >>> rband = load_filter('sdss2010-r')
+    >>> wlen = np.linspace(3000, 8000, 1000) * default_wavelength_unit
+    >>> plan = BandShiftPlan(rband, np.linspace(0, 0.5, 11), wlen)
+    >>> flux = np.ones((4, 1000)) * 1e-17 * default_flux_unit
+    >>> maggies = plan.get_ab_maggies(flux)
+    >>> maggies.shape
+    (4, 11)
+
+    The results are the same as for filters created with
+    :meth:`FilterResponse.create_shifted`, but the AB zeropoint is only
+    calculated once, since it does not depend on the band shift, and the plan
+    does not use or fill the convolution cache.
+
+    Parameters
+    ----------
+    response : :class:`FilterResponse` or str
+        A FilterResponse object without any wavelength shift, or else a
+        fully qualified name that will be loaded using :func:`load_filter`.
+    band_shifts : array
+        One dimensional array of wavelength shifts to apply, which must all
+        be > -1.
+    wavelength : array
+        A :func:`valid array <validate_wavelength_array>` of wavelengths
+        that must cover the full range of each shifted filter response.
+    interpolate : bool
+        Allow interpolation of the tabulated function if necessary. See
+        :class:`FilterConvolution` for details.
+    method : str
+        Specifies the numerical integration scheme to use. See
+        :class:`FilterConvolution` for details.
+    mask_invalid : bool
+        When True, any band shift whose convolution cannot be set up (usually
+        because of insufficient wavelength coverage) is flagged as invalid and
+        its results are NaN.  Otherwise, any error raises an exception.
+
+    Attributes
+    ----------
+    band_shifts : numpy.ndarray
+        Array of the band shifts corresponding to each band.
+    ab_zeropoints : numpy.ndarray
+        Array of AB zeropoints in 1 / (cm2 s) for each band shift.
+
+    Raises
+    ------
+    ValueError
+        Invalid band shifts or wavelength grid.
+    RuntimeError
+        The filter response already has a wavelength shift applied.
+    """
+    def __init__(self, response, band_shifts, wavelength, interpolate=True,
+                 method='trapz', mask_invalid=False):
+
+        if method not in _filter_convolution_methods:
+            raise ValueError(
+                'Invalid method "{0}", pick one of {1}.'
+                .format(method, _filter_convolution_methods))
+
+        if isinstance(response, basestring):
+            response = load_filter(response)
+        if response.band_shift is not None:
+            raise RuntimeError(
+                'Cannot apply a second wavelength shift to a filter response.')
+
+        self.band_shifts = np.asarray(band_shifts, dtype=float)
+        if len(self.band_shifts.shape) != 1:
+            raise ValueError('Band shifts must be a 1D array.')
+        if np.any(self.band_shifts <= -1):
+            raise ValueError('Invalid filter band_shift <= -1.')
+
+        wavelength_value = validate_wavelength_array(wavelength, min_length=2)
+        self.num_wavelength = len(wavelength_value)
+        if not isinstance(wavelength, WavelengthGrid):
+            # Keep any grid so that convolutions can use its cached data.
+            wavelength = wavelength_value
+
+        # The AB zeropoint only depends on the integral of the response
+        # divided by wavelength, which is invariant under a band shift.
+        self.ab_zeropoints = np.full(
+            len(self.band_shifts), response.ab_zeropoint.value)
+
+        responses = [response.create_shifted(z) for z in self.band_shifts]
+        self._initialize(
+            responses, self.ab_zeropoints, wavelength, interpolate, method,
+            mask_invalid, FilterConvolution)
+
+
+class RedshiftPlan(object):
+    """Calculate AB maggies of templates over a grid of redshifts.
+
+    A redshift plan calculates the observed-frame AB maggies of a set of
+    templates tabulated on a common rest-frame wavelength grid, for every
+    combination of template, redshift and band:
+
+    >>> sdss = load_filters('sdss2010-*')
+    >>> wlen = np.linspace(1000, 12000, 1000) * default_wavelength_unit
+    >>> plan = RedshiftPlan(sdss, np.linspace(0, 1, 21), wlen)
+    >>> templates = np.ones((3, 1000)) * 1e-17 * default_flux_unit
+    >>> maggies = plan.get_ab_maggies(templates)
+    >>> maggies.shape
+    (3, 21, 5)
+
+    Redshifting a spectrum only rescales its wavelength axis, so the
+    observed-frame convolution of a filter with a template redshifted to
+    :math:`z` is equal to :math:`1 + z` times the rest-frame convolution of
+    the template with the filter :ref:`shifted <shifted-filters>` by
+    ``band_shift = z``. Each band is therefore calculated with a
+    :class:`BandShiftPlan` on the rest-frame grid, without transforming or
+    padding the templates for each redshift.  The results are the same as
+    using :func:`speclite.redshift.redshift` to transform each template
+    (with exponents of +1 for wavelength and -1 for flux) and calling
+    :meth:`FilterSequence.get_ab_maggies`.
+
+    The rest-frame wavelength grid must cover every filter shifted to each
+    redshift, which requires coverage of the observed-frame response
+    wavelengths divided by one plus each redshift.  Use ``mask_invalid`` to
+    obtain NaN results when this is not the case.
+
+    Parameters
+    ----------
+    responses : :class:`FilterSequence` or iterable
+        The filter responses to use, either as :class:`FilterResponse`
+        objects without any wavelength shift or as names that will be loaded
+        using :func:`load_filter`.
+    redshifts : array
+        One dimensional array of redshifts, which must all be > -1.
+    wavelength : array
+        A :func:`valid array <validate_wavelength_array>` of rest-frame
+        wavelengths used to tabulate templates.
+    interpolate : bool
+        Allow interpolation of the tabulated function if necessary. See
+        :class:`FilterConvolution` for details.
+    method : str
+        Specifies the numerical integration scheme to use. See
+        :class:`FilterConvolution` for details.
+    mask_invalid : bool
+        When True, any combination of band and redshift whose convolution
+        cannot be set up (usually because of insufficient wavelength
+        coverage) is flagged as invalid and its results are NaN.  Otherwise,
+        any error raises an exception.
+    chunk_size : int or None
+        When this parameter is None, the matrix of each band for all
+        redshifts is precomputed, which uses num_bands * num_redshifts *
+        num_wavelength floats of memory.  Otherwise, the matrices are built
+        for at most this number of redshifts at a time when they are first
+        needed, and kept for later calls, and results are calculated one
+        chunk of redshifts at a time to limit the size of temporary arrays.
+
+    Attributes
+    ----------
+    names : list of str
+        List of the filter response names corresponding to each band.
+    redshifts : numpy.ndarray
+        Array of the redshifts used.
+    num_wavelength : int
+        The number of wavelengths used to tabulate input templates.
+    """
+    def __init__(self, responses, redshifts, wavelength, interpolate=True,
+                 method='trapz', mask_invalid=False, chunk_size=None):
+
+        self.redshifts = np.asarray(redshifts, dtype=float)
+        if len(self.redshifts.shape) != 1 or len(self.redshifts) == 0:
+            raise ValueError('Redshifts must be a non-empty 1D array.')
+        if np.any(self.redshifts <= -1):
+            raise ValueError('Found invalid redshift <= -1.')
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('Invalid chunk_size {0}.'.format(chunk_size))
+        self._chunk_size = chunk_size
+
+        wavelength_value = validate_wavelength_array(wavelength, min_length=2)
+        self.num_wavelength = len(wavelength_value)
+        if not isinstance(wavelength, WavelengthGrid):
+            wavelength = wavelength_value
+        self._wavelength = wavelength
+
+        self._responses = [
+            load_filter(r) if isinstance(r, basestring) else r
+            for r in responses]
+        self.names = [r.name for r in self._responses]
+        self._options = (interpolate, method, mask_invalid)
+
+        # Dictionary of the BandShiftPlan for each (chunk start, band index).
+        self._plans = {}
+        if chunk_size is None:
+            for i in range(len(self._responses)):
+                self._get_plan(0, i)
+
+
+    def _get_plan(self, lo, i):
+        """Return the plan for one chunk of redshifts and one band.
+
+        Plans are built the first time they are needed.
+
+        Parameters
+        ----------
+        lo : int
+            Index of the first redshift in the chunk.
+        i : int
+            Index of the band.
+
+        Returns
+        -------
+        BandShiftPlan
+            Plan for the chunk of redshifts starting at lo.
+        """
+        plan = self._plans.get((lo, i))
+        if plan is None:
+            chunk_size = self._chunk_size or len(self.redshifts)
+            plan = BandShiftPlan(
+                self._responses[i], self.redshifts[lo:lo + chunk_size],
+                self._wavelength, *self._options)
+            self._plans[lo, i] = plan
+        return plan
+
+
+    def get_ab_maggies(self, templates, axis=-1):
+        """Calculate the AB maggies of redshifted templates in each band.
+
+        Parameters
+        ----------
+        templates : array or :class:`astropy.units.Quantity`
+            Array of rest-frame spectral flux densities tabulated on our
+            wavelength grid. See :meth:`PhotometryPlan.get_ab_maggies` for
+            details on units.
+        axis : int
+            The axis along which wavelength increases in the templates array.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB maggies with the wavelength axis of the input removed
+            and two new last axes of length num_redshifts and num_bands
+            added.  Results for any invalid combinations of band and redshift
+            are NaN.
+        """
+        num_redshifts = len(self.redshifts)
+        chunk_size = self._chunk_size or num_redshifts
+        maggies = None
+        for lo in range(0, num_redshifts, chunk_size):
+            chunk = slice(lo, lo + chunk_size)
+            for i in range(len(self._responses)):
+                result = self._get_plan(lo, i).get_ab_maggies(templates, axis)
+                if maggies is None:
+                    maggies = np.empty(
+                        result.shape[:-1] + (num_redshifts, len(self.names)))
+                maggies[..., chunk, i] = result
+        # Convert the rest-frame convolutions to the observed frame.
+        maggies *= (1 + self.redshifts)[:, np.newaxis]
+        return maggies
+
+
+class FilterSequence(collections.Sequence):
+    """Immutable sequence of filter responses.
+
+    Sequences should normally be created by calling :func:`load_filters`.
+    Objects implement the `immutable sequence
+    <https://docs.python.org/2/library/collections.html
+    #collections-abstract-base-classes>`__ API, in addition to the methods
+    listed here.
+
+    A filter sequence's :meth:`get_ab_maggies` and :meth:`get_ab_magnitudes`
+    methods return their results in a :class:`Table <astropy.table.Table>` and
+    are convenient for calculating convolutions in several bands for
+    multiple spectra.  For example, given the following 4 (identical) spectra
+    covering the SDSS filters:
+
+    >>> num_spectra, num_pixels = 4, 500
+    >>> wlen = np.linspace(2000, 12000, num_pixels) * default_wavelength_unit
+    >>> flux = np.ones((num_spectra, num_pixels)) * 1e-17 * default_flux_unit
+
+    We can now calculate their magnitudes in all bands with one function:
+
+    >>> sdss = load_filters('sdss2010-*')
+    >>> mags = sdss.get_ab_magnitudes(flux, wlen)
+
+    Refer to the :mod:`astropy docs <astropy.table>` for details on working
+    with Tables.  For example, to pretty-print the magnitudes with a
+    precision of 0.001:
+
+    >>> formats = dict((n, '%.3f') for n in sdss.names)
+    >>> mags.write(None, format='ascii.fixed_width', formats=formats)
+    | sdss2010-u | sdss2010-g | sdss2010-r | sdss2010-i | sdss2010-z |
+    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
+    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
+    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
+    |     22.340 |     21.742 |     21.141 |     20.718 |     20.338 |
+
+    Parameters
+    ----------
+    responses : iterable
+        Response objects to include in this sequence. Objects are copied to
+        an internal list.
+
+    Attributes
+    ----------
+    names : list of str
+        List of the filter response names in this sequence, with the format
+        "<group_name>-<band_name>".
+    effective_wavelengths : astropy.units.Quantity
+        List of the effective wavelengths for the filter responses in this
+        sequence, with the default wavelength units.
+    pivot_wavelengths : astropy.units.Quantity
+        List of the :attr:`pivot wavelengths
+        <FilterResponse.pivot_wavelength>` for the filter responses in this
+        sequence, with the default wavelength units.
+    bandwidths : astropy.units.Quantity
+        List of the :attr:`bandwidths <FilterResponse.bandwidth>` for the
+        filter responses in this sequence, with the default wavelength units.
+    """
+    def __init__(self, responses):
+        self._responses = list(responses)
+        # Tuple (key, wavelength, plan) used by _get_parallel_plan.
+        self._parallel_plan = None
+
+
+    def __contains__(self, item):
+        return item in self._responses
+
+
+    def __len__(self):
+        return len(self._responses)
+
+
+    def __iter__(self):
+        return iter(self._responses)
+
+
+    def __getitem__(self, key):
+        return self._responses[key]
+
+
+    @property
+    def names(self):
+        return [r.name for r in self]
+
+
+    @property
+    def effective_wavelengths(self):
+        return [
+            r.effective_wavelength.value for r in self
+            ] * default_wavelength_unit
+
+
+    @property
+    def pivot_wavelengths(self):
+        return [
+            r.pivot_wavelength.value for r in self
+            ] * default_wavelength_unit
+
+
+    @property
+    def bandwidths(self):
+        return [
+            r.bandwidth.value for r in self
+            ] * default_wavelength_unit
+
+
+    _output_types = ('table', 'ndarray', 'structured')
+
+
+    def _get_parallel_plan(self, wavelength, mask_invalid):
+        """Return a photometry plan whose worker processes can be re-used.
+
+        Used by :meth:`get_ab_maggies` and :meth:`get_ab_magnitudes` when
+        their ``n_workers`` option is set. The plan for the most recent
+        wavelength grid is kept, so its pool of workers can be re-used by
+        later calls on the same grid, until :meth:`close` is called.
+        """
+        wavelength_value = validate_wavelength_array(wavelength, min_length=2)
+        if isinstance(wavelength, WavelengthGrid):
+            fingerprint = wavelength.fingerprint
+        else:
+            fingerprint = _get_grid_fingerprint(wavelength_value)
+        key = (fingerprint, mask_invalid)
+        if self._parallel_plan is not None:
+            saved_key, grid, plan = self._parallel_plan
+            if saved_key == key and np.array_equal(grid, wavelength_value):
+                return plan
+            self.close()
+        plan = PhotometryPlan(self, wavelength, mask_invalid=mask_invalid)
+        self._parallel_plan = (key, wavelength_value.copy(), plan)
+        return plan
+
+
+    def close(self):
+        """Stop any worker processes used for tabulated spectra.
+
+        Worker processes are started when :meth:`get_ab_maggies` or
+        :meth:`get_ab_magnitudes` are called with ``n_workers`` and kept for
+        later calls on the same wavelength grid. A sequence can also be used
+        as a context manager that calls this method on exit, and remains
+        usable afterwards.
+        """
+        if self._parallel_plan is not None:
+            plan = self._parallel_plan[2]
+            self._parallel_plan = None
+            plan.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def _get_results(self, spectrum, wavelength=None, axis=-1,
+                     mask_invalid=False, magnitudes=False, output='table',
+                     out=None, n_workers=None):
+        """Helper method to avoid duplicating code.
+
+        Used by :meth:`get_ab_magnitudes` and :meth:`get_ab_maggies`.
+        Parameters are identical to those methods except for an additional
+        ``magnitudes`` parameter that selects AB magnitudes instead of
+        maggies for the results.
+        """
+        if output not in self._output_types:
+            raise ValueError(
+                "Invalid output '{0}'. Pick one of {1}."
+                .format(output, self._output_types))
+        if output == 'table' and out is not None:
+            raise ValueError('Cannot use out with table output.')
+
+        # Prepare an array of results with shape (..., num_bands), which is
+        # a view of any structured output array.
+        results = out
+        if output == 'structured':
+            dtype = np.dtype([(name, np.float64) for name in self.names])
+            if out is None:
+                shape = list(np.shape(spectrum) if wavelength is not None
+                             else ())
+                if shape:
+                    del shape[axis]
+                out = np.empty(shape, dtype)
+            elif out.dtype != dtype or not out.flags.c_contiguous:
+                raise ValueError(
+                    'Expected C-contiguous out array with dtype {0}.'
+                    .format(dtype))
+            results = out.reshape(-1).view(np.float64).reshape(
+                out.shape + (len(self),))
+
+        if wavelength is None:
+            # Convolve each filter with the callable spectrum.
+            method = (FilterResponse.get_ab_magnitude if magnitudes
+                      else FilterResponse.get_ab_maggies)
+            columns = []
+            valid = np.ones(len(self), dtype=bool)
+            for i, r in enumerate(self):
+                try:
+                    columns.append(method(r, spectrum, wavelength, axis))
+                except ValueError as e:
+                    if not mask_invalid:
+                        raise e
+                    columns.append(np.nan)
+                    valid[i] = False
+            if output != 'table':
+                if results is None:
+                    results = np.array(columns, dtype=float)
+                else:
+                    results[...] = columns
+        else:
+            # Calculate all bands with a single matrix product.
+            if n_workers is None:
+                plan = PhotometryPlan(
+                    self, wavelength, mask_invalid=mask_invalid)
+            else:
+                plan = self._get_parallel_plan(wavelength, mask_invalid)
+            if magnitudes:
+                results = plan.get_ab_magnitudes(
+                    spectrum, axis, results, n_workers)
+            else:
+                results = plan.get_ab_maggies(
+                    spectrum, axis, results, n_workers)
+            columns = [results[..., i] for i in range(len(self))]
+            valid = plan.valid
+
+        if output == 'structured':
+            return out
+        elif output == 'ndarray':
+            return results
+
+        t = astropy.table.Table(meta=dict(
+            description='Created by speclite <speclite.readthedocs.io>'),
+            masked=mask_invalid)
+        for r, data, is_valid in zip(self, columns, valid):
+            data = np.asarray(data)
+            if data.shape == ():
+                data = [data]
+            if is_valid:
+                column = astropy.table.Column(name=r.name, data=data)
+            else:
+                column = astropy.table.MaskedColumn(
+                    name=r.name, data=data, mask=True, fill_value=np.nan)
             t.add_column(column)
         return t
 
 
     def get_ab_maggies(self, spectrum, wavelength=None, axis=-1,
-                       mask_invalid=False):
+                       mask_invalid=False, output='table', out=None,
+                       n_workers=None):
         """Calculate a spectrum's relative AB flux convolutions.
 
         Calls :meth:`FilterResponse.get_ab_maggies` for each filter in this
-        sequence and returns the results in a structured array.
+        sequence and returns the results in a table or array.
 
         Use :meth:`get_ab_magnitudes` for the corresponding AB magnitudes.
 
@@ -1683,27 +3590,47 @@ class FilterSequence(collections.Sequence):
         mask_invalid : bool
             When True, if an error occurs while calculating results for
             one filter (usually because of insufficient wavelength coverage),
-            the corresponding output column will be filled with missing values.
-            Otherwise, any error raises an exception.
+            the corresponding output column will be filled with missing values
+            (or NaN for array outputs). Otherwise, any error raises an
+            exception.
+        output : str
+            Type of result to return, which must be one of 'table' (the
+            default), 'ndarray' or 'structured'.  The array outputs avoid
+            the overhead of building a table, which can be significant for
+            small inputs.
+        out : numpy.ndarray or None
+            Optional array with the same shape and type as the result where
+            the results should be stored, so that the same buffer can be
+            re-used for many calls.  Cannot be used with table output.
+        n_workers : int or None
+            Number of worker processes to use for tabulated spectra.  See
+            :meth:`PhotometryPlan.get_ab_maggies` for details.  The workers
+            are kept for later calls on the same wavelength grid until
+            :meth:`close` is called.
 
         Returns
         -------
-        astropy.table.Table
-            A table of results with column names corresponding to canonical
-            filter names of the form "<group_name>-<band_name>". If the input
-            spectrum data is multidimensional, its first index is mapped to rows
-            of the returned table.
+        astropy.table.Table or numpy.ndarray
+            With the default table output, a table of results with column
+            names corresponding to canonical filter names of the form
+            "<group_name>-<band_name>". If the input spectrum data is
+            multidimensional, its first index is mapped to rows of the
+            returned table.  With ndarray output, an array of shape
+            (..., num_bands) where ... are the input dimensions with the
+            wavelength axis removed.  With structured output, an array of
+            shape (...) with one float64 field per filter name.
         """
-        return self._get_table(spectrum, wavelength, axis, mask_invalid,
-                               method=FilterResponse.get_ab_maggies)
+        return self._get_results(spectrum, wavelength, axis, mask_invalid,
+                                 False, output, out, n_workers)
 
 
     def get_ab_magnitudes(self, spectrum, wavelength=None, axis=-1,
-                          mask_invalid=False):
+                          mask_invalid=False, output='table', out=None,
+                          n_workers=None):
         """Calculate a spectrum's AB magnitude.
 
         Calls :meth:`FilterResponse.get_ab_magnitude` for each filter in this
-        sequence and returns the results in a structured array.
+        sequence and returns the results in a table or array.
 
         Parameters
         ----------
@@ -1714,29 +3641,185 @@ class FilterSequence(collections.Sequence):
         axis : int
             See :meth:`get_ab_magnitude` for details.
         mask_invalid : bool
-            When True, if an error occurs while calculating results for
-            one filter (usually because of insufficient wavelength coverage),
-            the corresponding output column will be filled with missing values.
-            Otherwise, any error raises an exception.
+            See :meth:`get_ab_maggies` for details.
+        output : str
+            See :meth:`get_ab_maggies` for details.
+        out : numpy.ndarray or None
+            See :meth:`get_ab_maggies` for details.
+        n_workers : int or None
+            See :meth:`get_ab_maggies` for details.
+
+        Returns
+        -------
+        astropy.table.Table or numpy.ndarray
+            See :meth:`get_ab_maggies` for details.
+        """
+        return self._get_results(spectrum, wavelength, axis, mask_invalid,
+                                 True, output, out, n_workers)
+
+
+    def get_ab_maggies_ivar(self, spectrum, ivar, wavelength, axis=-1,
+                            mask_invalid=False, covariance=False):
+        """Calculate a spectrum's AB maggies and their inverse variances.
+
+        All bands are calculated with a :class:`PhotometryPlan`, which
+        propagates the inverse variances using the same weights as the
+        maggies.  See :meth:`PhotometryPlan.get_ab_maggies_ivar` for details.
+
+        Parameters
+        ----------
+        spectrum : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        ivar : array or :class:`astropy.units.Quantity`
+            Inverse variances of the spectrum with the same shape.
+        wavelength : array or :class:`astropy.units.Quantity`
+            See :meth:`get_ab_maggies` for details.
+        axis : int
+            See :meth:`get_ab_maggies` for details.
+        mask_invalid : bool
+            When True, results for any filter that does not have sufficient
+            wavelength coverage are NaN.  Otherwise, any error raises an
+            exception.
+        covariance : bool
+            Also calculate the band-to-band covariance of the maggies.
 
         Returns
         -------
-        astropy.table.Table
-            A table of results with column names corresponding to canonical
-            filter names of the form "<group_name>-<band_name>". If the input
-            spectrum data is multidimensional, its first index is mapped to rows
-            of the returned table.
+        tuple
+            Tuple (maggies, maggies_ivar) of arrays with shape
+            (..., num_bands), or (maggies, maggies_ivar, maggies_covariance)
+            with covariance shape (..., num_bands, num_bands) when
+            covariance is True.
         """
-        return self._get_table(spectrum, wavelength, axis, mask_invalid,
-                               method=FilterResponse.get_ab_magnitude)
+        plan = PhotometryPlan(self, wavelength, mask_invalid=mask_invalid)
+        return plan.get_ab_maggies_ivar(spectrum, ivar, axis, covariance)
 
 
-    def pad_spectrum(self, spectrum, wavelength, axis=-1, method='median'):
+    def get_ab_maggies_ragged(self, flux, wavelength, offsets,
+                              mask_invalid=False):
+        """Calculate AB maggies for spectra tabulated on different grids.
+
+        Spectra are packed into concatenated flux and wavelength arrays,
+        where spectrum i uses the elements offsets[i]:offsets[i+1].  The
+        trapezoidal quadrature weights of every spectrum are built together
+        for each band, with no per-spectrum python loop, and give the same
+        results as :meth:`get_ab_maggies` for each spectrum. Any spectrum
+        whose grid undersamples a filter response (see :ref:`here
+        <sampling>`) is calculated separately using interpolation.
+
+        Parameters
+        ----------
+        flux : array or :class:`astropy.units.Quantity`
+            One dimensional array of the concatenated spectral flux densities
+            of all spectra.  See :meth:`get_ab_maggies` for details on units.
+        wavelength : array or :class:`astropy.units.Quantity`
+            One dimensional array of the concatenated wavelengths of all
+            spectra, which must be strictly increasing within each spectrum.
+            Units are optional, with :attr:`default_wavelength_unit` assumed.
+        offsets : array
+            Integer array of length num_spectra + 1 with offsets[0] = 0 and
+            offsets[-1] equal to the length of flux.  Each spectrum must have
+            at least two wavelengths.
+        mask_invalid : bool
+            When True, results are NaN for any spectrum whose wavelength
+            range does not cover a filter.  Otherwise, this raises an
+            exception.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of AB maggies with shape (num_spectra, num_bands).
+        """
+        flux_no_units, scale = _strip_units(flux, default_flux_unit, 'Spectrum')
+        wavelength_no_units, wavelength_scale = _strip_units(
+            wavelength, default_wavelength_unit, 'Wavelength')
+        if wavelength_scale != 1:
+            wavelength_no_units = wavelength_no_units * wavelength_scale
+        offsets = np.asarray(offsets)
+        if (flux_no_units.shape != wavelength_no_units.shape or
+            len(flux_no_units.shape) != 1):
+            raise ValueError('Flux and wavelength must be 1D and equal size.')
+        if (len(offsets.shape) != 1 or len(offsets) < 2 or offsets[0] != 0 or
+            offsets[-1] != len(flux_no_units)):
+            raise ValueError('Invalid offsets.')
+        if not np.all(np.diff(offsets) >= 2):
+            raise ValueError('Each spectrum must have at least 2 wavelengths.')
+
+        num_spectra = len(offsets) - 1
+        # Index of the spectrum that each element belongs to.
+        spectrum_index = np.repeat(np.arange(num_spectra), np.diff(offsets))
+        # Differences that span two spectra are not wavelength intervals.
+        interval = np.ones(len(wavelength_no_units) - 1, dtype=bool)
+        interval[offsets[1:-1] - 1] = False
+        if not np.all(np.diff(wavelength_no_units)[interval] > 0):
+            raise ValueError('Wavelength values must be strictly increasing.')
+        first, last = offsets[:-1], offsets[1:] - 1
+        # The neighboring wavelengths of each element within its spectrum.
+        before = np.empty_like(wavelength_no_units)
+        before[1:] = wavelength_no_units[:-1]
+        before[first] = -np.inf
+        after = np.empty_like(wavelength_no_units)
+        after[:-1] = wavelength_no_units[1:]
+        after[last] = np.inf
+
+        maggies = np.empty((num_spectra, len(self)))
+        for i, response in enumerate(self):
+            lo, hi = response._wavelength[0], response._wavelength[-1]
+            covered = ((wavelength_no_units[first] <= lo) &
+                       (wavelength_no_units[last] >= hi))
+            if not mask_invalid and not np.all(covered):
+                raise ValueError(
+                    'Wavelengths do not cover {0} response {1:.1f}-{2:.1f} {3}.'
+                    .format(response.name, lo, hi, default_wavelength_unit))
+            # Calculate the same trapezoidal weights as FilterConvolution,
+            # with the quadrature endpoints clipped to the filter endpoints.
+            quad_wavelength = np.clip(wavelength_no_units, lo, hi)
+            h = np.diff(quad_wavelength)
+            h[~interval] = 0.
+            weights = np.zeros_like(quad_wavelength)
+            weights[:-1] += 0.5 * h
+            weights[1:] += 0.5 * h
+            weights *= (response(wavelength_no_units) * quad_wavelength /
+                        _hc_constant.value / response.ab_zeropoint.value)
+            # Only use the elements of each spectrum in the same slice as
+            # FilterConvolution, so that non-finite fluxes outside of this
+            # band do not contribute a zero weight times NaN.
+            inside = (after > lo) & (before < hi)
+            maggies[:, i] = np.bincount(
+                spectrum_index[inside],
+                weights[inside] * flux_no_units[inside],
+                minlength=num_spectra)
+            maggies[~covered, i] = np.nan
+            # Count the response wavelengths after the first that are <= each
+            # input wavelength, to find intervals containing more than one.
+            count = np.searchsorted(
+                response._wavelength[1:], wavelength_no_units, side='right')
+            undersampled = np.zeros(num_spectra, dtype=bool)
+            undersampled[spectrum_index[:-1][
+                interval & (np.diff(count) > 1)]] = True
+            for j in np.where(undersampled & covered)[0]:
+                # Use a convolution with interpolation for this spectrum,
+                # without the convolution cache since it will not be re-used.
+                convolution = FilterConvolution(
+                    response, wavelength_no_units[first[j]:last[j] + 1],
+                    photon_weighted=True, interpolate=True)
+                maggies[j, i] = (
+                    convolution(flux_no_units[first[j]:last[j] + 1]) /
+                    response.ab_zeropoint.value)
+        if scale != 1:
+            maggies *= scale
+        return maggies
+
+
+    def pad_spectrum(self, spectrum, wavelength, axis=-1, method='median',
+                     out=None):
         """Pad a spectrum to cover all filter responses.
 
-        Calls :meth:`FilterResponse.pad_spectrum` for each filter in this
-        sequence, in order of increasing effective wavelength. Parameters and
-        caveats for this method are the same.
+        The result is the same as calling :meth:`FilterResponse.pad_spectrum`
+        for each filter in this sequence, in order of increasing effective
+        wavelength, but the padded wavelengths are found first and the
+        spectrum is only padded once. Parameters and caveats for this method
+        are the same.
 
         Parameters
         ----------
@@ -1748,6 +3831,8 @@ class FilterSequence(collections.Sequence):
             See :meth:`FilterResponse.pad_spectrum` for details.
         method : str
             See :meth:`FilterResponse.pad_spectrum` for details.
+        out : numpy.ndarray or None
+            See :meth:`FilterResponse.pad_spectrum` for details.
 
         Returns
         -------
@@ -1755,14 +3840,315 @@ class FilterSequence(collections.Sequence):
             A tuple (padded_spectrum, padded_wavelength) that replaces the
             inputs with padded equivalents.
         """
+        if method not in FilterResponse._pad_methods:
+            raise ValueError(
+                "Invalid method '{0}'. Pick one of {1}."
+                .format(method, FilterResponse._pad_methods))
+
+        wavelength_value = validate_wavelength_array(wavelength)
+
+        # Each filter extends the coverage with its own wavelengths beyond
+        # the coverage after padding for the previous filters.
         sorted_responses = [resp for (wlen, resp) in
-            sorted(zip(self.effective_wavelengths, self))]
-        padded_spectrum = np.asanyarray(spectrum)
-        padded_wavelength = np.asanyarray(wavelength)
+            sorted(zip(self.effective_wavelengths.value, self),
+                   key=lambda item: item[0])]
+        pad_before, pad_after = [], []
+        lo, hi = wavelength_value[0], wavelength_value[-1]
         for response in sorted_responses:
-            padded_spectrum, padded_wavelength = response.pad_spectrum(
-                padded_spectrum, padded_wavelength)
-        return padded_spectrum, padded_wavelength
+            response_wavelength = response._wavelength
+            if response_wavelength[0] < lo:
+                pad_before.insert(
+                    0, response_wavelength[response_wavelength < lo])
+                lo = response_wavelength[0]
+            if response_wavelength[-1] > hi:
+                pad_after.append(
+                    response_wavelength[response_wavelength > hi])
+                hi = response_wavelength[-1]
+        pad_before = np.hstack([[]] + pad_before)
+        pad_after = np.hstack([[]] + pad_after)
+
+        return _pad_spectrum(spectrum, wavelength, wavelength_value,
+                             pad_before, pad_after, axis, method, out)
+
+
+def _read_filter_file(file_name, register=True):
+    """Read a filter response from a file in the ECSV format.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the file to read.
+    register : bool
+        Register the filter response that is read.  See
+        :class:`FilterResponse` for details.
+
+    Returns
+    -------
+    FilterResponse
+        A new :class:`FilterResponse` object for the filter read from file.
+
+    Raises
+    ------
+    RuntimeError
+        File is incorrectly formatted.
+    """
+    table = astropy.table.Table.read(
+        file_name, format='ascii.ecsv', guess=False)
+
+    if 'wavelength' not in table.colnames:
+        raise RuntimeError('Table is missing required wavelength column.')
+    wavelength_column = table['wavelength']
+    if wavelength_column.unit is None:
+        raise RuntimeError('No wavelength column unit specified.')
+    wavelength = wavelength_column.data * wavelength_column.unit
+
+    if 'response' not in table.colnames:
+        raise RuntimeError('Table is missing required response column.')
+    response_column = table['response']
+    if response_column.unit is not None:
+        raise RuntimeError('Response column has unexpected units.')
+    response = response_column.data
+
+    return FilterResponse(wavelength, response, table.meta, register=register)
+
+
+def _build_filter_bundle(file_name=None):
+    """Build the binary bundle of standard filter responses.
+
+    The bundle is a single numpy ``.npz`` file that contains the trimmed
+    wavelength (in :attr:`default_wavelength_unit`) and response arrays of
+    every ECSV file in ``data/filters/``, concatenated with an index of
+    offsets, together with their metadata and the moments used to calculate
+    their effective wavelengths, AB zeropoints, etc.  :func:`load_filter`
+    uses the bundle when it is available so that loading a standard filter
+    requires no parsing or integration.
+
+    The bundle must be rebuilt whenever a standard filter file is added or
+    changed, using::
+
+        python -c 'import speclite.filters as f; f._build_filter_bundle()'
+
+    Parameters
+    ----------
+    file_name : str or None
+        Name of the file to write.  When None, the bundle is written to its
+        standard location in the package data directory.
+
+    Returns
+    -------
+    str
+        Name of the file that was written.
+    """
+    filters_path = astropy.utils.data._find_pkg_data_path('data/filters/')
+    if file_name is None:
+        file_name = os.path.join(filters_path, _filter_bundle_name)
+    names, responses = [], []
+    for ecsv_name in sorted(glob.glob(os.path.join(filters_path, '*.ecsv'))):
+        name, _ = os.path.splitext(os.path.basename(ecsv_name))
+        names.append(name)
+        responses.append(_read_filter_file(ecsv_name, register=False))
+    offsets = np.cumsum([0] + [len(r.wavelength) for r in responses])
+    wavelength = np.hstack([r.wavelength for r in responses])
+    response = np.hstack([r.response for r in responses])
+    meta = json.dumps([dict(r.meta) for r in responses], sort_keys=True)
+    with open(file_name, 'wb') as f:
+        np.savez(
+            f, names=np.array(names, dtype=np.unicode_),
+            offsets=offsets, wavelength=wavelength, response=response,
+            moments=_get_response_moments(wavelength, response, offsets),
+            meta=np.array(meta, dtype=np.unicode_))
+    return file_name
+
+
+def _get_filter_bundle():
+    """Return the contents of the standard filter bundle.
+
+    The bundle written by :func:`_build_filter_bundle` is only read once.
+
+    Returns
+    -------
+    dict or None
+        Dictionary of the arrays in the bundle, with the metadata decoded
+        to a list of dictionaries and an additional ``index`` dictionary that
+        maps each filter name to its position in the bundle. None if the
+        bundle is not available.
+    """
+    global _filter_bundle
+    if _filter_bundle is None:
+        file_name = astropy.utils.data._find_pkg_data_path(
+            'data/filters/{0}'.format(_filter_bundle_name))
+        if not os.path.isfile(file_name):
+            return None
+        with np.load(file_name) as bundle:
+            contents = dict((key, bundle[key]) for key in bundle.files)
+        for array in contents.values():
+            # The arrays are shared by every filter loaded from the bundle.
+            array.flags.writeable = False
+        contents['meta'] = json.loads(contents['meta'].item())
+        contents['index'] = dict(
+            (name, i) for i, name in enumerate(contents['names'].tolist()))
+        _filter_bundle = contents
+    return _filter_bundle
+
+
+def _load_bundled_filter(bundle, index, register=True):
+    """Create a filter response from the standard filter bundle.
+
+    Parameters
+    ----------
+    bundle : dict
+        Bundle contents returned by :func:`_get_filter_bundle`.
+    index : int
+        Position of the filter to create in the bundle.
+    register : bool
+        Register the filter response that is created.  See
+        :class:`FilterResponse` for details.
+
+    Returns
+    -------
+    FilterResponse
+        A new :class:`FilterResponse` object with its moments already
+        initialized, that does not share any data with the bundle.
+    """
+    start, stop = bundle['offsets'][index: index + 2]
+    response = FilterResponse(
+        bundle['wavelength'][start: stop].copy(),
+        bundle['response'][start: stop].copy(),
+        copy.deepcopy(bundle['meta'][index]), register=register)
+    response._moments = bundle['moments'][index].copy()
+    return response
+
+
+def _get_filter_group_index():
+    """Return the index of filter groups.
+
+    The index of standard groups is built the first time this function is
+    called, using the effective wavelengths stored in the standard filter
+    bundle so that no filters need to be loaded.  Custom groups are added to
+    the index with :func:`register_filter_group`.
+
+    Returns
+    -------
+    dict
+        Dictionary that maps each group name to a list of
+        (effective_wavelength, name, file_name) tuples sorted by increasing
+        effective wavelength.
+    """
+    global _filter_group_index
+    if _filter_group_index is None:
+        bundle = _get_filter_bundle()
+        filters_path = astropy.utils.data._find_pkg_data_path('data/filters/')
+        index = {}
+        for group_name in filter_group_names:
+            index[group_name] = _index_filter_group(
+                group_name, filters_path, bundle)
+        _filter_group_index = index
+    return _filter_group_index
+
+
+def _index_filter_group(group_name, directory_name, bundle=None):
+    """Index the filter files for one group in a directory.
+
+    Parameters
+    ----------
+    group_name : str
+        Name of the group to index.
+    directory_name : str
+        Directory containing files named "<group_name>-<band_name>.ecsv".
+    bundle : dict or None
+        Bundle contents returned by :func:`_get_filter_bundle`, used to look
+        up effective wavelengths.  Any files not found in the bundle are read
+        to calculate their effective wavelength.
+
+    Returns
+    -------
+    list
+        List of (effective_wavelength, name, file_name) tuples sorted by
+        increasing effective wavelength.
+    """
+    members = []
+    file_names = glob.glob(
+        os.path.join(directory_name, '{0}-*.ecsv'.format(group_name)))
+    for file_name in file_names:
+        name, _ = os.path.splitext(os.path.basename(file_name))
+        if not _full_name_pattern.match(name):
+            continue
+        if bundle is not None and name in bundle['index']:
+            moments = bundle['moments'][bundle['index'][name]]
+            weff = moments[3] / moments[2]
+        else:
+            weff = _read_filter_file(
+                file_name, register=False).effective_wavelength.value
+        members.append((weff, name, file_name))
+    return sorted(members)
+
+
+def _get_filter_group_names():
+    """Return the names of all standard and registered filter groups.
+
+    Returns
+    -------
+    list
+        List of the names in :attr:`filter_group_names` followed by the
+        names of any custom groups added with :func:`register_filter_group`
+        in alphabetical order.
+    """
+    index = _get_filter_group_index()
+    return filter_group_names + sorted(
+        [name for name in index if name not in filter_group_names])
+
+
+def register_filter_group(group_name, directory_name):
+    """Register a directory of custom filters as a filter group.
+
+    All the files named "<group_name>-<band_name>.ecsv" in the directory
+    (for example, as written by :meth:`FilterResponse.save`) are read once
+    to build an index of their bands, ordered by increasing effective
+    wavelength.  Afterwards, the group can be used with :func:`load_filters`
+    and :func:`load_filter` just like a standard group, without any further
+    scans of the directory::
+
+        register_filter_group('fangs', directory_name)
+        fangs = load_filters('fangs-*')
+
+    Registering the same group again replaces its previous index, for
+    example to pick up new files.
+
+    Parameters
+    ----------
+    group_name : str
+        Name of the group, which must be a valid python identifier and must
+        not be one of the standard :attr:`filter_group_names`.
+    directory_name : str
+        Name of the directory containing the filter files.
+
+    Returns
+    -------
+    list
+        List of the canonical names of the files in the registered group,
+        ordered by increasing effective wavelength.
+
+    Raises
+    ------
+    ValueError
+        Invalid or standard group name, missing directory, or no matching
+        filter files found.
+    """
+    if not isinstance(group_name, basestring) or \
+            not _name_pattern.match(group_name):
+        raise ValueError('Invalid group name "{0}".'.format(group_name))
+    if group_name in filter_group_names:
+        raise ValueError(
+            'Cannot replace the standard group "{0}".'.format(group_name))
+    if not os.path.isdir(directory_name):
+        raise ValueError('No such directory "{0}".'.format(directory_name))
+    members = _index_filter_group(group_name, directory_name)
+    if not members:
+        raise ValueError(
+            'No filter files for group "{0}" found in "{1}".'
+            .format(group_name, directory_name))
+    _get_filter_group_index()[group_name] = members
+    return [name for (weff, name, file_name) in members]
 
 
 def load_filters(*names):
@@ -1784,7 +4170,9 @@ def load_filters(*names):
       response from the specified file.
 
     Note that custom filters must be specified individually, even if they
-    all belong to the same group.
+    all belong to the same group, unless their directory has been registered
+    as a group with :func:`register_filter_group`.  Registered groups can be
+    used in canonical names and wildcards just like the standard groups.
 
     Parameters
     ----------
@@ -1799,30 +4187,21 @@ def load_filters(*names):
         filters in the order they were specified.
     """
     # Replace any group wildcards with the corresponding canonical names.
-    filters_path = astropy.utils.data._find_pkg_data_path('data/filters/')
+    group_index = _get_filter_group_index()
     names_to_load = []
     for name in names:
         group_match = _group_wildcard.match(name)
         if group_match:
             # Check that the group name is recognized.
             group_name = group_match.group(1)
-            if group_name not in filter_group_names:
+            if group_name not in group_index:
                 raise ValueError(
                     "No such group '{0}'.  Choose one of {1}."
-                    .format(group_name, filter_group_names))
-            # Scan data/filters/ for bands in this group.
-            band_names = []
-            band_weff = []
-            file_names = glob.glob(
-                os.path.join(filters_path, '{0}.ecsv'.format(name)))
-            for file_name in file_names:
-                full_name, _ = os.path.splitext(os.path.basename(file_name))
-                band_names.append(full_name)
-                response = load_filter(full_name)
-                band_weff.append(response.effective_wavelength)
+                    .format(group_name, _get_filter_group_names()))
             # Add bands in order of increasing effective wavelength.
             names_to_load.extend(
-                [name for (weff, name) in sorted(zip(band_weff, band_names))])
+                [name for (weff, name, file_name)
+                 in group_index[group_name]])
         else:
             if '*' in name:
                 raise ValueError(
@@ -1836,7 +4215,7 @@ def load_filters(*names):
     return FilterSequence(responses)
 
 
-def load_filter(name, load_from_cache=True, verbose=False):
+def load_filter(name, load_from_cache=True, verbose=False, register=True):
     """Load a single filter response by name.
 
     See :doc:`/filters` for details on the filter response file format and
@@ -1859,7 +4238,8 @@ def load_filter(name, load_from_cache=True, verbose=False):
     name : str
         Name of the filter response to load, which should normally have the
         format "<group_name>-<band_name>", and refer to one of the reference
-        filters described :doc:`here </filters>`.  Otherwise, the name of
+        filters described :doc:`here </filters>` or to a custom group added
+        with :func:`register_filter_group`.  Otherwise, the name of
         any file in the `ECSV format
         <https://github.com/astropy/astropy-APEs/blob/master/APE6.rst>`__
         and containing the required fields can be provided.  The existence
@@ -1867,9 +4247,13 @@ def load_filter(name, load_from_cache=True, verbose=False):
         and any other extension is considered an error.
     load_from_cache : bool
         Return a previously cached response object if available.  Otherwise,
-        always load the file from disk.
+        always load the response again, from the binary bundle for standard
+        filters when it is available, or else from its file on disk.
     verbose : bool
         Print verbose information about how this filter is loaded.
+    register : bool
+        Register a newly loaded filter so that it can be returned by
+        subsequent calls.  See :func:`filter_cache_info` for details.
 
     Returns
     -------
@@ -1884,10 +4268,12 @@ def load_filter(name, load_from_cache=True, verbose=False):
         File is incorrectly formatted.  This should never happen for the
         files included in the source code distribution.
     """
-    if load_from_cache and name in _filter_cache:
-        if verbose:
-            print('Returning cached filter response "{0}"'.format(name))
-        return _filter_cache[name]
+    if load_from_cache:
+        response = _filter_cache.get(name)
+        if response is not None:
+            if verbose:
+                print('Returning cached filter response "{0}"'.format(name))
+            return response
     # Is this a non-standard filter file?
     base_name, extension = os.path.splitext(name)
     if extension not in ('', '.ecsv'):
@@ -1903,34 +4289,33 @@ def load_filter(name, load_from_cache=True, verbose=False):
         if not valid:
             raise ValueError(
                 "Invalid filter name '{0}'. Use '<group>-<band>'.".format(name))
-        if valid.group(1) not in filter_group_names:
-            raise ValueError(
-                "No such group '{0}'. Choose one of {1}."
-                .format(valid.group(1), filter_group_names))
-        file_name = astropy.utils.data._find_pkg_data_path(
-            'data/filters/{0}.ecsv'.format(name))
+        group_name = valid.group(1)
+        if group_name in filter_group_names:
+            # Use the binary bundle of standard filters when possible.
+            bundle = _get_filter_bundle()
+            if bundle is not None and name in bundle['index']:
+                if verbose:
+                    print('Loading filter response "{0}" from bundle.'
+                          .format(name))
+                return _load_bundled_filter(
+                    bundle, bundle['index'][name], register)
+            file_name = astropy.utils.data._find_pkg_data_path(
+                'data/filters/{0}.ecsv'.format(name))
+        else:
+            # Look for a custom group added with register_filter_group.
+            members = _get_filter_group_index().get(group_name)
+            if members is None:
+                raise ValueError(
+                    "No such group '{0}'. Choose one of {1}."
+                    .format(group_name, _get_filter_group_names()))
+            file_name = dict(
+                (member, path) for (weff, member, path) in members).get(
+                    name, '')
         if not os.path.isfile(file_name):
             raise ValueError("No such filter '{0}' in this group.".format(name))
     if verbose:
         print('Loading filter response from "{0}".'.format(file_name))
-    table = astropy.table.Table.read(
-        file_name, format='ascii.ecsv', guess=False)
-
-    if 'wavelength' not in table.colnames:
-        raise RuntimeError('Table is missing required wavelength column.')
-    wavelength_column = table['wavelength']
-    if wavelength_column.unit is None:
-        raise RuntimeError('No wavelength column unit specified.')
-    wavelength = wavelength_column.data * wavelength_column.unit
-
-    if 'response' not in table.colnames:
-        raise RuntimeError('Table is missing required response column.')
-    response_column = table['response']
-    if response_column.unit is not None:
-        raise RuntimeError('Response column has unexpected units.')
-    response = response_column.data
-
-    return FilterResponse(wavelength, response, table.meta)
+    return _read_filter_file(file_name, register)
 
 
 def plot_filters(responses, wavelength_unit=None,
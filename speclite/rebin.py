@@ -0,0 +1,322 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""Rebin spectra between arbitrary bin-edge grids while conserving flux.
+"""
+from __future__ import print_function, division
+
+import numpy as np
+import numpy.ma as ma
+import scipy.sparse
+
+from .filters import WavelengthGrid
+
+
+def rebin(data_in, edges_in, edges_out, y, ivar=None, axis=-1, data_out=None):
+    """Rebin spectral data between arbitrary bin-edge grids.
+
+    Rebinning treats each dependent variable y1, y2, ... as the average of a
+    density (e.g., a flux density) over each bin, and calculates its average
+    over each output bin using the fractional overlap of the input and
+    output bins. Rebinning conserves integrals of the dependent variables
+    and is appropriate when the output grid is sparser than the input grid,
+    or the two grids are unrelated (e.g., linear and logarithmic), where
+    :func:`speclite.resample` or :func:`speclite.downsample` would not be.
+    The basic usage of this function is:
+
+    >>> data = np.ones((6,), [('flux', float), ('ivar', float)])
+    >>> edges_in = np.linspace(4000., 4600., 7)
+    >>> edges_out = np.array([4000., 4200., 4600.])
+    >>> out = rebin(data, edges_in, edges_out, 'flux', ivar='ivar')
+    >>> np.allclose(out['flux'], 1.)
+    True
+    >>> np.allclose(out['ivar'], [2., 4.])
+    True
+
+    A multi-dimensional array of spectra with the same binning can be
+    rebinned in a single operation by specifying the axis that corresponds to
+    the independent variable.
+
+    If the output bins extend beyond the input bins, a `masked array
+    <http://docs.scipy.org/doc/numpy/reference/maskedarray.html>`__ will be
+    returned with any values in output bins that are not fully covered by
+    input bins masked.  Any output values that depend on an input masked
+    value will also be masked.
+
+    The fractional overlaps are calculated once per call as a sparse matrix.
+    Use a :class:`Rebinner` to re-use them for many calls with the same
+    input and output grids.
+
+    Parameters
+    ----------
+    data_in : numpy.ndarray or numpy.ma.MaskedArray
+        Structured numpy array of input spectral data to rebin.
+    edges_in : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        Increasing array of ``data_in.shape[axis] + 1`` edges of the input
+        bins.  For a wavelength grid, the edges of bins centered on each
+        wavelength are used.
+    edges_out : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        Increasing array of edges of the output bins.
+    y : string or iterable of strings.
+        A field name or a list of field names present in the input data that
+        should be rebinned and included in the output.
+    ivar : string or None
+        The name of a field containing inverse variances of the ``y`` fields,
+        which will be propagated and included in the output. Input values
+        with zero inverse variance contribute zero inverse variance to any
+        output bin that overlaps them.
+    axis : int
+        Index of the axis of ``data_in`` that corresponds to the independent
+        variable. The default is to use the last axis of the input data array.
+    data_out : numpy.ndarray or None
+        Structured numpy array where the output result should be written. If
+        None is specified, then an appropriately sized array will be allocated
+        and returned.
+
+    Returns
+    -------
+    numpy.ndarray or numpy.ma.MaskedArray
+        Structured numpy array of the rebinned result containing all ``y``
+        fields and the ``ivar`` field, if one is specified. The output has
+        the same shape as ``data_in`` except along ``axis``, whose size is
+        the number of output bins.
+    """
+    return Rebinner(edges_in, edges_out)(
+        data_in, y, ivar=ivar, axis=axis, data_out=data_out)
+
+
+class Rebinner(object):
+    """Rebin spectral data between fixed input and output bin-edge grids.
+
+    The fractional overlap of each pair of input and output bins is stored
+    as a sparse matrix, which is applied to batches of spectra with a single
+    sparse matrix product:
+
+    >>> rebinner = Rebinner(np.linspace(0., 6., 7), np.linspace(0., 6., 3))
+    >>> rebinner.matrix.shape
+    (2, 6)
+    >>> np.allclose(rebinner.rebin_values(np.arange(6.)), [1., 4.])
+    True
+
+    Rebinners can be pickled, e.g., to send them to worker processes.
+
+    Parameters
+    ----------
+    edges_in : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        Increasing array of edges of the input bins.
+    edges_out : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        Increasing array of edges of the output bins.
+    """
+    def __init__(self, edges_in, edges_out):
+        edges_in = self._validate_edges(edges_in, 'edges_in')
+        edges_out = self._validate_edges(edges_out, 'edges_out')
+        self.num_in = len(edges_in) - 1
+        self.num_out = len(edges_out) - 1
+
+        # Break the overlapping range into segments that each lie within
+        # a single input bin and a single output bin.
+        lo = max(edges_in[0], edges_out[0])
+        hi = min(edges_in[-1], edges_out[-1])
+        breaks = np.union1d(edges_in, edges_out)
+        breaks = breaks[(breaks >= lo) & (breaks <= hi)]
+        segment_width = np.diff(breaks)
+        segment_center = 0.5 * (breaks[1:] + breaks[:-1])
+        i = np.searchsorted(edges_in, segment_center) - 1
+        j = np.searchsorted(edges_out, segment_center) - 1
+
+        width_out = np.diff(edges_out)
+        weights = segment_width / width_out[j]
+        self.matrix = scipy.sparse.csr_matrix(
+            (weights, (j, i)), shape=(self.num_out, self.num_in))
+        self.matrix_squared = scipy.sparse.csr_matrix(
+            (weights ** 2, (j, i)), shape=(self.num_out, self.num_in))
+        # Output bins must be fully covered by input bins.
+        coverage = np.bincount(
+            j, weights=weights, minlength=self.num_out)
+        self.uncovered = coverage < 1 - 1e-10
+        self.any_uncovered = bool(np.any(self.uncovered))
+
+    @staticmethod
+    def _validate_edges(edges, name):
+        if isinstance(edges, WavelengthGrid):
+            return edges.edges
+        if not isinstance(edges, np.ndarray) or len(edges.shape) != 1:
+            raise ValueError('Invalid {0}: expected a 1D array.'.format(name))
+        if len(edges) < 2:
+            raise ValueError('Invalid {0}: need at least 2 edges.'.format(name))
+        if ma.isMA(edges):
+            if np.any(edges.mask):
+                raise ValueError('Cannot rebin masked {0}.'.format(name))
+            edges = edges.data
+        edges = np.asarray(edges, float)
+        if not np.all(np.diff(edges) > 0):
+            raise ValueError(
+                'Invalid {0}: values must be increasing.'.format(name))
+        return edges
+
+    def _apply(self, matrix, values, axis, fill_value):
+        """Multiply an unstructured array by matrix along an axis.
+
+        Uncovered output bins are set to fill_value. No input validation
+        is performed.
+        """
+        # Move the rebinning axis to the front and flatten the other axes
+        # so that all spectra are rebinned with a single matrix product.
+        values = np.rollaxis(values, axis, 0)
+        shape_out = (self.num_out,) + values.shape[1:]
+        values = values.reshape(self.num_in, -1)
+        result = matrix.dot(values).reshape(shape_out)
+        if self.any_uncovered:
+            result[self.uncovered] = fill_value
+        return np.rollaxis(result, 0, axis + 1)
+
+    def rebin_values(self, values, axis=-1):
+        """Rebin an unstructured array of values.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Array of values with ``num_in`` values along ``axis``.
+        axis : int
+            Index of the axis that corresponds to the independent variable.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of rebinned values with ``num_out`` values along ``axis``.
+            Output bins that are not fully covered by input bins are NaN.
+        """
+        values = self._validate_values(values, axis)
+        return self._apply(
+            self.matrix, values, axis % len(values.shape), np.nan)
+
+    def rebin_ivar(self, ivar, axis=-1):
+        """Propagate an unstructured array of inverse variances.
+
+        Parameters
+        ----------
+        ivar : numpy.ndarray
+            Array of non-negative inverse variances with ``num_in`` values
+            along ``axis``.
+        axis : int
+            Index of the axis that corresponds to the independent variable.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of inverse variances of the values returned by
+            :meth:`rebin_values`.  Output bins that overlap an input value
+            with zero inverse variance, or that are not fully covered by
+            input bins, have zero inverse variance.
+        """
+        ivar = self._validate_values(ivar, axis)
+        if np.any(ivar < 0):
+            raise ValueError('Some input ivar values < 0.')
+        # Zero ivar gives an infinite variance, which propagates to every
+        # output bin with a non-zero weight for that input value.
+        with np.errstate(divide='ignore'):
+            var = np.divide(1., ivar)
+        var = self._apply(
+            self.matrix_squared, var, axis % len(ivar.shape), np.inf)
+        with np.errstate(divide='ignore'):
+            return np.divide(1., var)
+
+    def _validate_values(self, values, axis):
+        if not isinstance(values, np.ndarray):
+            raise ValueError('Invalid values type: {0}.'.format(type(values)))
+        try:
+            num_in = values.shape[axis]
+        except IndexError:
+            raise ValueError('Invalid axis = {0}.'.format(axis))
+        if num_in != self.num_in:
+            raise ValueError(
+                'Expected {0} values along axis {1} but got {2}.'
+                .format(self.num_in, axis, num_in))
+        return values
+
+    def __call__(self, data_in, y=None, ivar=None, axis=-1, data_out=None):
+        """Rebin a structured array of spectral data.
+
+        Parameters
+        ----------
+        data_in : numpy.ndarray or numpy.ma.MaskedArray
+            Structured numpy array of input spectral data to rebin.
+        y : string or iterable of strings or None
+            Field names to rebin. All fields except ``ivar`` are rebinned
+            when None.
+        ivar : string or None
+            Name of a field of inverse variances to propagate.
+        axis : int
+            Index of the axis of ``data_in`` that corresponds to the
+            independent variable.
+        data_out : numpy.ndarray or None
+            Structured numpy array where the output result should be written,
+            or None to allocate a new array.
+
+        Returns
+        -------
+        numpy.ndarray or numpy.ma.MaskedArray
+            Structured numpy array of the rebinned result. See :func:`rebin`
+            for details.
+        """
+        if not isinstance(data_in, np.ndarray):
+            raise ValueError('Invalid data_in type: {0}.'.format(type(data_in)))
+        if data_in.dtype.fields is None:
+            raise ValueError('Input data_in is not a structured array.')
+        self._validate_values(data_in, axis)
+        axis = axis % len(data_in.shape)
+
+        if ivar is not None and ivar not in data_in.dtype.names:
+            raise ValueError('No such ivar field: {0}.'.format(ivar))
+        if y is None:
+            y_names = [name for name in data_in.dtype.names if name != ivar]
+        elif isinstance(y, basestring):
+            y_names = [y,]
+        else:
+            try:
+                y_names = [name for name in y]
+            except TypeError:
+                raise ValueError('Invalid y type: {0}.'.format(type(y)))
+        for name in y_names:
+            if name not in data_in.dtype.names:
+                raise ValueError('No such y field: {0}.'.format(name))
+        out_names = y_names + ([ivar] if ivar is not None else [])
+
+        shape_out = list(data_in.shape)
+        shape_out[axis] = self.num_out
+        shape_out = tuple(shape_out)
+        dtype_out = [
+            (name, np.promote_types(data_in.dtype[name], float))
+            for name in out_names]
+        if data_out is None:
+            data_out = np.empty(shape_out, dtype_out)
+        else:
+            if data_out.shape != shape_out:
+                raise ValueError(
+                    'data_out has wrong shape: {0}. Expected: {1}.'
+                    .format(data_out.shape, shape_out))
+            if data_out.dtype != dtype_out:
+                raise ValueError(
+                    'data_out has wrong dtype: {0}. Expected: {1}.'
+                    .format(data_out.dtype, dtype_out))
+
+        masked = ma.isMA(data_in)
+        for name in y_names:
+            values = data_in[name].filled(np.nan) if masked else data_in[name]
+            data_out[name][...] = self._apply(
+                self.matrix, values, axis, np.nan)
+        if ivar is not None:
+            values = data_in[ivar].filled(0) if masked else data_in[ivar]
+            data_out[ivar][...] = self.rebin_ivar(values, axis)
+
+        if masked or self.any_uncovered:
+            data_out = ma.MaskedArray(data_out)
+            data_out.mask = False
+            for name in y_names:
+                data_out[name].mask = np.isnan(data_out[name].data)
+            if ivar is not None:
+                shape = [1] * len(shape_out)
+                shape[axis] = self.num_out
+                mask = np.zeros(shape_out, bool) | self.uncovered.reshape(shape)
+                for name in y_names:
+                    mask |= data_out[name].mask
+                data_out[ivar].mask = mask
+        return data_out
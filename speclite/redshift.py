@@ -6,8 +6,10 @@ from __future__ import print_function, division
 import numpy as np
 import numpy.ma as ma
 
+from .utils import validate_mask
 
-def redshift(z_in, z_out, data_in=None, data_out=None, rules=[]):
+
+def redshift(z_in, z_out, data_in=None, data_out=None, rules=[], mask=None):
     """Transform spectral data from redshift z_in to z_out.
 
     Each quantity X is transformed according to a power law::
@@ -68,7 +70,10 @@ def redshift(z_in, z_out, data_in=None, data_out=None, rules=[]):
 
     Input arrays can have associated `masks
     <http://docs.scipy.org/doc/numpy/reference/maskedarray.html>`__ and these
-    will be propagated to the output. Input arrays can also have `units
+    will be propagated to the output.  Alternatively, invalid input values
+    can be specified with a separate boolean ``mask``, which avoids any
+    masked array operations and is returned with the output broadcast to
+    its shape. Input arrays can also have `units
     <http://astropy.readthedocs.io/en/latest/units/index.html>`__ but these
     will not be used or propagated to the output since numpy structured arrays
     do not support per-column units.
@@ -97,14 +102,22 @@ def redshift(z_in, z_out, data_in=None, data_out=None, rules=[]):
         Otherwise, ``data_in[<name>]`` is assumed to contain the input values
         to transform.  If no ``rules`` are specified and ``data_in`` is
         provided, then ``data_out`` is just a copy of ``data_in``.
+    mask : numpy.ndarray or string or None
+        Boolean array with the same shape as the input data that is True for
+        invalid input values or, when ``data_in`` is specified, the name of a
+        field whose zero values identify invalid input values. Cannot be
+        used with masked inputs.
 
     Returns
     -------
-    numpy.ndarray
+    numpy.ndarray or tuple
         Array of spectrum data with the redshift transform applied. Equal to
         data_out when set, otherwise a new array is allocated. If ``data_in``
         is specified, then any fields not listed in ``rules`` are copied to
         ``data_out``, so effectively have an implicit exponent of zero.
+        When ``mask`` is specified, a tuple ``(data_out, mask_out)`` is
+        returned instead, where ``mask_out`` is a boolean array of invalid
+        output values with the same shape as ``data_out``.
     """
 
     if not isinstance(z_in, np.ndarray):
@@ -171,6 +184,15 @@ def redshift(z_in, z_out, data_in=None, data_out=None, rules=[]):
             # Save a view of the input data column associated with this rule.
             rules[i]['array_in'] = data_in[name]
 
+    if mask is not None:
+        if masked_in:
+            raise ValueError('Cannot specify a mask with masked input data.')
+        if data_in is not None:
+            mask = validate_mask(mask, data_in)
+        elif not isinstance(mask, np.ndarray) or mask.shape != shape_in:
+            raise ValueError('Invalid mask: expected an array with shape {0}.'
+                             .format(shape_in))
+
     shape_out = np.broadcast(np.empty(shape_in), z_factor).shape
     if data_out is None:
         if masked_in:
@@ -203,4 +225,7 @@ def redshift(z_in, z_out, data_in=None, data_out=None, rules=[]):
         if data_in is None and ma.isMA(array_in):
             data_out[name].mask[...] = array_in.mask
 
+    if mask is not None:
+        # Broadcast the input mask to the output shape.
+        return data_out, np.zeros(shape_out, bool) | mask
     return data_out
@@ -7,9 +7,13 @@ import numpy as np
 import numpy.ma as ma
 import scipy.interpolate
 
+from .filters import WavelengthGrid
+from .utils import validate_mask
 
-def resample(data_in, x_in, x_out, y, data_out=None, kind='linear'):
-    """Resample the data of one spectrum using interpolation.
+
+def resample(data_in, x_in, x_out, y, data_out=None, kind='linear', axis=-1,
+             mask=None):
+    """Resample spectral data using interpolation.
 
     Dependent variables y1, y2, ... in the input data are resampled in the
     independent variable x using interpolation models y1(x), y2(x), ...
@@ -71,18 +75,58 @@ def resample(data_in, x_in, x_out, y, data_out=None, kind='linear'):
     ... dtype=[('flux', 'bool')]))
     True
 
-    Interpolation is performed using :class:`scipy.interpolate.inter1pd`.
+    A multi-dimensional array of spectra that share the same input grid can
+    be resampled in a single operation by specifying the axis that
+    corresponds to the independent variable, for example:
+
+    >>> data = np.ones((3, 5), [('flux', float), ('ivar', float)])
+    >>> wlen_out = np.arange(4100, 4900, 200)
+    >>> out = resample(data, wlen_in, wlen_out, ('flux', 'ivar'), axis=1)
+    >>> out.shape
+    (3, 4)
+
+    Invalid input values can also be specified with a separate boolean
+    ``mask``, or with the name of a field (e.g., an inverse variance) whose
+    zero values identify invalid inputs. In this case, all calculations use
+    plain numpy arrays and a plain boolean mask of invalid output values is
+    returned with the result:
+
+    >>> data = np.ones((5,), [('flux', float), ('ivar', float)])
+    >>> data['ivar'][2] = 0
+    >>> out, mask = resample(data, wlen_in, wlen_out, 'flux', mask='ivar')
+    >>> np.array_equal(mask, [False, True, True, False])
+    True
+
+    Spectra with different input grids, e.g., from different exposures, can
+    also be resampled onto a common output grid in a single operation by
+    providing a two-dimensional ``x_in`` with the same shape as ``data_in``:
+
+    >>> data = np.ones((2, 5), [('flux', float), ('ivar', float)])
+    >>> wlen_in = np.array([np.arange(4000, 5000, 200),
+    ...                     np.arange(4050, 5050, 200)])
+    >>> out = resample(data, wlen_in, wlen_out, 'flux')
+    >>> out.shape
+    (2, 4)
+
+    For ``linear`` and ``nearest`` interpolation, the search for each output
+    value in the input grid is performed once and shared by all spectra and
+    fields.  Other kinds of interpolation are performed using
+    :class:`scipy.interpolate.inter1pd`.  Use a :class:`Resampler` to also
+    share this setup between calls with the same input and output grids.
 
     Parameters
     ----------
     data_in : numpy.ndarray or numpy.ma.MaskedArray
         Structured numpy array of input spectral data to resample. The input
-        array must be one-dimensional.
-    x_in : string or numpy.ndarray
+        array must be one-dimensional when ``x_in`` is a field name.
+    x_in : string or numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
         A field name in data_in containing the independent variable to use
-        for interpolation, or else an array of values with the same shape
-        as the input data.
-    x_out : numpy.ndarray
+        for interpolation, or else a one-dimensional array of values with the
+        same size as the input data along ``axis``.  A two-dimensional array
+        with the same shape as a two-dimensional ``data_in`` specifies a
+        different input grid for each spectrum, and requires ``linear`` or
+        ``nearest`` interpolation.
+    x_out : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
         An array of values for the independent variable where interpolation
         models should be evaluated to calculate the output values.
     y : string or iterable of strings.
@@ -98,31 +142,66 @@ def resample(data_in, x_in, x_out, y, data_out=None, kind='linear'):
         forms allowed by :class:`scipy.interpolate.inter1pd`.  If any input
         dependent values are masked, only the ``nearest` and ``linear``
         values are allowed.
+    axis : int
+        Index of the axis of ``data_in`` that corresponds to the independent
+        variable. The default is to use the last axis of the input data array.
+    mask : numpy.ndarray or string or None
+        Boolean array with the same shape as ``data_in`` that is True for
+        invalid input values, or the name of a field in ``data_in`` whose zero
+        values identify invalid input values. Cannot be used with a masked
+        ``data_in``. When specified, only ``nearest`` and ``linear``
+        interpolation are allowed if any inputs are invalid.
 
     Returns
     -------
-    numpy.ndarray or numpy.ma.MaskedArray
+    numpy.ndarray or numpy.ma.MaskedArray or tuple
         Structured numpy array of the resampled result containing all ``y``
         fields and (if ``x_in`` is specified as a string) the output ``x``
-        field.  The output will be a :class:`numpy.ma.MaskedArray` if ``x_out``
-        extends beyond ``x_in`` or if ``data_in`` is masked.
+        field.  The output has the same shape as ``data_in`` except along
+        ``axis``, whose size is ``len(x_out)``.  The output will be a
+        :class:`numpy.ma.MaskedArray` if ``x_out`` extends beyond ``x_in`` or
+        if ``data_in`` is masked.  When ``mask`` is specified, a tuple
+        ``(data_out, mask_out)`` is returned instead, where ``data_out`` is
+        never masked and ``mask_out`` is a boolean array with the same shape
+        that is True for output values that required extrapolation or depend
+        on an invalid input value. These output values are set to zero.
     """
     if not isinstance(data_in, np.ndarray):
         raise ValueError('Invalid data_in type: {0}.'.format(type(data_in)))
     if data_in.dtype.fields is None:
         raise ValueError('Input data_in is not a structured array.')
-    if len(data_in.shape) > 1:
-        raise ValueError('Input data_in is multidimensional.')
+    try:
+        num_in = data_in.shape[axis]
+    except IndexError:
+        raise ValueError('Invalid axis = {0}.'.format(axis))
+    axis = axis % len(data_in.shape)
+
+    # Use the already validated values of any wavelength grids.
+    if isinstance(x_in, WavelengthGrid):
+        x_in = x_in.wavelength
+    if isinstance(x_out, WavelengthGrid):
+        x_out = x_out.wavelength
 
     if isinstance(x_in, basestring):
         if x_in not in data_in.dtype.names:
             raise ValueError('No such x_in field: {0}.'.format(x_in))
+        if len(data_in.shape) > 1:
+            raise ValueError(
+                'Cannot use an x_in field with multidimensional data_in.')
         x_out_name = x_in
         x_in = data_in[x_in]
     else:
         if not isinstance(x_in, np.ndarray):
             raise ValueError('Invalid x_in type: {0}.'.format(type(x_in)))
-        if x_in.shape != data_in.shape:
+        if len(x_in.shape) == 2:
+            # Each spectrum has its own input grid.
+            if x_in.shape != data_in.shape:
+                raise ValueError('Incompatible shapes for x_in and data_in.')
+            if kind not in ('linear', 'nearest'):
+                raise ValueError(
+                    'Interpolation kind not supported for 2D x_in: {0}.'
+                    .format(kind))
+        elif x_in.shape != (num_in,):
             raise ValueError('Incompatible shapes for x_in and data_in.')
         x_out_name = None
 
@@ -157,34 +236,37 @@ def resample(data_in, x_in, x_out, y, data_out=None, kind='linear'):
             y_type = data_in[y].dtype
         dtype_out.append((y, y_type))
 
-    y_shape = (len(y_names),)
-    if ma.isMA(data_in):
-        # Copy the structured 1D array into a 2D unstructured array
-        # and set masked values to NaN.
-        y_in = np.zeros(data_in.shape + y_shape, y_type)
-        for i,y in enumerate(y_names):
-            y_in[:,i] = data_in[y].filled(np.nan)
+    mask = validate_mask(mask, data_in)
+    if mask is not None:
+        # Replace invalid input values with zero so that the arithmetic
+        # below never encounters NaN, and track the output mask separately.
+        if np.any(mask):
+            if kind not in ('nearest', 'linear'):
+                raise ValueError(
+                    'Interpolation kind not supported for masked data: {0}.'
+                    .format(kind))
+            y_in = [np.where(mask, 0, data_in[y]) for y in y_names]
+        else:
+            y_in = [data_in[y] for y in y_names]
+    elif ma.isMA(data_in):
+        # Masked input values are replaced with NaN, which the interpolation
+        # propagates to any output values that depend on them.
+        y_in = [data_in[y].filled(np.nan) for y in y_names]
     else:
-        y_in = data_in[y_names]
-        # View the structured 1D array as a 2D unstructured array (without
-        # copying any memory).
-        y_in = y_in.view(y_type).reshape(data_in.shape + y_shape)
+        y_in = [data_in[y] for y in y_names]
     # interp1d will only propagate NaNs correctly for certain values of `kind`.
     # With numpy = 1.6 or 1.7, only 'nearest' and 'linear' work.
     # With numpy = 1.8 or 1.9, 'slinear' and kind = 0 or 1 also work.
-    if np.any(np.isnan(y_in)):
+    if mask is None and y_type.kind in 'fc' and any(
+            np.any(np.isnan(values)) for values in y_in):
         if kind not in ('nearest', 'linear'):
             raise ValueError(
                 'Interpolation kind not supported for masked data: {0}.'
                 .format(kind))
-    try:
-        interpolator = scipy.interpolate.interp1d(
-            x_in, y_in, kind=kind, axis=0, copy=False,
-            bounds_error=False, fill_value=np.nan)
-    except NotImplementedError:
-        raise ValueError('Interpolation kind not supported: {0}.'.format(kind))
 
-    shape_out = (len(x_out),)
+    shape_out = list(data_in.shape)
+    shape_out[axis] = len(x_out)
+    shape_out = tuple(shape_out)
     if data_out is None:
         data_out = np.empty(shape_out, dtype_out)
     else:
@@ -197,16 +279,421 @@ def resample(data_in, x_in, x_out, y, data_out=None, kind='linear'):
                 'data_out has wrong dtype: {0}. Expected: {1}.'
                 .format(data_out.dtype, dtype_out))
 
+    fill_value = np.nan if mask is None else 0
+    if kind in ('linear', 'nearest'):
+        # Calculate the interpolation indices and weights once and apply
+        # them to all spectra and fields.
+        x_in = np.asarray(x_in, x_type)
+        if len(x_in.shape) == 2 and axis == 0:
+            # Resampler expects one spectrum per row.
+            x_in = x_in.T
+        resampler = Resampler(x_in, np.asarray(x_out, x_type), kind=kind)
+        for y, values in zip(y_names, y_in):
+            resampler._apply(values, axis, data_out[y], fill_value)
+        if mask is not None:
+            mask_out = resampler._apply_mask(mask, axis)
+            # Interpolation with an invalid input replaced by zero gives
+            # meaningless values, so replace these with zero too.
+            for y in y_names:
+                data_out[y][mask_out] = 0
+        elif y_type.kind not in 'fc':
+            # Non-float values cannot be NaN so track extrapolated values.
+            mask_out = resampler._apply_mask(
+                np.zeros(data_in.shape, bool), axis)
+    else:
+        # No inputs are invalid so only extrapolated outputs are masked.
+        index = [np.newaxis] * len(shape_out)
+        index[axis] = slice(None)
+        extrapolated = (x_out < np.min(x_in)) | (x_out > np.max(x_in))
+        mask_out = np.zeros(shape_out, bool) | extrapolated[tuple(index)]
+        if y_type.kind not in 'fc':
+            fill_value = 0
+        for y, values in zip(y_names, y_in):
+            try:
+                interpolator = scipy.interpolate.interp1d(
+                    x_in, values, kind=kind, axis=axis, copy=False,
+                    bounds_error=False, fill_value=fill_value)
+            except NotImplementedError:
+                raise ValueError(
+                    'Interpolation kind not supported: {0}.'.format(kind))
+            data_out[y][...] = interpolator(x_out)
+
     if x_out_name is not None:
         data_out[x_out_name][:] = x_out
-    y_out = interpolator(x_out)
-    for i,y in enumerate(y_names):
-        data_out[y][:] = y_out[:,i]
 
-    if ma.isMA(data_in) or np.any(np.isnan(y_out)):
+    if mask is not None:
+        return data_out, mask_out
+
+    if y_type.kind in 'fc':
+        output_nan = any(np.any(np.isnan(data_out[y])) for y in y_names)
+    else:
+        output_nan = np.any(mask_out)
+    if ma.isMA(data_in) or output_nan:
         data_out = ma.MaskedArray(data_out)
         data_out.mask = False
         for y in y_names:
-            data_out[y].mask = np.isnan(data_out[y].data)
+            if data_out[y].dtype.kind in 'fc':
+                data_out[y].mask = np.isnan(data_out[y].data)
+            else:
+                data_out[y].mask = mask_out
 
     return data_out
+
+
+class Resampler(object):
+    """Resample spectral data between fixed input and output grids.
+
+    A resampler performs the validation and grid search needed by
+    :func:`resample` once, so that it can be efficiently applied to many
+    spectra sampled on the same input grid:
+
+    >>> wlen_in = np.arange(4000, 5000, 200)
+    >>> resampler = Resampler(wlen_in, np.arange(4100, 4900, 200))
+    >>> data = np.ones((5,), [('flux', float), ('ivar', float)])
+    >>> out = resampler(data)
+    >>> out.dtype.names
+    ('flux', 'ivar')
+    >>> resampler(np.ones((3, 5))).shape
+    (3, 4)
+
+    The results are identical to those of :func:`resample` with the same
+    grids and ``kind``.  Resamplers only store numpy arrays, so they can be
+    pickled, e.g., to send them to worker processes.
+
+    Parameters
+    ----------
+    x_in : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        One-dimensional array of input values of the independent variable,
+        or a two-dimensional array with a different input grid in each row,
+        for resampling 2D arrays of spectra.  Values do not need to be sorted.
+    x_out : numpy.ndarray or :class:`speclite.filters.WavelengthGrid`
+        One-dimensional array of values for the independent variable where
+        interpolation models should be evaluated to calculate the output
+        values.
+    kind : string
+        Kind of interpolation to use, which must be ``linear`` or
+        ``nearest``.  Use :func:`resample` for other kinds.
+    """
+    def __init__(self, x_in, x_out, kind='linear'):
+        if isinstance(x_in, WavelengthGrid):
+            x_in = x_in.wavelength
+        if isinstance(x_out, WavelengthGrid):
+            x_out = x_out.wavelength
+        if not isinstance(x_in, np.ndarray) or len(x_in.shape) not in (1, 2):
+            raise ValueError('Invalid x_in: expected a 1D or 2D array.')
+        if not isinstance(x_out, np.ndarray) or len(x_out.shape) != 1:
+            raise ValueError('Invalid x_out: expected a 1D array.')
+        if ma.isMA(x_in):
+            if np.any(x_in.mask):
+                raise ValueError('Cannot resample masked x_in.')
+            x_in = x_in.data
+        if x_in.shape[-1] < 2:
+            raise ValueError('Input x_in must have at least 2 values.')
+        if kind not in ('linear', 'nearest'):
+            raise ValueError(
+                'Interpolation kind not supported: {0}.'.format(kind))
+
+        x_type = np.promote_types(x_in.dtype, x_out.dtype)
+        x_in = np.asarray(x_in, x_type)
+        self.x_out = np.array(x_out, x_type)
+        self.kind = kind
+        self.num_in = x_in.shape[-1]
+        if len(x_in.shape) == 2:
+            self.num_spectra = x_in.shape[0]
+            # Index arrays used to gather one bracket per spectrum.
+            self.rows = np.arange(self.num_spectra)[:, np.newaxis]
+            self._init_per_spectrum(x_in)
+            return
+        self.num_spectra = None
+        self.rows = None
+
+        # Use the same conventions as scipy.interpolate.interp1d.
+        order = None
+        if np.any(np.diff(x_in) < 0):
+            order = np.argsort(x_in, kind='mergesort')
+            x_in = x_in[order]
+        if kind == 'linear':
+            self.hi = np.clip(
+                np.searchsorted(x_in, self.x_out), 1, self.num_in - 1)
+            self.lo = self.hi - 1
+            x_lo = x_in[self.lo]
+            self.dx = x_in[self.hi] - x_lo
+            self.offset = self.x_out - x_lo
+        else:
+            x_bounds = 0.5 * (x_in[1:] + x_in[:-1])
+            self.lo = np.clip(
+                np.searchsorted(x_bounds, self.x_out, side='left'),
+                0, self.num_in - 1)
+        self.extrapolated = (self.x_out < x_in[0]) | (self.x_out > x_in[-1])
+        self.any_extrapolated = bool(np.any(self.extrapolated))
+        if order is not None:
+            self.lo = order[self.lo]
+            if kind == 'linear':
+                self.hi = order[self.hi]
+
+    def _init_per_spectrum(self, x_in):
+        """Calculate brackets for a different input grid in each row of x_in.
+
+        Uses the same conventions as the one-dimensional case, with all rows
+        processed together.
+        """
+        rows = self.rows
+        order = None
+        if np.any(np.diff(x_in, axis=-1) < 0):
+            order = np.argsort(x_in, axis=-1, kind='mergesort')
+            x_in = x_in[rows, order]
+        if self.kind == 'linear':
+            self.hi = np.clip(
+                _searchsorted_rows(x_in, self.x_out), 1, self.num_in - 1)
+            self.lo = self.hi - 1
+            x_lo = x_in[rows, self.lo]
+            self.dx = x_in[rows, self.hi] - x_lo
+            self.offset = self.x_out - x_lo
+        else:
+            x_bounds = 0.5 * (x_in[:, 1:] + x_in[:, :-1])
+            self.lo = np.clip(
+                _searchsorted_rows(x_bounds, self.x_out), 0, self.num_in - 1)
+        self.extrapolated = (
+            (self.x_out < x_in[:, :1]) | (self.x_out > x_in[:, -1:]))
+        self.any_extrapolated = bool(np.any(self.extrapolated))
+        if order is not None:
+            self.lo = order[rows, self.lo]
+            if self.kind == 'linear':
+                self.hi = order[rows, self.hi]
+
+    def _apply(self, values, axis, out=None, fill_value=np.nan):
+        """Resample an unstructured array along the specified axis.
+
+        Values outside of the input grid are set to fill_value, or to zero
+        for a non-float out array that cannot store NaN, and callers must
+        mask these.  No input validation is performed.
+        """
+        if self.rows is not None:
+            return self._apply_per_spectrum(values, axis, out, fill_value)
+        y_lo = np.take(values, self.lo, axis=axis)
+        if self.kind == 'linear':
+            # Reshape the arrays that broadcast along the interpolation axis.
+            shape = [1] * len(values.shape)
+            shape[axis] = len(self.x_out)
+            y_out = np.take(values, self.hi, axis=axis) - y_lo
+            y_out = y_out / self.dx.reshape(shape)
+            y_out *= self.offset.reshape(shape)
+            y_out += y_lo
+        else:
+            y_out = y_lo
+        if self.any_extrapolated:
+            if y_out.dtype.kind not in 'fc':
+                y_out = y_out.astype(float)
+            if out is not None and out.dtype.kind not in 'fc':
+                fill_value = 0
+            index = [slice(None)] * len(values.shape)
+            index[axis] = self.extrapolated
+            y_out[tuple(index)] = fill_value
+        if out is None:
+            return y_out
+        out[...] = y_out
+        return out
+
+    def _apply_per_spectrum(self, values, axis, out, fill_value):
+        """Resample a 2D array with a different input grid for each spectrum.
+        """
+        # Work with spectra along the first axis, using views.
+        if axis == 0:
+            values = values.T
+            if out is not None:
+                out = out.T
+        y_lo = values[self.rows, self.lo]
+        if self.kind == 'linear':
+            y_out = values[self.rows, self.hi] - y_lo
+            y_out = y_out / self.dx
+            y_out *= self.offset
+            y_out += y_lo
+        else:
+            y_out = y_lo
+        if self.any_extrapolated:
+            if y_out.dtype.kind not in 'fc':
+                y_out = y_out.astype(float)
+            if out is not None and out.dtype.kind not in 'fc':
+                fill_value = 0
+            y_out[self.extrapolated] = fill_value
+        if out is None:
+            out = y_out
+        else:
+            out[...] = y_out
+        return out.T if axis == 0 else out
+
+    def _apply_mask(self, mask, axis):
+        """Calculate the output mask for a boolean mask of invalid inputs.
+
+        Output values are invalid when they depend on any invalid input or
+        are outside of the input grid.
+        """
+        if self.rows is not None:
+            if axis == 0:
+                mask = mask.T
+            mask_out = mask[self.rows, self.lo]
+            if self.kind == 'linear':
+                mask_out |= mask[self.rows, self.hi]
+            mask_out |= self.extrapolated
+            return mask_out.T if axis == 0 else mask_out
+        mask_out = np.take(mask, self.lo, axis=axis)
+        if self.kind == 'linear':
+            mask_out |= np.take(mask, self.hi, axis=axis)
+        if self.any_extrapolated:
+            index = [slice(None)] * len(mask.shape)
+            index[axis] = self.extrapolated
+            mask_out[tuple(index)] = True
+        return mask_out
+
+    def __call__(self, data_in, y=None, axis=-1, data_out=None, mask=None):
+        """Resample spectral data.
+
+        Parameters
+        ----------
+        data_in : numpy.ndarray or numpy.ma.MaskedArray
+            Structured or unstructured array of input spectral data, with
+            ``len(x_in)`` values along ``axis``.
+        y : string or iterable of strings or None
+            Field names to resample when ``data_in`` is a structured array.
+            All fields are resampled when None. Ignored for unstructured
+            arrays.
+        axis : int
+            Index of the axis of ``data_in`` that corresponds to the
+            independent variable.
+        data_out : numpy.ndarray or None
+            Array where the output should be written, or None to allocate
+            a new array.
+        mask : numpy.ndarray or string or None
+            Boolean array that is True for invalid input values, or the name
+            of a field whose zero values identify invalid input values, as
+            for :func:`resample`.
+
+        Returns
+        -------
+        numpy.ndarray or numpy.ma.MaskedArray or tuple
+            Array of resampled values with the same shape as ``data_in``
+            except along ``axis``, whose size is ``len(x_out)``.  Structured
+            output is masked when ``data_in`` is masked or ``x_out`` extends
+            beyond ``x_in``, as for :func:`resample`.  Unstructured output is
+            masked only when ``data_in`` is masked, and otherwise uses NaN
+            for values that would require extrapolation, so cannot be written
+            to a non-float ``data_out``.  When ``mask`` is
+            specified, a tuple ``(data_out, mask_out)`` of plain arrays is
+            returned instead, with invalid output values set to zero.
+        """
+        if not isinstance(data_in, np.ndarray):
+            raise ValueError(
+                'Invalid data_in type: {0}.'.format(type(data_in)))
+        try:
+            num_in = data_in.shape[axis]
+        except IndexError:
+            raise ValueError('Invalid axis = {0}.'.format(axis))
+        if num_in != self.num_in:
+            raise ValueError('Incompatible shapes for x_in and data_in.')
+        axis = axis % len(data_in.shape)
+        if self.rows is not None and (
+                len(data_in.shape) != 2 or
+                data_in.shape[1 - axis] != self.num_spectra):
+            raise ValueError('Incompatible shapes for x_in and data_in.')
+        masked = ma.isMA(data_in)
+        mask = validate_mask(mask, data_in)
+        # Invalid input values are replaced with NaN for masked input, or
+        # with zero when a separate mask is provided.
+        if mask is not None and np.any(mask):
+            prepare = lambda values: np.where(mask, 0, values)
+        elif masked:
+            prepare = lambda values: values.filled(np.nan)
+        else:
+            prepare = lambda values: values
+        fill_value = np.nan if mask is None else 0
+
+        if data_in.dtype.fields is None:
+            if (mask is None and self.any_extrapolated and
+                    data_out is not None and data_out.dtype.kind not in 'fc'):
+                raise ValueError(
+                    'Cannot extrapolate into data_out with type {0}.'
+                    .format(data_out.dtype))
+            data_out = self._apply(
+                prepare(data_in), axis, data_out, fill_value)
+            if mask is not None:
+                mask_out = self._apply_mask(mask, axis)
+                data_out[mask_out] = 0
+                return data_out, mask_out
+            if masked:
+                data_out = ma.masked_invalid(data_out, copy=False)
+            return data_out
+
+        if y is None:
+            y_names = list(data_in.dtype.names)
+        elif isinstance(y, basestring):
+            y_names = [y,]
+        else:
+            y_names = list(y)
+        shape_out = list(data_in.shape)
+        shape_out[axis] = len(self.x_out)
+        shape_out = tuple(shape_out)
+        dtype_out = [(name, data_in.dtype[name]) for name in y_names]
+        if data_out is None:
+            data_out = np.empty(shape_out, dtype_out)
+        elif data_out.shape != shape_out:
+            raise ValueError(
+                'data_out has wrong shape: {0}. Expected: {1}.'
+                .format(data_out.shape, shape_out))
+        for name in y_names:
+            self._apply(
+                prepare(data_in[name]), axis, data_out[name], fill_value)
+
+        if mask is not None:
+            mask_out = self._apply_mask(mask, axis)
+            for name in y_names:
+                data_out[name][mask_out] = 0
+            return data_out, mask_out
+        if masked or self.any_extrapolated:
+            data_out = ma.MaskedArray(data_out)
+            data_out.mask = False
+            for name in y_names:
+                if data_out[name].dtype.kind in 'fc':
+                    data_out[name].mask = np.isnan(data_out[name].data)
+                else:
+                    # Non-float values cannot be NaN so mask extrapolated
+                    # values directly.
+                    data_out[name].mask = self._apply_mask(
+                        np.zeros(data_in.shape, bool), axis)
+        return data_out
+
+
+def _searchsorted_rows(x, values):
+    """Find insertion indices for values in each row of a sorted 2D array.
+
+    Equivalent to ``np.searchsorted(row, values, side='left')`` for each row
+    of x, but performed with a single vectorized sort of all rows.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        2D array whose rows are each sorted in increasing order.
+    values : numpy.ndarray
+        1D array of values to locate in every row.
+
+    Returns
+    -------
+    numpy.ndarray
+        Integer array with shape ``(len(x), len(values))``.
+    """
+    num_rows, num_x = x.shape
+    num_values = len(values)
+    merged = np.empty((num_rows, num_x + num_values), x.dtype)
+    merged[:, :num_x] = x
+    merged[:, num_x:] = values
+    # Sort each row by value, with values before equal x entries, so that
+    # the number of preceding x entries gives the left insertion index.
+    is_x = np.zeros(merged.shape, np.intp)
+    is_x[:, :num_x] = 1
+    order = np.lexsort((is_x, merged), axis=-1)
+    rows = np.arange(num_rows)[:, np.newaxis]
+    num_before = np.cumsum(is_x[rows, order], axis=-1)
+    is_value = order >= num_x
+    index = np.empty((num_rows, num_values), np.intp)
+    index[np.nonzero(is_value)[0], order[is_value] - num_x] = (
+        num_before[is_value])
+    return index
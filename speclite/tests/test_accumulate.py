@@ -247,3 +247,39 @@ def test_invalid_but_masked():
                         add='f', weight='w', join='i')
     valid = result['w'] != 0
     assert np.all(result['f'][valid] == 1), 'Incorrect addition result.'
+
+
+def test_separate_mask():
+    data1 = np.ones((4,), dtype=[('flux', float), ('ivar', float)])
+    data2 = np.ones((4,), dtype=[('flux', float), ('ivar', float)])
+    data2['flux'] = 3.
+    data2['flux'][1] = np.nan
+    mask2 = np.array([False, True, False, False])
+    result = accumulate(data1, data2, add='flux', weight='ivar', mask2=mask2)
+    assert not ma.isMA(result)
+    assert np.array_equal(result['flux'], [2., 1., 2., 2.])
+    assert np.array_equal(result['ivar'], [2., 1., 2., 2.])
+    # Input weights are not modified.
+    assert np.all(data2['ivar'] == 1)
+    result = accumulate(None, data2, add='flux', weight='ivar', mask2=mask2)
+    assert np.array_equal(result['ivar'], [1., 0., 1., 1.])
+    # Invalid values in the first input are not used either.
+    data1['flux'][1:3] = np.nan
+    mask1 = np.array([False, True, True, False])
+    result = accumulate(data1, data2, add='flux', weight='ivar',
+                        mask1=mask1, mask2=mask2)
+    assert np.array_equal(result['ivar'], [2., 0., 1., 2.])
+    assert np.array_equal(result['flux'][[0, 2, 3]], [2., 3., 2.])
+    # Invalid values can also be identified by zero input weights.
+    data1['ivar'][1:3] = 0
+    result = accumulate(data1, data2, add='flux', weight='ivar', mask1='ivar',
+                        mask2=mask2, data_out=data1)
+    assert result is data1
+    assert np.array_equal(result['ivar'], [2., 0., 1., 2.])
+    assert np.array_equal(result['flux'][[0, 2, 3]], [2., 3., 2.])
+    with pytest.raises(ValueError):
+        accumulate(data1, data2, add='flux', mask2=mask2)
+    with pytest.raises(ValueError):
+        accumulate(None, data2, add='flux', weight='ivar', mask1=mask2)
+    with pytest.raises(ValueError):
+        accumulate(data1, data2, add='flux', weight='ivar', mask1='foo')
@@ -158,3 +158,28 @@ def test_bad_data_out_dtype():
     with pytest.raises(ValueError):
         data_out = np.ones((10,), dtype=[('x', float),])
         downsample(data_in, 1, data_out=data_out)
+
+
+def test_separate_mask():
+    data = ma.ones((6,), dtype=[('flux', float), ('ivar', float)])
+    data['flux'] = np.arange(6.)
+    data.mask = False
+    data['flux'].mask[:3] = True
+    expected = downsample(data, 2, weight='ivar')
+    plain = data.data.copy()
+    plain['flux'][:3] = np.nan
+    mask = np.zeros(6, bool)
+    mask[:3] = True
+    result, mask_out = downsample(plain, 2, weight='ivar', mask=mask)
+    assert not ma.isMA(result)
+    assert np.array_equal(mask_out, [True, False, False])
+    assert np.array_equal(result['flux'], expected['flux'].filled(0))
+    assert np.array_equal(result['ivar'], expected['ivar'].filled(0))
+    # Input weights are not modified.
+    assert np.all(plain['ivar'] == 1)
+    plain['ivar'][:3] = 0
+    result2, mask_out2 = downsample(plain, 2, weight='ivar', mask='ivar')
+    assert np.array_equal(result2, result)
+    assert np.array_equal(mask_out2, mask_out)
+    with pytest.raises(ValueError):
+        downsample(data, 2, weight='ivar', mask=mask)
@@ -3,12 +3,23 @@ from __future__ import print_function, division
 
 from astropy.tests.helper import pytest
 from ..filters import *
+from ..filters import _trapz_weights, _simps_weights
+from ..filters import _get_filter_bundle, _read_filter_file
+from ..filters import _get_response_moments, _hc_constant
+
+import os.path
+import gc
+import glob
+import threading
 
 import numpy as np
 import math
 
+import scipy.integrate
+
 import astropy.table
 import astropy.units as u
+import astropy.utils.data
 
 import matplotlib
 matplotlib.use('Agg') # Must be before importing matplotlib.pyplot or pylab!
@@ -302,9 +313,11 @@ def test_convolution_ctor():
     FilterConvolution(rband, np.arange(4000, 8000, 5), photon_weighted=False)
     FilterConvolution(rband, np.arange(4000, 8000, 5),
                       photon_weighted=False, units=default_flux_unit)
+    conv = FilterConvolution(rband, [4000., 8000.], interpolate=False)
+    with pytest.raises(ValueError):
+        conv([1, 1])
     with pytest.raises(ValueError):
-        FilterConvolution(
-            rband, [4000., 8000.], interpolate=False)
+        conv([1, 1], method='simps')
     with pytest.raises(ValueError):
         FilterConvolution(rband, [5000., 6000.])
 
@@ -408,6 +421,31 @@ def test_sequence_pad():
     filters.get_ab_maggies(pflux, pwave)
 
 
+def test_sequence_pad_single_pass():
+    filters = load_filters('sdss2010-z', 'sdss2010-g', 'sdss2010-u')
+    wave = np.linspace(5000., 6000., 50)
+    flux = np.random.uniform(size=(3, 50, 2))
+    for method in FilterResponse._pad_methods:
+        pflux, pwave = filters.pad_spectrum(flux, wave, axis=1, method=method)
+        # Compare with padding for each filter in turn.
+        eflux, ewave = flux, wave
+        for name in 'sdss2010-u', 'sdss2010-g', 'sdss2010-z':
+            eflux, ewave = filters[filters.names.index(name)].pad_spectrum(
+                eflux, ewave, axis=1, method=method)
+        assert np.array_equal(pwave, ewave)
+        assert np.allclose(pflux, eflux)
+    out = np.empty_like(pflux)
+    result, _ = filters.pad_spectrum(
+        flux * default_flux_unit, wave, axis=1, method=method, out=out)
+    assert result.unit == default_flux_unit
+    assert np.shares_memory(result.value, out)
+    assert np.allclose(out, eflux)
+    with pytest.raises(ValueError):
+        filters.pad_spectrum(flux, wave, axis=1, out=out[:-1])
+    with pytest.raises(ValueError):
+        filters.pad_spectrum(flux, wave, method='none')
+
+
 def test_load_none():
     filters = load_filters()
     assert len(filters) == 0
@@ -558,3 +596,693 @@ def test_explanatory_plot(tmpdir):
 def test_benchmark():
     from speclite.benchmark import main
     main('-n 10 --all'.split())
+
+
+def test_quadrature_weights():
+    for n in (2, 3, 4, 5, 10, 11):
+        x = np.cumsum(np.random.uniform(0.5, 1.5, size=n))
+        y = np.random.uniform(size=n)
+        assert np.allclose(
+            np.dot(_trapz_weights(x), y), scipy.integrate.trapz(y, x))
+        assert np.allclose(
+            np.dot(_simps_weights(x), y), scipy.integrate.simps(y, x))
+
+
+def test_convolution_weights():
+    rband = load_filter('sdss2010-r')
+    wlen = np.linspace(5000., 7500., 60)
+    conv = FilterConvolution(rband, wlen, interpolate=True)
+    assert conv.interpolate_wavelength is not None
+    # Weights are only calculated for the methods that are used.
+    assert conv.integral_weights == {}
+    values = np.random.uniform(size=(3, 60))
+    for method in ('trapz', 'simps'):
+        result = conv(values, method=method)
+        assert result.shape == (3,)
+        for i in range(3):
+            assert np.allclose(result[i], conv(values[i], method=method))
+        assert np.allclose(conv(values.T, axis=0, method=method), result)
+        assert method in conv.integral_weights
+    assert 'exact' not in conv.integral_weights
+    # The input grid should not be modified.
+    wlen = np.arange(4000., 8000., 7.)
+    saved = wlen.copy()
+    FilterConvolution(rband, wlen)
+    assert np.array_equal(wlen, saved)
+
+
+def test_convolution_exact():
+    rband = load_filter('sdss2010-r')
+    # The exact integral of a linear function does not depend on sampling.
+    f = lambda wlen: 2. + 1e-3 * wlen
+    results = []
+    for wlen in (np.linspace(5000., 7500., 20), np.arange(5000., 7500., 0.5)):
+        conv = FilterConvolution(rband, wlen, interpolate=True)
+        results.append(conv(f(wlen), method='exact'))
+    assert np.allclose(results[0], results[1], rtol=1e-12, atol=0)
+    # Compare with a brute-force integral using very fine sampling.
+    fine = np.linspace(5000., 7500., 200001)
+    integrand = f(fine) * rband(fine) * fine / _hc_constant.value
+    assert np.allclose(
+        results[0], scipy.integrate.trapz(integrand, fine), rtol=1e-6)
+    conv = FilterConvolution(rband, fine[::1000], interpolate=True,
+                             photon_weighted=False)
+    assert np.allclose(
+        conv(np.ones(201), method='exact'),
+        scipy.integrate.trapz(rband(fine), fine), rtol=1e-6)
+    with pytest.raises(ValueError):
+        conv(np.ones(201), method='none')
+    # The exact method does not need interpolation on an undersampled grid.
+    wlen = np.linspace(5000., 8000., 20)
+    conv = FilterConvolution(rband, wlen)
+    exact = conv(f(wlen), method='exact')
+    assert np.allclose(exact, FilterConvolution(
+        rband, wlen, interpolate=True)(f(wlen), method='exact'))
+    with pytest.raises(ValueError):
+        conv(f(wlen))
+    plan = PhotometryPlan(load_filters('sdss2010-r'), wlen,
+                          interpolate=False, method='exact')
+    assert np.allclose(
+        plan.get_ab_maggies(f(wlen)), exact / rband.ab_zeropoint.value)
+    with pytest.raises(ValueError):
+        PhotometryPlan(load_filters('sdss2010-r'), wlen, interpolate=False)
+
+
+def test_photometry_plan():
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(2, 3, 500))
+    plan = PhotometryPlan(sdss, wlen)
+    assert plan.names == sdss.names
+    assert plan.matrix.shape == (5, 500)
+    maggies = plan.get_ab_maggies(flux)
+    assert maggies.shape == (2, 3, 5)
+    for i, r in enumerate(sdss):
+        assert np.allclose(maggies[..., i], r.get_ab_maggies(flux, wlen))
+    mags = plan.get_ab_magnitudes(flux * default_flux_unit)
+    assert np.allclose(mags, -2.5 * np.log10(maggies))
+    assert np.allclose(
+        plan.get_ab_maggies(np.swapaxes(flux, 1, 2), axis=1), maggies)
+    with pytest.raises(ValueError):
+        plan.get_ab_maggies(flux[..., :-1])
+    with pytest.raises(ValueError):
+        plan.get_ab_maggies(flux * u.erg)
+    with pytest.raises(ValueError):
+        PhotometryPlan(sdss, wlen, method='none')
+
+
+def test_photometry_units():
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(2, 500))
+    expected = sdss.get_ab_maggies(flux, wlen, output='ndarray')
+    flux_unit = u.W / u.m ** 2 / u.nm
+    scale = default_flux_unit.to(flux_unit)
+    maggies = sdss.get_ab_maggies(
+        flux * scale * flux_unit, (wlen * u.Angstrom).to(u.nm),
+        output='ndarray')
+    assert np.allclose(maggies, expected, rtol=1e-12, atol=0)
+    conv = FilterConvolution('sdss2010-r', wlen, units=default_flux_unit)
+    result = conv(flux * scale * flux_unit)
+    assert result.unit == conv.output_units
+    assert np.allclose(result.value, conv(flux * default_flux_unit).value)
+    with pytest.raises(ValueError):
+        FilterConvolution('sdss2010-r', wlen)(flux * default_flux_unit)
+    with pytest.raises(ValueError):
+        conv(flux * u.erg)
+
+
+def test_photometry_plan_invalid():
+    wlen = np.arange(5000., 10000.)
+    with pytest.raises(ValueError):
+        PhotometryPlan(['sdss2010-u', 'sdss2010-r'], wlen)
+    plan = PhotometryPlan(
+        ['sdss2010-u', 'sdss2010-r'], wlen, mask_invalid=True)
+    assert np.array_equal(plan.valid, [False, True])
+    maggies = plan.get_ab_maggies(np.ones_like(wlen))
+    assert np.isnan(maggies[0]) and np.isfinite(maggies[1])
+
+
+def test_photometry_plan_non_finite():
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(3, 500))
+    expected = sdss.get_ab_maggies(flux, wlen, output='ndarray')
+    # Non-finite values outside of a band only affect the other bands.
+    flux[0, [0, 60]] = np.nan
+    flux[1, [-1, 350]] = np.inf
+    rband = sdss[2]
+    outside = ((wlen < rband.wavelength[0] - 50.) |
+               (wlen > rband.wavelength[-1] + 50.))
+    flux[2, outside] = np.nan
+    maggies = sdss.get_ab_maggies(flux[2], wlen, output='ndarray')
+    assert np.allclose(maggies[2], expected[2, 2])
+    maggies = sdss.get_ab_maggies(flux, wlen, output='ndarray')
+    assert np.allclose(maggies[0, 1:], expected[0, 1:])
+    assert np.isnan(maggies[0, 0])
+    assert np.allclose(maggies[1, :-1], expected[1, :-1])
+    assert np.isinf(maggies[1, -1])
+    assert np.isnan(maggies[2, [0, 1, 3, 4]]).all()
+    assert np.allclose(
+        maggies[2, 2], rband.get_ab_maggies(flux[2], wlen))
+
+
+def test_photometry_plan_ivar():
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(3, 500))
+    ivar = np.random.uniform(1., 2., size=(3, 500))
+    ivar[1, 250] = 0.
+    maggies, maggies_ivar, cov = sdss.get_ab_maggies_ivar(
+        flux, ivar, wlen, covariance=True)
+    assert np.allclose(
+        maggies, sdss.get_ab_maggies(flux, wlen, output='ndarray'))
+    # Calculate the weight of each pixel from the maggies of unit spectra.
+    weights = sdss.get_ab_maggies(np.identity(500), wlen, output='ndarray')
+    expected = np.einsum('jb,jc,ij->ibc', weights, weights, 1 / ivar[[0, 2]])
+    assert np.allclose(cov[[0, 2]], expected)
+    assert np.allclose(maggies_ivar[[0, 2]],
+                       1 / np.diagonal(expected, axis1=1, axis2=2))
+    # The missing pixel only affects bands where it has non-zero weight.
+    missing = weights[250] != 0
+    assert np.all(maggies_ivar[1, missing] == 0)
+    assert np.all(maggies_ivar[1, ~missing] > 0)
+    assert np.all(np.isinf(cov[1, missing][:, missing]))
+    m, m_ivar = sdss[2].get_ab_maggies_ivar(
+        flux[0] * default_flux_unit, ivar[0] * default_flux_unit ** -2, wlen)
+    assert np.allclose([m, m_ivar], [maggies[0, 2], maggies_ivar[0, 2]])
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies_ivar(flux, ivar[:, 1:], wlen)
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies_ivar(flux, ivar * u.erg, wlen)
+
+
+def test_sequence_ragged():
+    sdss = load_filters('sdss2010-g', 'sdss2010-r', 'sdss2010-z')
+    grids = [np.linspace(3500., 11500., 500), np.arange(3000., 12000., 3.),
+             np.linspace(3500., 11500., 25), np.linspace(4000., 8000., 300)]
+    fluxes = [np.random.uniform(1., 2., size=len(grid)) for grid in grids]
+    offsets = np.cumsum([0] + [len(grid) for grid in grids])
+    maggies = sdss.get_ab_maggies_ragged(
+        np.hstack(fluxes) * default_flux_unit, np.hstack(grids), offsets,
+        mask_invalid=True)
+    assert maggies.shape == (4, 3)
+    for i in range(3):
+        expected = sdss.get_ab_maggies(
+            fluxes[i], grids[i], output='ndarray')
+        assert np.allclose(maggies[i], expected, rtol=1e-10, atol=0)
+    assert np.isfinite(maggies[3, 1])
+    assert np.isnan(maggies[3, [0, 2]]).all()
+    # Non-finite fluxes outside of a band do not affect it, and undersampled
+    # spectra do not use the convolution cache.
+    fluxes[0][0] = np.nan
+    fluxes[1][400] = np.nan
+    fluxes[2][-1] = np.inf
+    clear_convolution_cache()
+    maggies = sdss.get_ab_maggies_ragged(
+        np.hstack(fluxes), np.hstack(grids), offsets, mask_invalid=True)
+    assert convolution_cache_info().misses == 0
+    for i in range(3):
+        expected = [r.get_ab_maggies(fluxes[i], grids[i]) for r in sdss]
+        assert np.allclose(maggies[i], expected, rtol=1e-10, atol=0,
+                           equal_nan=True)
+    assert np.isfinite(maggies[[0, 2]]).all()
+    assert np.isnan(maggies[1, 0]) and np.isfinite(maggies[1, 1:]).all()
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies_ragged(
+            np.hstack(fluxes), np.hstack(grids), offsets)
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies_ragged(
+            np.hstack(fluxes), np.hstack(grids), offsets[:-1])
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies_ragged(
+            np.hstack(fluxes), np.hstack([g[::-1] for g in grids]), offsets)
+
+
+def test_photometry_plan_parallel():
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(7, 500, 3)).astype(np.float32)
+    plan = PhotometryPlan(sdss, wlen)
+    expected = plan.get_ab_maggies(flux, axis=1)
+    maggies = plan.get_ab_maggies(flux, axis=1, n_workers=2)
+    assert maggies.shape == (7, 3, 5)
+    assert np.allclose(maggies, expected)
+    # The pool is re-used by later calls, which can need several chunks.
+    pool = plan._pool
+    plan._parallel_chunk_nbytes = 8 * 500
+    assert np.allclose(plan.get_ab_maggies(flux, axis=1, n_workers=2),
+                       expected)
+    assert plan._pool is pool
+    assert np.allclose(plan.get_ab_maggies(flux[0, :, 0], n_workers=2),
+                       expected[0, 0])
+    plan.close()
+    assert plan._pool is None
+    with PhotometryPlan(sdss, wlen) as plan:
+        plan._parallel_chunk_nbytes = 8 * 500
+        assert np.allclose(plan.get_ab_maggies(flux, axis=1, n_workers=2),
+                           expected)
+        assert len(plan._pool[1]) == 8
+    assert plan._pool is None
+    # A plan that is never closed stops its workers when it is collected.
+    plan = PhotometryPlan(sdss, wlen)
+    plan.get_ab_maggies(flux, axis=1, n_workers=2)
+    pool = plan._pool[0]
+    workers = list(pool._pool)
+    del plan
+    gc.collect()
+    for worker in workers:
+        worker.join(10)
+        assert not worker.is_alive()
+    # A sequence keeps its plan and workers for the same wavelength grid.
+    with sdss:
+        mags = sdss.get_ab_magnitudes(
+            flux, wlen, axis=1, output='ndarray', n_workers=2)
+        assert np.allclose(mags, -2.5 * np.log10(expected))
+        plan = sdss._parallel_plan[2]
+        pool = plan._pool
+        assert np.allclose(sdss.get_ab_maggies(
+            flux, wlen.copy(), axis=1, output='ndarray', n_workers=2),
+            expected)
+        assert sdss._parallel_plan[2] is plan and plan._pool is pool
+        sdss.get_ab_maggies(flux[:, :400], wlen[:400], axis=1,
+                            mask_invalid=True, n_workers=2)
+        assert sdss._parallel_plan[2] is not plan and plan._pool is None
+    assert sdss._parallel_plan is None
+
+
+def test_photometry_plan_stream(tmpdir):
+    sdss = load_filters('sdss2010-*')
+    wlen = np.linspace(2000., 12000., 500)
+    flux = np.random.uniform(1., 2., size=(10, 500)).astype(np.float32)
+    plan = PhotometryPlan(sdss, wlen)
+    expected = plan.get_ab_maggies(flux.astype(float))
+    spectra_name = str(tmpdir.join('spectra.npy'))
+    np.save(spectra_name, flux)
+    spectra = np.load(spectra_name, mmap_mode='r')
+    # Interrupt a streaming run after the first chunk.
+    out_name = str(tmpdir.join('maggies.npy'))
+    completed = []
+    def interrupt(num_completed):
+        completed.append(num_completed)
+        raise RuntimeError('interrupted')
+    with pytest.raises(RuntimeError):
+        plan.stream_ab_maggies(spectra, out_name, chunk_size=4,
+                               callback=interrupt)
+    assert completed == [4]
+    # Resume the run using the existing output file.
+    maggies = plan.stream_ab_maggies(
+        spectra, out_name, chunk_size=4, start=completed[-1],
+        callback=completed.append)
+    assert completed == [4, 8, 10]
+    assert np.allclose(maggies, expected)
+    assert np.allclose(np.load(out_name), expected)
+    # Stream an iterable of blocks into an array.
+    out = np.zeros((10, 5))
+    plan.stream_ab_maggies(
+        (flux[i:i + 3] for i in range(0, 10, 3)), out, chunk_size=2)
+    assert np.allclose(out, expected)
+    with pytest.raises(ValueError):
+        plan.stream_ab_maggies(iter([flux]), str(tmpdir.join('new.npy')))
+    with pytest.raises(ValueError):
+        plan.stream_ab_maggies(flux, out, chunk_size=0)
+
+
+def test_wavelength_grid():
+    linear = WavelengthGrid(np.linspace(3000., 11000., 8001) * u.Angstrom)
+    log = WavelengthGrid(np.logspace(3.5, 4.05, 5000))
+    other = WavelengthGrid(np.hstack([np.arange(3000., 4000., 2.),
+                                      np.arange(4000., 11001., 1.)]))
+    assert (linear.spacing, log.spacing, other.spacing) == (
+        'linear', 'log', None)
+    for grid in linear, log, other:
+        assert validate_wavelength_array(grid) is grid.wavelength
+        assert not grid.wavelength.flags.writeable
+        values = np.hstack([grid.wavelength[::7], [0., 1e5],
+                            np.random.uniform(2000., 12000., 100)])
+        for side in 'left', 'right':
+            assert np.array_equal(
+                grid.searchsorted(values, side),
+                np.searchsorted(grid.wavelength, values, side))
+        assert grid.searchsorted(5000.5) == np.searchsorted(
+            grid.wavelength, 5000.5)
+        assert len(grid.edges) == len(grid) + 1
+        assert np.all((grid.edges[:-1] < grid.wavelength) &
+                      (grid.wavelength < grid.edges[1:]))
+    assert np.allclose(linear.edges[:2], [2999.5, 3000.5])
+    # Convolutions with a grid match those with the equivalent array.
+    flux = np.random.uniform(size=(2, 8001))
+    for name in 'sdss2010-r', 'bessell-V':
+        response = load_filter(name)
+        conv = FilterConvolution(response, linear)
+        expected = FilterConvolution(response, linear.wavelength)
+        assert conv._response_slice == expected._response_slice
+        assert np.array_equal(conv(flux), expected(flux))
+    # The grid does not cover the sdss2010-u response.
+    sdss = load_filters('sdss2010-g', 'sdss2010-r', 'sdss2010-i')
+    assert np.array_equal(
+        sdss.get_ab_maggies(flux, linear, output='ndarray'),
+        sdss.get_ab_maggies(flux, linear.wavelength, output='ndarray'))
+    with pytest.raises(ValueError):
+        validate_wavelength_array(WavelengthGrid([1.]), min_length=2)
+    with pytest.raises(ValueError):
+        WavelengthGrid([2., 1.])
+
+
+def test_convolution_cache():
+    clear_convolution_cache()
+    rband = load_filter('sdss2010-r')
+    wlen = np.arange(5000., 7500., 2.)
+    flux = np.ones_like(wlen)
+    m1 = rband.get_ab_maggies(flux, wlen)
+    m2 = rband.get_ab_maggies(flux, wlen.copy())
+    assert m1 == m2
+    info = convolution_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    # A different grid, filter or option is a miss.
+    rband.get_ab_maggies(flux[1:], wlen[1:])
+    rband.create_shifted(0.1).get_ab_maggies(flux, wlen - 400.)
+    rband.convolve_with_array(wlen, flux, photon_weighted=False)
+    info = convolution_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 4, 4)
+    # Filters with the same name are not confused.
+    meta = dict(group_name='g', band_name='b')
+    r1 = FilterResponse([1, 2, 3], [0, 1, 0], meta)
+    r2 = FilterResponse([1, 2, 3], [0, 2, 0], meta)
+    c1 = r1.convolve_with_array([1, 3], [1, 1], interpolate=True)
+    c2 = r2.convolve_with_array([1, 3], [1, 1], interpolate=True)
+    assert np.allclose(c2, 2 * c1)
+    # Check that the cache is bounded.
+    clear_convolution_cache(maxsize=2)
+    for i in range(3):
+        rband.get_ab_maggies(flux, wlen + i)
+    info = convolution_cache_info()
+    assert info.maxsize == 2 and info.currsize == 2
+    clear_convolution_cache(maxsize=128)
+    assert convolution_cache_info() == (0, 0, 128, 0, 0)
+
+
+def test_response_lazy_attributes():
+    rband = load_filter('sdss2010-r').create_shifted(0.1)
+    assert rband._interpolator is None
+    assert rband._effective_wavelength is None
+    assert rband._ab_zeropoint is None
+    wlen = rband.effective_wavelength
+    assert wlen.unit == default_wavelength_unit
+    assert rband.effective_wavelength is wlen
+    assert rband._ab_zeropoint is None
+    zp = rband.ab_zeropoint
+    assert rband.ab_zeropoint is zp
+    assert rband(wlen) > 0
+    assert rband.interpolator is rband._interpolator
+
+
+def test_filter_bundle():
+    # The bundle must be rebuilt with _build_filter_bundle() whenever any
+    # standard filter file changes.
+    bundle = _get_filter_bundle()
+    assert bundle is not None
+    filters_path = astropy.utils.data._find_pkg_data_path(
+        'data/filters/', package='speclite')
+    file_names = sorted(glob.glob(os.path.join(filters_path, '*.ecsv')))
+    assert len(file_names) == len(bundle['names'])
+    for file_name in file_names:
+        name, _ = os.path.splitext(os.path.basename(file_name))
+        expected = _read_filter_file(file_name)
+        bundled = load_filter(name, load_from_cache=False)
+        assert bundled.name == expected.name
+        assert bundled.meta == expected.meta
+        assert np.array_equal(bundled.wavelength, expected.wavelength)
+        assert np.array_equal(bundled.response, expected.response)
+        assert np.allclose(
+            bundled.effective_wavelength.value,
+            expected.effective_wavelength.value, rtol=1e-12, atol=0)
+        assert np.allclose(
+            bundled.ab_zeropoint.value, expected.ab_zeropoint.value,
+            rtol=1e-12, atol=0)
+        assert bundled.ab_zeropoint.unit == expected.ab_zeropoint.unit
+    # Changing one loaded response does not affect a later load.
+    rband = load_filter('sdss2010-r', load_from_cache=False, register=False)
+    saved = rband.response.copy()
+    rband.response[5] = 123.
+    rband.meta['band_name'] = 'x'
+    reloaded = load_filter('sdss2010-r', load_from_cache=False, register=False)
+    assert np.array_equal(reloaded.response, saved)
+    assert reloaded.meta['band_name'] == 'r'
+    assert not bundle['response'].flags.writeable
+
+
+def test_register_filter_group(tmpdir):
+    directory_name = str(tmpdir)
+    for band_name, wlen in (('r', [5000, 6000, 7000]),
+                            ('g', [4000, 5000, 6000])):
+        meta = dict(group_name='fangs', band_name=band_name)
+        FilterResponse(wlen, [0, 1, 0], meta).save(directory_name)
+    with pytest.raises(ValueError):
+        load_filters('fangs-*')
+    names = register_filter_group('fangs', directory_name)
+    assert names == ['fangs-g', 'fangs-r']
+    assert load_filters('fangs-*', 'sdss2010-r').names == [
+        'fangs-g', 'fangs-r', 'sdss2010-r']
+    assert load_filter('fangs-r', load_from_cache=False).name == 'fangs-r'
+    with pytest.raises(ValueError):
+        load_filter('fangs-i', load_from_cache=False)
+    with pytest.raises(ValueError):
+        register_filter_group('sdss2010', directory_name)
+    with pytest.raises(ValueError):
+        register_filter_group('fangs-', directory_name)
+    with pytest.raises(ValueError):
+        register_filter_group('nosuch', directory_name)
+    with pytest.raises(ValueError):
+        register_filter_group('fangs', os.path.join(directory_name, 'nosuch'))
+
+
+def test_band_shift_plan():
+    rband = load_filter('sdss2010-r')
+    wlen = np.arange(3000., 8000., 5.)
+    flux = np.ones((3, len(wlen))) * 1e-17 * default_flux_unit
+    band_shifts = [0., 0.1, 0.25]
+    plan = BandShiftPlan('sdss2010-r', band_shifts, wlen)
+    maggies = plan.get_ab_maggies(flux)
+    assert maggies.shape == (3, 3)
+    for i, z in enumerate(band_shifts):
+        shifted = rband.create_shifted(z)
+        assert plan.names[i] == shifted.name
+        assert np.allclose(
+            plan.ab_zeropoints[i], shifted.ab_zeropoint.value, rtol=1e-12)
+        assert np.allclose(
+            maggies[:, i], shifted.get_ab_maggies(flux, wlen), rtol=1e-12)
+    # A shift whose response is not covered can be masked.
+    plan = BandShiftPlan(rband, [0., 1.], wlen, mask_invalid=True)
+    assert np.array_equal(plan.valid, [True, False])
+    assert np.isnan(plan.get_ab_magnitudes(flux)[:, 1]).all()
+    with pytest.raises(ValueError):
+        BandShiftPlan(rband, [0., 1.], wlen)
+    with pytest.raises(ValueError):
+        BandShiftPlan(rband, [-1.], wlen)
+    with pytest.raises(ValueError):
+        BandShiftPlan(rband, [[0.]], wlen)
+    with pytest.raises(RuntimeError):
+        BandShiftPlan(rband.create_shifted(0.1), [0.], wlen)
+
+
+def test_redshift_plan():
+    sdss = load_filters('sdss2010-g', 'sdss2010-r', 'sdss2010-z')
+    wlen = np.linspace(1000., 12000., 2000)
+    templates = np.random.uniform(1., 2., size=(2, 2000))
+    redshifts = np.array([-0.1, 0.3, 1.5])
+    plan = RedshiftPlan(sdss, redshifts, wlen, mask_invalid=True)
+    maggies = plan.get_ab_maggies(templates * default_flux_unit)
+    assert maggies.shape == (2, 3, 3)
+    for j, z in enumerate(redshifts):
+        # Transform the templates to the observed frame.
+        expected = sdss.get_ab_maggies(
+            templates / (1 + z), wlen * (1 + z), output='ndarray',
+            mask_invalid=True)
+        assert np.allclose(maggies[:, j], expected, rtol=1e-8, atol=0,
+                           equal_nan=True)
+    assert np.isnan(maggies[:, 0, 2]).all()
+    assert np.isfinite(maggies[:, 1:]).all()
+    chunked = RedshiftPlan(sdss, redshifts, wlen, mask_invalid=True,
+                           chunk_size=2)
+    assert len(chunked._plans) == 0
+    assert np.allclose(chunked.get_ab_maggies(templates.T, axis=0), maggies,
+                       equal_nan=True)
+    # The plans for each chunk are kept for later calls.
+    plans = dict(chunked._plans)
+    assert len(plans) == 6
+    assert np.allclose(chunked.get_ab_maggies(templates), maggies,
+                       equal_nan=True)
+    assert all(chunked._plans[key] is plans[key] for key in plans)
+    with pytest.raises(ValueError):
+        RedshiftPlan(sdss, [-1.], wlen)
+    with pytest.raises(ValueError):
+        RedshiftPlan(sdss, redshifts, wlen, chunk_size=0)
+    with pytest.raises(ValueError):
+        RedshiftPlan(sdss, redshifts, wlen)
+
+
+def test_response_moments():
+    # Compare with a brute force integral of the linear interpolation.
+    wlen = np.array([1., 2., 3., 3.5, 9.])
+    resp = np.array([0., 1., 0.5, 2., 0.])
+    fine = np.unique(np.hstack(
+        [np.linspace(wlen[i], wlen[i + 1], 2001) for i in range(4)]))
+    fine_resp = np.interp(fine, wlen, resp)
+    moments = _get_response_moments(wlen, resp)
+    assert moments.shape == (1, 5)
+    for i, power in enumerate(range(-1, 4)):
+        expected = scipy.integrate.simps(fine_resp * fine ** power, fine)
+        assert np.allclose(moments[0, i], expected, rtol=1e-10, atol=0)
+    # Concatenated responses are processed independently.
+    both = _get_response_moments(
+        np.hstack([wlen, wlen + 1000.]), np.hstack([resp, resp]), [0, 5, 10])
+    assert np.array_equal(both[0], moments[0])
+    assert np.allclose(both[1], _get_response_moments(wlen + 1000., resp)[0],
+                       rtol=1e-14, atol=0)
+
+
+def test_response_pivot_bandwidth():
+    # A top-hat response has known pivot wavelength and bandwidth in the
+    # limit of vertical edges.
+    eps = 1e-6
+    meta = dict(group_name='g', band_name='b')
+    r = FilterResponse([1000 - eps, 1000, 2000, 2000 + eps],
+                       [0, 1, 1, 0], meta)
+    assert np.allclose(r.pivot_wavelength.value,
+                       np.sqrt(1500. * 1000 / np.log(2.)), rtol=1e-8)
+    mean = (2000. ** 3 - 1000. ** 3) / 3 / 1.5e6
+    var = (2000. ** 4 - 1000. ** 4) / 4 / 1.5e6 - mean ** 2
+    assert np.allclose(r.effective_wavelength.value, mean, rtol=1e-8)
+    assert np.allclose(r.bandwidth.value, np.sqrt(var), rtol=1e-8)
+    assert r.pivot_wavelength.unit == default_wavelength_unit
+    sdss = load_filters('sdss2010-*')
+    assert np.all(np.diff(sdss.pivot_wavelengths.value) > 0)
+    assert np.all(sdss.bandwidths.value > 0)
+    # The zeropoint agrees with a numerical convolution.
+    rband = load_filter('sdss2010-r')
+    zp = rband.convolve_with_function(
+        ab_reference_flux, units=default_flux_unit)
+    assert np.allclose(rband.ab_zeropoint.value, zp.value, rtol=1e-5)
+
+
+def test_tabulate_convention():
+    wlen = np.arange(1, 4) * u.Angstrom
+    calls = []
+    def scalar(wlen):
+        calls.append(wlen)
+        return math.sqrt(wlen)
+    values, units = tabulate_function_of_wavelength(scalar, wlen)
+    assert np.allclose(values, np.sqrt([1, 2, 3])) and units is None
+    # The convention that worked is remembered.
+    del calls[:]
+    tabulate_function_of_wavelength(scalar, wlen)
+    assert len(calls) == 3
+    # A declared convention is used directly.
+    del calls[:]
+    tabulate_function_of_wavelength(scalar, wlen, convention='iterate')
+    assert len(calls) == 3
+    with pytest.raises(ValueError):
+        tabulate_function_of_wavelength(scalar, wlen, convention='broadcast')
+    with pytest.raises(ValueError):
+        tabulate_function_of_wavelength(scalar, wlen, convention='nosuch')
+    # Bound methods are remembered even though each access creates a new one.
+    class Model(object):
+        def scalar(self, wlen):
+            return scalar(wlen)
+    model = Model()
+    tabulate_function_of_wavelength(model.scalar, wlen)
+    del calls[:]
+    tabulate_function_of_wavelength(model.scalar, wlen)
+    assert len(calls) == 3
+    rband = load_filter('sdss2010-r')
+    flux = lambda wlen: 1e-17 * np.ones(len(wlen))
+    assert rband.convolve_with_function(flux, convention='broadcast') == \
+        rband.convolve_with_function(flux)
+
+
+def test_filter_cache():
+    clear_filter_cache()
+    rband = load_filter('sdss2010-r')
+    assert load_filter('sdss2010-r') is rband
+    info = filter_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert info.nbytes == rband.wavelength.nbytes + rband.response.nbytes
+    # Filters can be created or loaded without registering them.
+    meta = dict(group_name='g', band_name='b')
+    FilterResponse([1, 2, 3], [0, 1, 0], meta, register=False)
+    load_filter('sdss2010-g', register=False)
+    assert filter_cache_info().currsize == 1
+    # Check that the registry is bounded.
+    clear_filter_cache(maxsize=2)
+    for band in 'ugr':
+        load_filter('sdss2010-' + band)
+    info = filter_cache_info()
+    assert info.maxsize == 2 and info.currsize == 2 and info.misses == 3
+    assert load_filter('sdss2010-g', verbose=True) is not None
+    assert filter_cache_info().hits == 1
+    clear_filter_cache(maxsize=1000)
+    assert filter_cache_info() == (0, 0, 1000, 0, 0)
+    clear_filter_cache()
+    assert filter_cache_info().maxsize == 1000
+    # The registry can be made unbounded again.
+    clear_filter_cache(maxsize=None)
+    assert filter_cache_info().maxsize is None
+
+
+def test_filter_cache_threads():
+    clear_filter_cache()
+    names = ['sdss2010-' + band for band in 'ugriz']
+    errors = []
+    def load():
+        try:
+            for i in range(20):
+                load_filters(*names)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=load) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert filter_cache_info().currsize == 5
+
+
+def test_sequence_output():
+    sdss = load_filters('sdss2010-g', 'sdss2010-r', 'sdss2010-z')
+    wlen = np.arange(3500., 9000., 5.)
+    flux = np.ones((2, 3, len(wlen))) * 1e-17
+    table = sdss.get_ab_maggies(flux, wlen, mask_invalid=True)
+    maggies = sdss.get_ab_maggies(
+        flux, wlen, output='ndarray', mask_invalid=True)
+    assert maggies.shape == (2, 3, 3)
+    assert np.array_equal(maggies[:, :, 1], table['sdss2010-r'])
+    mags = sdss.get_ab_magnitudes(
+        flux, wlen, output='structured', mask_invalid=True)
+    assert mags.shape == (2, 3)
+    assert mags.dtype.names == tuple(sdss.names)
+    assert np.allclose(mags['sdss2010-r'], -2.5 * np.log10(maggies[..., 1]))
+    assert np.isnan(mags['sdss2010-z']).all()
+    # Output buffers can be re-used.
+    out = np.empty((2, 3, 3))
+    result = sdss.get_ab_maggies(
+        flux, wlen, output='ndarray', mask_invalid=True, out=out)
+    assert result is out
+    assert np.array_equal(out[..., :2], maggies[..., :2])
+    out = np.empty((3, 2), mags.dtype)
+    sdss.get_ab_magnitudes(np.moveaxis(flux, 0, 1), wlen, output='structured',
+                           mask_invalid=True, out=out)
+    assert np.array_equal(out['sdss2010-g'], mags['sdss2010-g'].T)
+    # Callable spectra give a single row.
+    f = lambda wlen: 1e-17 * default_flux_unit
+    result = sdss.get_ab_maggies(f, output='ndarray', mask_invalid=True)
+    assert result.shape == (3,)
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies(flux, wlen, output='nosuch')
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies(flux, wlen, out=np.empty((2, 3, 3)))
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies(flux, wlen, output='ndarray', out=np.empty(3))
+    with pytest.raises(ValueError):
+        sdss.get_ab_maggies(flux, wlen, output='structured', out=np.empty(3))
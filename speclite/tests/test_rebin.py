@@ -0,0 +1,86 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+from __future__ import print_function, division
+
+from astropy.tests.helper import pytest
+from ..rebin import rebin, Rebinner
+from ..filters import WavelengthGrid
+import numpy as np
+import numpy.ma as ma
+import pickle
+
+
+def test_conserve_integral():
+    edges_in = np.linspace(4000., 5000., 101)
+    edges_out = np.exp(np.linspace(np.log(4000.), np.log(5000.), 17))
+    data = np.empty((3, 100), dtype=[('flux', float), ('ivar', float)])
+    data['flux'] = np.random.RandomState(1).uniform(size=data.shape)
+    data['ivar'] = 4.
+    result = rebin(data, edges_in, edges_out, 'flux', ivar='ivar')
+    assert not ma.isMA(result)
+    assert result.shape == (3, 16)
+    assert np.allclose(
+        np.sum(result['flux'] * np.diff(edges_out), axis=-1),
+        np.sum(data['flux'] * np.diff(edges_in), axis=-1))
+    # Compare with a dense calculation of the propagated variance.
+    matrix = Rebinner(edges_in, edges_out).matrix.toarray()
+    assert np.allclose(matrix.sum(axis=1), 1.)
+    assert np.allclose(
+        result['ivar'], 1. / np.dot(matrix ** 2, np.full(100, 0.25)))
+
+
+def test_axis():
+    data = np.empty((100, 2), dtype=[('flux', float)])
+    data['flux'] = np.random.RandomState(2).uniform(size=data.shape)
+    edges_in = np.linspace(0., 1., 101)
+    edges_out = np.linspace(0., 1., 11)
+    result = rebin(data, edges_in, edges_out, 'flux', axis=0)
+    assert result.shape == (10, 2)
+    assert np.allclose(
+        result['flux'], data['flux'].reshape(10, 10, 2).mean(axis=1))
+    with pytest.raises(ValueError):
+        rebin(data, edges_in, edges_out, 'flux', axis=1)
+    with pytest.raises(ValueError):
+        rebin(data, edges_in, edges_out, 'flux', axis=2)
+
+
+def test_uncovered_and_masked():
+    data = ma.ones((6,), dtype=[('flux', float), ('ivar', float)])
+    data.mask = False
+    data['flux'][1] = ma.masked
+    edges_in = np.arange(7.)
+    edges_out = np.array([-1., 1., 2.5, 4., 5., 6.5])
+    result = rebin(data, edges_in, edges_out, 'flux', ivar='ivar')
+    assert ma.isMA(result)
+    assert np.array_equal(
+        result['flux'].mask, [True, True, False, False, True])
+    assert np.array_equal(
+        result['ivar'].mask, [True, True, False, False, True])
+    assert np.allclose(result['flux'][2:4], 1.)
+    assert np.allclose(result['ivar'][2:4], [1.8, 1.])
+
+
+def test_zero_ivar():
+    rebinner = Rebinner(np.arange(7.), np.array([0., 3., 6.]))
+    ivar = np.ones(6)
+    ivar[4] = 0
+    assert np.allclose(rebinner.rebin_ivar(ivar), [3., 0.])
+    with pytest.raises(ValueError):
+        rebinner.rebin_ivar(-ivar)
+
+
+def test_rebinner():
+    grid = WavelengthGrid(np.linspace(4000., 5000., 101))
+    rebinner = Rebinner(grid, np.linspace(4000., 5000., 11))
+    values = np.random.RandomState(3).uniform(size=(5, 101))
+    result = rebinner.rebin_values(values)
+    assert result.shape == (5, 10)
+    clone = pickle.loads(pickle.dumps(rebinner))
+    assert np.array_equal(clone.rebin_values(values), result)
+    with pytest.raises(ValueError):
+        Rebinner(np.arange(5.)[::-1], np.arange(3.))
+    with pytest.raises(ValueError):
+        Rebinner(np.arange(5.), np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        rebinner.rebin_values(values[:, :100])
+    with pytest.raises(ValueError):
+        rebinner(values)
@@ -215,3 +215,24 @@ def test_propagated_data_mask():
     assert not result['flux'].mask[0], 'Input mask not propagated.'
     assert result['wlen'].mask[1], 'Input mask not propagated.'
     assert result['extra'].mask[2], 'Input mask not propagated.'
+
+
+def test_separate_mask():
+    data = np.ones((5,), dtype=[('wlen', float), ('flux', float)])
+    mask = np.array([False, True, False, False, False])
+    z_out = np.array([[1.], [2.]])
+    result, mask_out = redshift(
+        z_in=0, z_out=z_out, data_in=data, mask=mask,
+        rules=[dict(name='wlen', exponent=+1)])
+    assert not ma.isMA(result)
+    assert mask_out.shape == result.shape == (2, 5)
+    assert np.all(mask_out == mask)
+    result, mask_out = redshift(
+        z_in=0, z_out=1, mask=mask,
+        rules=[dict(name='flux', exponent=-1, array_in=data['flux'])])
+    assert np.array_equal(mask_out, mask)
+    with pytest.raises(ValueError):
+        redshift(z_in=0, z_out=1, mask=mask[:4],
+                 rules=[dict(name='flux', exponent=-1, array_in=data['flux'])])
+    with pytest.raises(ValueError):
+        redshift(z_in=0, z_out=1, data_in=ma.array(data), mask=mask)
@@ -2,9 +2,11 @@
 from __future__ import print_function, division
 
 from astropy.tests.helper import pytest
-from ..resample import resample
+from ..resample import resample, Resampler, _searchsorted_rows
+from ..filters import WavelengthGrid
 import numpy as np
 import numpy.ma as ma
+import pickle
 
 
 def test_invalid_kind():
@@ -56,6 +58,37 @@ def test_extrapolate():
     assert np.array_equal(result['y'][1:-1], x2[1:-1])
 
 
+def test_extrapolate_int():
+    data = np.empty((10,), dtype=[('x', float), ('y', int)])
+    data['x'] = np.arange(10.)
+    data['y'] = np.arange(10) * 2
+    x2 = np.arange(-1., 11.)
+    expected_mask = (x2 < 0) | (x2 > 9)
+    for kind in ('linear', 'nearest', 'quadratic'):
+        result = resample(data, 'x', x2, 'y', kind=kind)
+        assert ma.isMA(result)
+        assert result['y'].dtype == int
+        assert np.array_equal(result['y'].mask, expected_mask)
+        assert np.all(result['y'].data[expected_mask] == 0)
+        if kind != 'quadratic':
+            assert np.array_equal(result['y'][1:-1], data['y'])
+    resampler = Resampler(data['x'], x2)
+    result = resampler(data, y='y')
+    assert ma.isMA(result)
+    assert np.array_equal(result['y'].mask, expected_mask)
+    assert np.array_equal(result['y'][1:-1], data['y'])
+    # Per-spectrum input grids.
+    data2 = np.empty((2, 10), dtype=[('y', int)])
+    data2['y'] = data['y']
+    x_in = np.array([data['x'], data['x'] + 1])
+    result = resample(data2, x_in, x2, 'y')
+    assert np.array_equal(result['y'].mask[0], expected_mask)
+    assert np.array_equal(result['y'].mask[1], (x2 < 1) | (x2 > 10))
+    # Unstructured output cannot use NaN for extrapolated values.
+    with pytest.raises(ValueError):
+        resampler(data['y'], data_out=np.empty(len(x2), int))
+
+
 def test_masked_all_valid():
     data = ma.empty((10,), dtype=[('x', float), ('y', float)])
     data['x'] = np.arange(10.)
@@ -247,3 +280,149 @@ def test_data_out_invalid_type():
     data_out = np.empty((9,), dtype=[('x', int), ('y', int)])
     with pytest.raises(ValueError):
         result = resample(data, 'x', x2, 'y', data_out=data_out)
+
+
+def test_wavelength_grid():
+    data = np.empty((10,), dtype=[('y', float)])
+    data['y'] = np.arange(10.)
+    x2 = np.arange(0.5, 9.5)
+    result = resample(data, WavelengthGrid(np.arange(1., 11.)),
+                      WavelengthGrid(x2 + 1), 'y')
+    assert np.array_equal(result['y'], x2)
+
+
+def test_multidimensional():
+    data = np.empty((3, 10, 2), dtype=[('y1', float), ('y2', float)])
+    data['y1'] = np.random.RandomState(1).uniform(size=data.shape)
+    data['y2'] = 2 * data['y1']
+    x = np.arange(10.)[::-1]
+    x2 = np.arange(-0.75, 9.75, 0.5)
+    for kind in ('linear', 'nearest', 'quadratic'):
+        result = resample(data, x, x2, ('y1', 'y2'), kind=kind, axis=1)
+        assert result.shape == (3, len(x2), 2)
+        assert ma.isMA(result)
+        for i in range(3):
+            for j in range(2):
+                expected = resample(
+                    data[i, :, j], x, x2, ('y1', 'y2'), kind=kind)
+                for y in ('y1', 'y2'):
+                    assert np.array_equal(
+                        result[y].mask[i, :, j], expected[y].mask)
+                    assert np.allclose(
+                        result[y][i, :, j].compressed(),
+                        expected[y].compressed(), rtol=1e-12, atol=0)
+    with pytest.raises(ValueError):
+        resample(data, x, x2, 'y1', axis=3)
+    with pytest.raises(ValueError):
+        resample(data, x, x2, 'y1', axis=0)
+
+
+def test_resampler():
+    data = np.empty((4, 10), dtype=[('y1', float), ('y2', float)])
+    data['y1'] = np.random.RandomState(2).uniform(size=data.shape)
+    data['y2'] = -data['y1']
+    x = np.arange(10.)
+    x2 = np.arange(-0.5, 10.5, 0.75)
+    for kind in ('linear', 'nearest'):
+        resampler = Resampler(x, x2, kind=kind)
+        expected = resample(data, x, x2, ('y1', 'y2'), kind=kind)
+        result = resampler(data)
+        assert ma.isMA(result)
+        assert np.array_equal(result.mask, expected.mask)
+        assert np.array_equal(result.filled(0), expected.filled(0))
+        # Unstructured arrays use NaN for extrapolated values.
+        plain = resampler(data['y1'].T.copy(), axis=0)
+        assert not ma.isMA(plain)
+        assert np.array_equal(np.isnan(plain.T), expected['y1'].mask)
+        assert np.array_equal(
+            plain.T[~expected['y1'].mask],
+            expected['y1'].data[~expected['y1'].mask])
+        # Resamplers can be pickled.
+        clone = pickle.loads(pickle.dumps(resampler))
+        assert np.array_equal(
+            clone(data, y='y2')['y2'].filled(0), expected['y2'].filled(0))
+    with pytest.raises(ValueError):
+        Resampler(x, x2, kind='cubic')
+    with pytest.raises(ValueError):
+        Resampler(x.reshape(2, 5, 1), x2)
+    with pytest.raises(ValueError):
+        Resampler(x, x2)(data[:, :5])
+
+
+def test_separate_mask():
+    data = ma.empty((10,), dtype=[('x', float), ('y', float), ('ivar', float)])
+    data['x'] = np.arange(10.)
+    data['y'] = np.arange(10.)
+    data['ivar'] = 1.
+    data.mask = False
+    data['y'].mask[4] = True
+    x2 = np.arange(-0.75, 9.75, 0.5)
+    expected = resample(data, 'x', x2, 'y')
+    plain = data.data.copy()
+    plain['y'][4] = np.nan
+    plain['ivar'][4] = 0
+    for mask in (plain['ivar'] == 0, 'ivar'):
+        result, mask_out = resample(plain, 'x', x2, 'y', mask=mask)
+        assert not ma.isMA(result)
+        assert not np.any(np.isnan(result['y']))
+        assert np.array_equal(mask_out, expected['y'].mask)
+        assert np.array_equal(result['y'][~mask_out], expected['y'].compressed())
+        assert np.all(result['y'][mask_out] == 0)
+    resampler = Resampler(data['x'].data, x2)
+    result, mask_out = resampler(plain, y='y', mask='ivar')
+    assert np.array_equal(mask_out, expected['y'].mask)
+    assert np.all(result['y'][mask_out] == 0)
+    result, mask_out = resampler(plain['y'], mask=plain['ivar'] == 0)
+    assert np.array_equal(result[~mask_out], expected['y'].compressed())
+    assert np.all(result[mask_out] == 0)
+    # Other kinds are only allowed when no inputs are invalid.
+    with pytest.raises(ValueError):
+        resample(plain, 'x', x2, 'y', kind='cubic', mask='ivar')
+    result, mask_out = resample(
+        plain, 'x', x2, 'ivar', kind='cubic', mask=np.zeros(10, bool))
+    assert np.array_equal(mask_out, (x2 < 0) | (x2 > 9))
+    with pytest.raises(ValueError):
+        resample(data, 'x', x2, 'y', mask='ivar')
+    with pytest.raises(ValueError):
+        resample(plain, 'x', x2, 'y', mask=np.zeros(9, bool))
+    with pytest.raises(ValueError):
+        resample(plain, 'x', x2, 'y', mask='foo')
+
+
+def test_per_spectrum_x_in():
+    generator = np.random.RandomState(3)
+    x = np.sort(generator.uniform(0., 10., size=(4, 12)), axis=-1)
+    x[1] = x[1][::-1]
+    x2 = np.linspace(-1., 11., 25)
+    x[2, 5] = x2[10]
+    assert np.array_equal(
+        _searchsorted_rows(np.sort(x, axis=-1), x2),
+        [np.searchsorted(row, x2) for row in np.sort(x, axis=-1)])
+    data = np.empty((4, 12), dtype=[('y1', float), ('y2', float)])
+    data['y1'] = generator.uniform(size=data.shape)
+    data['y2'] = -data['y1']
+    for kind in ('linear', 'nearest'):
+        result = resample(data, x, x2, ('y1', 'y2'), kind=kind)
+        assert result.shape == (4, 25)
+        transposed = resample(data.T, x.T, x2, ('y1', 'y2'), kind=kind, axis=0)
+        assert np.array_equal(transposed.T.mask, result.mask)
+        for i in range(4):
+            expected = resample(data[i], x[i], x2, ('y1', 'y2'), kind=kind)
+            for y in ('y1', 'y2'):
+                assert np.array_equal(result[y].mask[i], expected[y].mask)
+                assert np.array_equal(
+                    result[y][i].compressed(), expected[y].compressed())
+                assert np.array_equal(
+                    transposed[y][:, i].compressed(), expected[y].compressed())
+    mask = np.zeros(data.shape, bool)
+    mask[0, 3] = True
+    result, mask_out = resample(data, x, x2, 'y1', mask=mask)
+    expected, expected_mask = resample(data[0], x[0], x2, 'y1', mask=mask[0])
+    assert np.array_equal(mask_out[0], expected_mask)
+    assert np.array_equal(result['y1'][0], expected['y1'])
+    with pytest.raises(ValueError):
+        resample(data, x, x2, 'y1', kind='cubic')
+    with pytest.raises(ValueError):
+        resample(data[:3], x, x2, 'y1')
+    with pytest.raises(ValueError):
+        Resampler(x, x2)(data[:3])
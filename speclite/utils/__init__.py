@@ -2,3 +2,47 @@
 
 # This sub-module is destined for common non-package specific utility
 # functions that will ultimately be merged into `astropy.utils`
+
+import numpy as np
+import numpy.ma as ma
+
+
+def validate_mask(mask, data_in):
+    """Validate a mask of invalid values for a structured array.
+
+    Parameters
+    ----------
+    mask : numpy.ndarray or string or None
+        Boolean array with the same shape as ``data_in`` that is True for
+        invalid values, or the name of a field in ``data_in`` whose zero
+        values (e.g., zero inverse variances) identify invalid values.
+    data_in : numpy.ndarray
+        Structured array that the mask applies to, which must not be a
+        :class:`numpy.ma.MaskedArray`.
+
+    Returns
+    -------
+    numpy.ndarray or None
+        Boolean array with the same shape as ``data_in``, or None when
+        ``mask`` is None.
+
+    Raises
+    ------
+    ValueError
+        Mask is not valid for ``data_in``.
+    """
+    if mask is None:
+        return None
+    if ma.isMA(data_in):
+        raise ValueError('Cannot specify a mask with masked input data.')
+    if isinstance(mask, basestring):
+        if data_in.dtype.names is None or mask not in data_in.dtype.names:
+            raise ValueError('No such mask field: {0}.'.format(mask))
+        return data_in[mask] == 0
+    if not isinstance(mask, np.ndarray) or ma.isMA(mask):
+        raise ValueError('Invalid mask type: {0}.'.format(type(mask)))
+    if mask.shape != data_in.shape:
+        raise ValueError(
+            'Incompatible mask shape: {0}. Expected: {1}.'
+            .format(mask.shape, data_in.shape))
+    return mask.astype(bool, copy=False)